@@ -0,0 +1,71 @@
+"""
+Micro-benchmark - JSON serialisation of a 10k-event GET /events response
+
+Compares Flask's stdlib-based DefaultJSONProvider, used with the old
+per-row format_event copies, against FastJSONProvider with in-place row
+formatting. No database is needed; rows are psycopg2 RealDictRows shaped
+like the events listing query.
+
+Run from the repository root:
+    python benchmarks/json_provider.py [rows] [repeat]
+"""
+
+import os
+import sys
+import timeit
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from psycopg2.extras import RealDictRow
+from utils.formatters import format_event, format_event_row
+from utils.json_provider import FastJSONProvider
+
+
+def make_rows(count):
+    rows = []
+    for i in range(count):
+        row = RealDictRow()
+        row.update(
+            id=i + 1,
+            name=f"Evento solidário {i}",
+            description="Recolha de bens alimentares no centro paroquial " * 3,
+            date=date(2026, 1, 1) + timedelta(days=i % 365),
+            organisation_id=i % 50 or None,
+            interested_count=i % 200,
+        )
+        rows.append(row)
+    return rows
+
+
+def main(count=10_000, repeat=20):
+    app = Flask(__name__)
+    providers = {
+        "stdlib + format_event": (DefaultJSONProvider(app), format_event),
+        "fast + format_event_row": (FastJSONProvider(app), format_event_row),
+    }
+    if not FastJSONProvider.available:
+        print("orjson is not installed: FastJSONProvider falls back to the stdlib")
+
+    results = {}
+    with app.app_context():
+        for label, (provider, formatter) in providers.items():
+            def run():
+                # Fresh rows each time: format_event_row formats them in place
+                rows = [formatter(row) for row in make_rows(count)]
+                return provider.response({"events": rows, "count": len(rows), "next_cursor": None})
+
+            baseline = min(timeit.repeat(lambda: make_rows(count), number=1, repeat=repeat))
+            best = min(timeit.repeat(run, number=1, repeat=repeat)) - baseline
+            results[label] = best
+            size = len(run().get_data())
+            print(f"{label:26} {best * 1000:8.2f} ms  ({size / 1024:.0f} KiB)")
+
+    slow, fast = results.values()
+    print(f"speed-up: {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
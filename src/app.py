@@ -3,19 +3,42 @@ Events System Backend - Main Application
 """
 
 from flask import Flask
+from database import init_unit_of_work
 from db_init import init_database
+from models.location_cache import preload_location_index
 from routes import register_routes
+from utils.compression import init_compression
+from utils.json_provider import FastJSONProvider
+from utils.request_limit import init_request_limit
+from utils.request_metrics import init_request_metrics
 
 # Create Flask application
 app = Flask(__name__)
 
+# Serialise JSON with orjson when it is installed
+app.json = FastJSONProvider(app)
+
 # Register all route blueprints
 register_routes(app)
 
+# Cap concurrent requests (registered first so its slot is held until the final response is sent)
+init_request_limit(app)
+
+# Compress responses (registered before the remaining hooks so it sees their final response)
+init_compression(app)
+
+# Time requests and their database work, log slow ones
+init_request_metrics(app)
+
+# One connection and one transaction per request
+init_unit_of_work(app)
+
 
 if __name__ == "__main__":
     # Initialize database tables
     init_database()
+    # Load reference data into memory
+    preload_location_index()
     # Run the Flask application
     print(
         "🚀 Starting Events API on http://0.0.0.0:5000 (accessible on host at http://localhost:5001)"
@@ -0,0 +1,45 @@
+"""
+Message archival - Monthly message partition maintenance
+
+messages is partitioned by created_at month (see
+migrations/0010_partition_messages.sql). This job creates the partitions
+of the coming months and detaches the months older than
+MESSAGE_RETENTION_MONTHS into the messages_archive schema: they leave the
+inbox, thread history and stream replays (and their unread messages the
+thread counters) but stay queryable until dumped and dropped, e.g.
+    pg_dump -t 'messages_archive.messages_2024_01' ... && DROP TABLE messages_archive.messages_2024_01
+Run it periodically, e.g. daily from cron:
+    cd src && python archive_messages.py
+"""
+
+import os
+from psycopg2 import errors
+from db_init import MESSAGE_PARTITIONS_AHEAD
+from models.message_model import archive_message_partitions_in_db, create_message_partitions_in_db
+from services.message_service import MESSAGE_RETENTION_MONTHS
+
+# Longest wait for the queries running on messages before detaching (the next run retries)
+MESSAGE_ARCHIVE_LOCK_TIMEOUT = os.getenv("MESSAGE_ARCHIVE_LOCK_TIMEOUT", "5s")
+
+
+def archive_messages():
+    """Create the coming message partitions and archive the expired ones; returns the archived names"""
+    created = create_message_partitions_in_db(MESSAGE_PARTITIONS_AHEAD)
+    if created:
+        print(f"Created {created} message partition(s)")
+
+    try:
+        archived = archive_message_partitions_in_db(MESSAGE_RETENTION_MONTHS, MESSAGE_ARCHIVE_LOCK_TIMEOUT)
+    except errors.LockNotAvailable:
+        print("Messages are busy, archival skipped until the next run")
+        return []
+
+    for name in archived:
+        print(f"Archived messages_archive.{name}")
+    if not archived:
+        print(f"No message partitions older than {MESSAGE_RETENTION_MONTHS} months")
+    return archived
+
+
+if __name__ == "__main__":
+    archive_messages()
@@ -2,24 +2,674 @@
 Database connection utilities
 """
 
+import csv
+import io
+import itertools
 import os
-from psycopg2 import connect
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from flask import g, has_request_context, jsonify
+from psycopg2 import connect, OperationalError
+from psycopg2.extensions import connection as PGConnection, cursor as PGCursor, TRANSACTION_STATUS_IDLE
 from psycopg2.extras import RealDictCursor
+from metrics import observe_query
 
 
-def get_db_connection():
-    """Create a database connection"""
-    return connect(
+class PoolTimeoutError(OperationalError):
+    """Raised when no pooled connection becomes available in time"""
+
+
+def _request_metrics():
+    """Metrics collector of the current request (see utils/request_metrics.py), if any"""
+    if has_request_context():
+        return g.get("request_metrics")
+    return None
+
+
+def _caller_name():
+    """Module-qualified name of the innermost function outside this module, e.g. models.user_model.get_users_from_db"""
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get("__name__") == __name__:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return f"{frame.f_globals.get('__name__')}.{frame.f_code.co_name}"
+
+
+class _TimedCursorMixin:
+    """
+    Time each statement for the query latency metrics (labelled with the
+    function that ran it, or `source` when set) and report it to the
+    current request's metrics
+    """
+
+    source = None
+
+    def _timed(self, method, query, *args):
+        started = time.perf_counter()
+        try:
+            return method(query, *args)
+        finally:
+            seconds = time.perf_counter() - started
+            observe_query(self.source or _caller_name(), seconds)
+            metrics = _request_metrics()
+            if metrics is not None:
+                metrics.record_query(query, seconds)
+
+    def execute(self, query, vars=None):
+        return self._timed(super().execute, query, vars)
+
+    def executemany(self, query, vars_list):
+        return self._timed(super().executemany, query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._timed(super().copy_expert, sql, file, size)
+
+
+class TimedCursor(_TimedCursorMixin, PGCursor):
+    """Default cursor of pooled connections"""
+
+
+class TimedRealDictCursor(_TimedCursorMixin, RealDictCursor):
+    """RealDictCursor that reports to the request metrics"""
+
+
+class PooledConnection(PGConnection):
+    """
+    psycopg2 connection that goes back to its pool when closed.
+
+    While `deferred` is set the connection belongs to a request unit of
+    work: commit() and close() from model functions are no-ops and the
+    transaction is finished once, when the request ends.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursor_factory = TimedCursor
+        self.pool = None
+        self.borrowed = False
+        self.deferred = False
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+
+    def commit(self):
+        """Commit, unless the request unit of work will do it later"""
+        if not self.deferred:
+            PGConnection.commit(self)
+
+    def close(self):
+        """
+        Return the connection to its pool instead of closing the socket.
+        Broken connections go back too, so the pool frees their slot;
+        closing a connection that was already returned does nothing.
+        """
+        if self.deferred:
+            return
+        if self.pool is None:
+            PGConnection.close(self)
+        elif self.borrowed:
+            self.borrowed = False
+            self.pool.putconn(self)
+
+    def discard(self):
+        """Really close the underlying connection"""
+        PGConnection.close(self)
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of PooledConnection objects.
+
+    Connections are handed out most-recently-used first, checked with a
+    `SELECT 1` when they have been idle for longer than
+    `health_check_interval`, and recycled once they exceed `max_idle`
+    seconds unused (above `min_size`) or `max_lifetime` seconds of age.
+    """
+
+    def __init__(
+        self,
+        min_size=1,
+        max_size=10,
+        timeout=30.0,
+        max_idle=300.0,
+        max_lifetime=3600.0,
+        health_check_interval=30.0,
+        **connect_kwargs,
+    ):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size: need 0 <= min_size <= max_size, max_size >= 1")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self.connect_kwargs = connect_kwargs
+        self.pid = os.getpid()
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._health_check_failures = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+
+    def _connect(self):
+        conn = connect(connection_factory=PooledConnection, **self.connect_kwargs)
+        conn.pool = self
+        return conn
+
+    def _is_expired(self, conn, now):
+        if now - conn.created_at > self.max_lifetime:
+            return True
+        return now - conn.last_used_at > self.max_idle and self._size > self.min_size
+
+    def fill(self):
+        """Open connections until the pool holds at least min_size"""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._created += 1
+                self._idle.append(conn)
+                self._cond.notify()
+
+    def getconn(self, timeout=None):
+        """Borrow a connection, waiting up to `timeout` seconds (default: the pool's) for one"""
+        if timeout is None:
+            timeout = self.timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        waited = 0.0
+
+        while True:
+            conn = None
+            expired = []
+            with self._cond:
+                if self._closed:
+                    raise OperationalError("Connection pool is closed")
+
+                while conn is None:
+                    now = time.monotonic()
+                    while self._idle:
+                        candidate = self._idle.pop()
+                        if candidate.closed or self._is_expired(candidate, now):
+                            self._size -= 1
+                            self._recycled += 1
+                            expired.append(candidate)
+                            continue
+                        conn = candidate
+                        break
+                    if conn is not None:
+                        break
+
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"No database connection available after {timeout}s "
+                            f"(pool max_size={self.max_size})"
+                        )
+                    self._waiting += 1
+                    wait_start = time.monotonic()
+                    self._cond.wait(remaining)
+                    waited += time.monotonic() - wait_start
+                    self._waiting -= 1
+
+                self._in_use += 1
+
+            for stale in expired:
+                stale.discard()
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._created += 1
+            elif not self._check_health(conn):
+                continue
+
+            elapsed = time.monotonic() - start
+            with self._cond:
+                self._checkouts += 1
+                self._wait_time_total += waited
+                self._wait_time_max = max(self._wait_time_max, waited)
+                self._checkout_time_total += elapsed
+                self._checkout_time_max = max(self._checkout_time_max, elapsed)
+
+            metrics = _request_metrics()
+            if metrics is not None:
+                metrics.record_connection()
+            conn.borrowed = True
+            return conn
+
+    def _check_health(self, conn):
+        """Ping a connection that sat idle for a while; drop it if it is dead"""
+        if time.monotonic() - conn.last_used_at < self.health_check_interval:
+            return True
+
+        try:
+            cursor = conn.cursor()
+            cursor.source = "database.health_check"
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception:
+            conn.discard()
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._health_check_failures += 1
+                self._cond.notify()
+            return False
+
+    def putconn(self, conn):
+        """Return a borrowed connection, rolling back any open transaction"""
+        keep = not conn.closed and not self._closed
+        if keep and conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except Exception:
+                keep = False
+        if keep and conn.autocommit:
+            conn.autocommit = False
+
+        now = time.monotonic()
+        if keep and now - conn.created_at > self.max_lifetime:
+            keep = False
+
+        with self._cond:
+            self._in_use -= 1
+            if keep:
+                conn.last_used_at = now
+                self._idle.append(conn)
+            else:
+                self._size -= 1
+                self._recycled += 1
+            self._cond.notify()
+
+        if not keep and not conn.closed:
+            conn.discard()
+
+    def close(self):
+        """Close idle connections; borrowed ones are closed when returned"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            conn.discard()
+
+    def stats(self):
+        """Snapshot of pool size and checkout timings"""
+        with self._cond:
+            checkouts = self._checkouts or 1
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "connections_created": self._created,
+                "connections_recycled": self._recycled,
+                "health_check_failures": self._health_check_failures,
+                "timeouts": self._timeouts,
+                "wait_time_total_ms": round(self._wait_time_total * 1000, 3),
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+                "checkout_latency_avg_ms": round(self._checkout_time_total * 1000 / checkouts, 3),
+                "checkout_latency_max_ms": round(self._checkout_time_max * 1000, 3),
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# Pools inherited through fork() must not be closed by the child, as that
+# would terminate the parent's sessions; keep them referenced instead.
+_inherited_pools = []
+
+
+def _pool_from_env():
+    # Server-side cap on any single query, in milliseconds (0 = no limit);
+    # migrations, bulk loads and exports lift it for their own transactions
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "10000"))
+    options = f"-c statement_timeout={statement_timeout}" if statement_timeout else None
+
+    return ConnectionPool(
+        min_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+        max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        max_idle=float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+        max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+        health_check_interval=float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30")),
         host=os.getenv("DB_HOST", "postgres"),
         port=os.getenv("DB_PORT", "5432"),
         database=os.getenv("DB_NAME", "events_db"),
         user=os.getenv("DB_USER", "postgres"),
         password=os.getenv("DB_PASSWORD", "postgres"),
+        options=options,
+    )
+
+
+def get_pool():
+    """Get the process-wide connection pool, creating it on first use"""
+    global _pool
+    pool = _pool
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+
+    with _pool_lock:
+        if _pool is not None and _pool.pid != os.getpid():
+            _inherited_pools.append(_pool)
+            _pool = None
+        if _pool is None:
+            pool = _pool_from_env()
+            pool.fill()
+            _pool = pool
+        return _pool
+
+
+def close_pool():
+    """Close the process-wide connection pool (it is recreated on next use)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is None:
+        return
+    if pool.pid == os.getpid():
+        pool.close()
+    else:
+        _inherited_pools.append(pool)
+
+
+def get_pool_stats():
+    """Get statistics for the process-wide connection pool"""
+    pool = _pool
+    if pool is None or pool.pid != os.getpid():
+        return None
+    return pool.stats()
+
+
+def get_db_connection():
+    """
+    Borrow a database connection from the pool (close() returns it).
+    Inside a request every call gets the request's unit-of-work connection.
+    """
+    if not has_request_context():
+        return get_pool().getconn()
+
+    conn = g.get("db_connection")
+    if conn is not None and conn.closed:
+        # Broken mid-request: give its slot back before borrowing another
+        conn.deferred = False
+        conn.close()
+        conn = None
+    if conn is None:
+        conn = get_pool().getconn()
+        conn.deferred = True
+        g.db_connection = conn
+    return conn
+
+
+def _finish_unit_of_work(response):
+    """Commit the request transaction (or roll it back on server errors)"""
+    conn = g.pop("db_connection", None)
+    if conn is None:
+        return response
+
+    conn.deferred = False
+    metrics = g.get("request_metrics")
+    started = time.perf_counter()
+    try:
+        if response.status_code < 500:
+            conn.commit()
+            seconds = time.perf_counter() - started
+            observe_query("database.commit", seconds)
+            if metrics is not None:
+                metrics.record_query("COMMIT", seconds)
+        else:
+            conn.rollback()
+    except Exception as e:
+        response = jsonify({"error": str(e)})
+        response.status_code = 500
+    finally:
+        conn.close()
+    return response
+
+
+def _abort_unit_of_work(exc):
+    """Roll back and release a connection left over by a failed request"""
+    conn = g.pop("db_connection", None)
+    if conn is not None:
+        conn.deferred = False
+        conn.close()
+
+
+def init_unit_of_work(app):
+    """Run each request's database calls on one connection and one transaction"""
+    app.after_request(_finish_unit_of_work)
+    app.teardown_request(_abort_unit_of_work)
+
+
+# Rows fetched per round-trip by server-side cursors
+STREAM_ITERSIZE = int(os.getenv("DB_STREAM_ITERSIZE", "1000"))
+_stream_cursor_ids = itertools.count(1)
+
+
+def stream_query(query, params=None, itersize=STREAM_ITERSIZE):
+    """
+    Yield rows from a server-side (named) cursor, `itersize` rows per
+    round-trip, so memory stays flat whatever the result size.
+    Streams outlive the request handler, so they borrow their own pooled
+    connection instead of the request unit of work.
+    """
+    # The rows are read after the caller returned; label its query now
+    return _stream_query(query, params, itersize, _caller_name())
+
+
+def _stream_query(query, params, itersize, source):
+    conn = get_pool().getconn()
+    try:
+        cursor = conn.cursor(
+            name=f"stream_{os.getpid()}_{next(_stream_cursor_ids)}",
+            cursor_factory=TimedRealDictCursor,
+        )
+        cursor.itersize = itersize
+        cursor.source = source
+        try:
+            cursor.execute(query, params)
+            for row in cursor:
+                yield row
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+
+
+# Bytes of COPY output gathered before handing a chunk to the response,
+# and chunks buffered between the COPY thread and the response
+COPY_CHUNK_SIZE = 64 * 1024
+COPY_QUEUE_CHUNKS = 8
+
+_COPY_DONE = object()
+
+
+class _CopyAborted(Exception):
+    """Raised in the COPY thread once the consumer of a stream_copy has gone away"""
+
+
+class _QueueWriter:
+    """File-like sink for COPY ... TO STDOUT that hands fixed-size chunks to a bounded queue"""
+
+    def __init__(self, chunks, stopped, chunk_size):
+        self._chunks = chunks
+        self._stopped = stopped
+        self._chunk_size = chunk_size
+        self._parts = []
+        self._size = 0
+
+    def put(self, item):
+        # Blocks while the queue is full (backpressure), until the consumer stops
+        while not self._stopped.is_set():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise _CopyAborted()
+
+    def write(self, data):
+        self._parts.append(data)
+        self._size += len(data)
+        if self._size >= self._chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            data = b"".join(part if isinstance(part, bytes) else part.encode() for part in self._parts)
+            self._parts = []
+            self._size = 0
+            self.put(data)
+
+
+def stream_copy(statement, params=None, chunk_size=COPY_CHUNK_SIZE):
+    """
+    Yield the output of a `COPY ... TO STDOUT` statement as bytes chunks.
+    psycopg2 runs COPY to completion in one call, so it runs on a helper
+    thread feeding a small bounded queue: memory stays flat and the COPY
+    waits for slow clients. Like stream_query it borrows its own pooled
+    connection; a stream abandoned half-way cancels the COPY and that
+    connection is discarded.
+    """
+    return _stream_copy(statement, params, chunk_size, _caller_name())
+
+
+def _stream_copy(statement, params, chunk_size, source):
+    conn = get_pool().getconn()
+    chunks = queue.Queue(maxsize=COPY_QUEUE_CHUNKS)
+    stopped = threading.Event()
+    writer = _QueueWriter(chunks, stopped, chunk_size)
+
+    def run_copy():
+        try:
+            with conn.cursor() as cursor:
+                cursor.source = source
+                # The COPY lasts as long as the client takes to read the export
+                cursor.execute("SET LOCAL statement_timeout = 0")
+                if params is not None:
+                    cursor.copy_expert(cursor.mogrify(statement, params).decode(), writer)
+                else:
+                    cursor.copy_expert(statement, writer)
+            writer.flush()
+            writer.put(_COPY_DONE)
+        except _CopyAborted:
+            pass
+        except Exception as e:
+            try:
+                writer.put(e)
+            except _CopyAborted:
+                pass
+
+    thread = threading.Thread(target=run_copy, name="stream-copy", daemon=True)
+    thread.start()
+
+    completed = False
+    try:
+        while True:
+            item = chunks.get()
+            if item is _COPY_DONE:
+                completed = True
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+        if not completed:
+            try:
+                conn.cancel()
+            except Exception:
+                pass
+        thread.join()
+        if completed:
+            conn.close()
+        else:
+            # The connection may be stuck mid-COPY; let the pool replace it
+            conn.discard()
+            conn.close()
+
+
+class _CsvRowReader:
+    """File-like object that serialises rows to CSV only as COPY reads them"""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def read(self, size=-1):
+        buffer = self._buffer
+        for row in self._rows:
+            self._writer.writerow(row)
+            if 0 <= size <= buffer.tell():
+                break
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+
+def copy_rows(cursor, table, columns, rows):
+    """
+    COPY an iterable of tuples into `table` (CSV format; None and "" become NULL).
+    Rows are pulled lazily, so memory stays flat for any number of rows.
+    Returns the number of rows copied.
+    """
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        _CsvRowReader(rows),
     )
+    return cursor.rowcount
 
 
 def get_db_cursor(conn, dict_cursor=True):
     """Get a database cursor"""
     if dict_cursor:
-        return conn.cursor(cursor_factory=RealDictCursor)
+        return conn.cursor(cursor_factory=TimedRealDictCursor)
     return conn.cursor()
@@ -1,10 +1,141 @@
+"""
+Database initialisation - Versioned schema migrations
+
+Migrations are the numbered SQL files in src/migrations
+(`NNNN_description.sql`), applied in order, each in its own transaction
+and recorded in the schema_version table; the bundled gazetteer is then
+loaded if it changed (see gazetteer.py) and the message partitions of
+the coming months are created (see archive_messages.py). A start against
+an up-to-date database only reads: the applied migrations, the gazetteer
+checksum and the existing partitions. Pending migrations are applied
+under an advisory lock so concurrent workers or replicas wait for one
+migrator instead of racing it.
+"""
+
+import hashlib
+import os
+import re
 import time
-from psycopg2 import OperationalError
+from psycopg2 import OperationalError, errors
 from database import get_db_connection
+from gazetteer import load_gazetteer
+from models.message_model import create_message_partitions_in_db
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# pg_advisory_lock key shared by every process applying migrations
+MIGRATIONS_LOCK_ID = 7_243_001
+# Months of message partitions created ahead of the current one
+MESSAGE_PARTITIONS_AHEAD = int(os.getenv("MESSAGE_PARTITIONS_AHEAD", "3"))
+
+
+def load_migrations():
+    """
+    Read the migration files in version order
+    Returns: list of (version, name, sql, checksum)
+    """
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, filename), encoding="utf-8") as f:
+            sql = f.read()
+        checksum = hashlib.sha256(sql.encode("utf-8")).hexdigest()
+        migrations.append((int(match.group(1)), match.group(2), sql, checksum))
+
+    versions = [migration[0] for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {MIGRATIONS_DIR}")
+    return migrations
+
+
+def get_applied_migrations(cursor):
+    """Get {version: checksum} of applied migrations; empty if schema_version does not exist yet"""
+    try:
+        cursor.execute("SELECT version, checksum FROM schema_version")
+    except errors.UndefinedTable:
+        cursor.connection.rollback()
+        return {}
+    applied = dict(cursor.fetchall())
+    cursor.connection.rollback()
+    return applied
+
+
+def _warn_on_changed_migrations(migrations, applied):
+    for version, name, _, checksum in migrations:
+        if version in applied and applied[version] != checksum:
+            print(f"Warning: migration {version:04d}_{name} changed after it was applied")
+
+
+def apply_migrations(conn):
+    """Apply pending migrations; returns the versions applied by this process"""
+    cursor = conn.cursor()
+    migrations = load_migrations()
+
+    # Fast path: nothing to do, no lock taken
+    applied = get_applied_migrations(cursor)
+    if all(version in applied for version, *_ in migrations):
+        _warn_on_changed_migrations(migrations, applied)
+        cursor.close()
+        return []
+
+    newly_applied = []
+    # Waiting for another migrator and the migrations themselves may take
+    # longer than DB_STATEMENT_TIMEOUT_MS
+    cursor.execute("SET statement_timeout = 0")
+    cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATIONS_LOCK_ID,))
+    try:
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                checksum CHAR(64) NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                execution_ms INTEGER NOT NULL
+            )
+        """
+        )
+        conn.commit()
+
+        # Another process may have applied them while we waited for the lock
+        applied = get_applied_migrations(cursor)
+        _warn_on_changed_migrations(migrations, applied)
+
+        for version, name, sql, checksum in migrations:
+            if version in applied:
+                continue
+
+            print(f"Applying migration {version:04d}_{name}...")
+            started = time.perf_counter()
+            try:
+                cursor.execute(sql)
+                cursor.execute(
+                    """
+                    INSERT INTO schema_version (version, name, checksum, execution_ms)
+                    VALUES (%s, %s, %s, %s)
+                    """,
+                    (version, name, checksum, int((time.perf_counter() - started) * 1000)),
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                print(f"Migration {version:04d}_{name} failed")
+                raise
+            newly_applied.append(version)
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATIONS_LOCK_ID,))
+        cursor.execute("RESET statement_timeout")
+        conn.commit()
+        cursor.close()
+
+    return newly_applied
 
 
 def init_database():
-    """Initialize the database with required tables"""
+    """Bring the database schema up to date"""
     max_retries = 5
     retry_count = 0
 
@@ -12,527 +143,23 @@ def init_database():
         try:
             print("Attempting to connect to database...")
             conn = get_db_connection()
-            cursor = conn.cursor()
-
-            # Create districts table
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS districts (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL UNIQUE,
-                    population INTEGER,
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """
-            )
-
-            # Create municipalities table
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS municipalities (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    district_id INTEGER NOT NULL,
-                    population INTEGER,
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (district_id) REFERENCES districts(id) ON DELETE CASCADE,
-                    UNIQUE(name, district_id)
-                )
-            """
-            )
-
-            # Create parishes table
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS parishes (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    municipality_id INTEGER NOT NULL,
-                    population INTEGER,
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (municipality_id) REFERENCES municipalities(id) ON DELETE CASCADE,
-                    UNIQUE(name, municipality_id)
-                )
-            """
-            )
-
-            # Create users table
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS users (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    age INTEGER NOT NULL CHECK (age >= 0),
-                    gender VARCHAR(10) NOT NULL CHECK (gender IN ('male', 'female', 'other')),
-                    street VARCHAR(255) NOT NULL,
-                    street_number VARCHAR(20) NOT NULL,
-                    apartment VARCHAR(50),
-                    postal_code VARCHAR(20) NOT NULL,
-                    city VARCHAR(100) NOT NULL,
-                    is_volunteer BOOLEAN DEFAULT FALSE,
-                    is_assisted BOOLEAN DEFAULT FALSE,
-                    has_organisation BOOLEAN DEFAULT FALSE,
-                    organisation_id INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """
-            )
-
-            # Create organisation_allowed_municipalities junction table
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS organisation_allowed_municipalities (
-                    id SERIAL PRIMARY KEY,
-                    organisation_id INTEGER NOT NULL,
-                    municipality_id INTEGER NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(organisation_id, municipality_id)
-                )
-            """
-            )
-
-            # Create organisation_allowed_parishes junction table
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS organisation_allowed_parishes (
-                    id SERIAL PRIMARY KEY,
-                    organisation_id INTEGER NOT NULL,
-                    parish_id INTEGER NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(organisation_id, parish_id)
-                )
-            """
-            )
-
-            # Create organisations table
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS organisations (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL UNIQUE,
-                    description TEXT,
-                    head_user_id INTEGER NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """
-            )
-
-            # Create events table
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS events (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL UNIQUE,
-                    description TEXT NOT NULL,
-                    date DATE NOT NULL,
-                    organisation_id INTEGER,
-                    interested_count INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (organisation_id) REFERENCES organisations(id) ON DELETE SET NULL
-                )
-            """
-            )
-
-            # Create event_interest table to track which users are interested in which events
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS event_interest (
-                    id SERIAL PRIMARY KEY,
-                    user_id INTEGER NOT NULL,
-                    event_id INTEGER NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                    FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
-                    UNIQUE(user_id, event_id)
-                )
-            """
-            )
-
-            # Create user_codes table for QR code generation
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS user_codes (
-                    id SERIAL PRIMARY KEY,
-                    user_id INTEGER NOT NULL UNIQUE,
-                    code VARCHAR(20) NOT NULL UNIQUE,
-                    is_active BOOLEAN DEFAULT TRUE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-                )
-            """
-            )
-
-            # Create volunteer_assisted table for volunteer-assisted relationships
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS volunteer_assisted (
-                    id SERIAL PRIMARY KEY,
-                    volunteer_id INTEGER NOT NULL,
-                    assisted_id INTEGER NOT NULL UNIQUE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (volunteer_id) REFERENCES users(id) ON DELETE CASCADE,
-                    FOREIGN KEY (assisted_id) REFERENCES users(id) ON DELETE CASCADE,
-                    UNIQUE(volunteer_id, assisted_id)
-                )
-            """
-            )
-
-            # Create event_transport_requests table for transport requests
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS event_transport_requests (
-                    id SERIAL PRIMARY KEY,
-                    event_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    requested_by_volunteer_id INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                    FOREIGN KEY (requested_by_volunteer_id) REFERENCES users(id) ON DELETE SET NULL,
-                    UNIQUE(event_id, user_id)
-                )
-            """
-            )
-
-            # Create messages table for in-app messaging
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS messages (
-                    id SERIAL PRIMARY KEY,
-                    sender_id INTEGER NOT NULL,
-                    receiver_id INTEGER NOT NULL,
-                    message TEXT NOT NULL,
-                    is_read BOOLEAN DEFAULT FALSE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (sender_id) REFERENCES users(id) ON DELETE CASCADE,
-                    FOREIGN KEY (receiver_id) REFERENCES users(id) ON DELETE CASCADE
-                )
-            """
-            )
-
-            # Add foreign key constraints
-            cursor.execute(
-                """
-                DO $$ 
-                BEGIN
-                    IF NOT EXISTS (
-                        SELECT 1 FROM pg_constraint 
-                        WHERE conname = 'users_organisation_id_fkey'
-                    ) THEN
-                        ALTER TABLE users 
-                        ADD CONSTRAINT users_organisation_id_fkey 
-                        FOREIGN KEY (organisation_id) REFERENCES organisations(id) ON DELETE SET NULL;
-                    END IF;
-                END $$;
-            """
-            )
-
-            cursor.execute(
-                """
-                DO $$ 
-                BEGIN
-                    IF NOT EXISTS (
-                        SELECT 1 FROM pg_constraint 
-                        WHERE conname = 'organisations_head_user_id_fkey'
-                    ) THEN
-                        ALTER TABLE organisations 
-                        ADD CONSTRAINT organisations_head_user_id_fkey 
-                        FOREIGN KEY (head_user_id) REFERENCES users(id) ON DELETE RESTRICT;
-                    END IF;
-                END $$;
-            """
-            )
-
-            cursor.execute(
-                """
-                DO $$ 
-                BEGIN
-                    IF NOT EXISTS (
-                        SELECT 1 FROM pg_constraint 
-                        WHERE conname = 'org_allowed_municipalities_org_fkey'
-                    ) THEN
-                        ALTER TABLE organisation_allowed_municipalities 
-                        ADD CONSTRAINT org_allowed_municipalities_org_fkey 
-                        FOREIGN KEY (organisation_id) REFERENCES organisations(id) ON DELETE CASCADE;
-                    END IF;
-                END $$;
-            """
-            )
-
-            cursor.execute(
-                """
-                DO $$ 
-                BEGIN
-                    IF NOT EXISTS (
-                        SELECT 1 FROM pg_constraint 
-                        WHERE conname = 'org_allowed_municipalities_mun_fkey'
-                    ) THEN
-                        ALTER TABLE organisation_allowed_municipalities 
-                        ADD CONSTRAINT org_allowed_municipalities_mun_fkey 
-                        FOREIGN KEY (municipality_id) REFERENCES municipalities(id) ON DELETE CASCADE;
-                    END IF;
-                END $$;
-            """
-            )
-
-            cursor.execute(
-                """
-                DO $$ 
-                BEGIN
-                    IF NOT EXISTS (
-                        SELECT 1 FROM pg_constraint 
-                        WHERE conname = 'org_allowed_parishes_org_fkey'
-                    ) THEN
-                        ALTER TABLE organisation_allowed_parishes 
-                        ADD CONSTRAINT org_allowed_parishes_org_fkey 
-                        FOREIGN KEY (organisation_id) REFERENCES organisations(id) ON DELETE CASCADE;
-                    END IF;
-                END $$;
-            """
-            )
-
-            cursor.execute(
-                """
-                DO $$ 
-                BEGIN
-                    IF NOT EXISTS (
-                        SELECT 1 FROM pg_constraint 
-                        WHERE conname = 'org_allowed_parishes_parish_fkey'
-                    ) THEN
-                        ALTER TABLE organisation_allowed_parishes 
-                        ADD CONSTRAINT org_allowed_parishes_parish_fkey 
-                        FOREIGN KEY (parish_id) REFERENCES parishes(id) ON DELETE CASCADE;
-                    END IF;
-                END $$;
-            """
-            )
-
-            # Create indexes for better performance
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_events_date ON events(date)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_events_name ON events(name)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_events_organisation ON events(organisation_id)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_users_organisation ON users(organisation_id)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_event_interest_user ON event_interest(user_id)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_event_interest_event ON event_interest(event_id)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_municipalities_district ON municipalities(district_id)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_parishes_municipality ON parishes(municipality_id)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_org_allowed_mun_org ON organisation_allowed_municipalities(organisation_id)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_org_allowed_par_org ON organisation_allowed_parishes(organisation_id)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_user_codes_user ON user_codes(user_id)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_user_codes_code ON user_codes(code)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_volunteer_assisted_volunteer ON volunteer_assisted(volunteer_id)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_volunteer_assisted_assisted ON volunteer_assisted(assisted_id)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_transport_requests_event ON event_transport_requests(event_id)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_transport_requests_user ON event_transport_requests(user_id)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_messages_sender ON messages(sender_id)
-            """
-            )
-
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_messages_receiver ON messages(receiver_id)
-            """
-            )
-
-            # Insert initial data: District of Braga
-            cursor.execute(
-                """
-                INSERT INTO districts (name, population, description)
-                VALUES ('Braga', NULL, NULL)
-                ON CONFLICT (name) DO NOTHING
-            """
-            )
-
-            # Get district_id for Braga
-            cursor.execute("SELECT id FROM districts WHERE name = 'Braga'")
-            district_result = cursor.fetchone()
-            if district_result:
-                district_id = district_result[0]
-
-                # Insert all municipalities of Braga district
-                municipalities = [
-                    'Celorico de Basto',
-                    'Cabeceiras de Basto',
-                    'Fafe',
-                    'Guimarães',
-                    'Póvoa de Lanhoso',
-                    'Vieira do Minho',
-                    'Vila Nova de Famalicão',
-                    'Vizela',
-                    'Amares',
-                    'Barcelos',
-                    'Braga',
-                    'Esposende',
-                    'Terras de Bouro',
-                    'Vila Verde'
-                ]
-
-                for municipality in municipalities:
-                    cursor.execute(
-                        """
-                        INSERT INTO municipalities (name, district_id, population, description)
-                        VALUES (%s, %s, NULL, NULL)
-                        ON CONFLICT (name, district_id) DO NOTHING
-                        """,
-                        (municipality, district_id)
-                    )
-
-                # Get municipality_id for Braga
-                cursor.execute(
-                    "SELECT id FROM municipalities WHERE name = 'Braga' AND district_id = %s",
-                    (district_id,)
+            try:
+                applied = apply_migrations(conn)
+                gazetteer = load_gazetteer(conn)
+            finally:
+                conn.close()
+            partitions = create_message_partitions_in_db(MESSAGE_PARTITIONS_AHEAD)
+
+            if applied:
+                print(f"Database initialized successfully! Applied {len(applied)} migration(s)")
+            else:
+                print("Database schema is up to date")
+            if gazetteer:
+                print(
+                    "Gazetteer loaded: {} districts, {} municipalities, {} parishes added".format(*gazetteer)
                 )
-                municipality_result = cursor.fetchone()
-                if municipality_result:
-                    municipality_id = municipality_result[0]
-
-                    # Insert all parishes of Braga municipality
-                    parishes = [
-                        'Adaúfe',
-                        'Arentim e Cunha',
-                        'Braga (Maximinos, Sé e Cividade)',
-                        'Braga (São José de São Lázaro e São João do Souto)',
-                        'Braga (São Vicente)',
-                        'Braga (São Vítor)',
-                        'Cabreiros e Passos (São Julião)',
-                        'Celeirós, Aveleda e Vimieiro',
-                        'Crespos e Pousada',
-                        'Escudeiros e Penso (Santo Estêvão e São Vicente)',
-                        'Espinho',
-                        'Esporões',
-                        'Este (São Pedro e São Mamede)',
-                        'Ferreiros e Gondizalves',
-                        'Figueiredo',
-                        'Gualtar',
-                        'Guisande e Oliveira (São Pedro)',
-                        'Lamas',
-                        'Lomar e Arcos',
-                        'Merelim (São Paio), Panóias e Parada de Tibães',
-                        'Merelim (São Pedro) e Frossos',
-                        'Mire de Tibães',
-                        'Morreira e Trandeiras',
-                        'Nogueira, Fraião e Lamaçães',
-                        'Nogueiró e Tenões',
-                        'Padim da Graça',
-                        'Palmeira',
-                        'Pedralva',
-                        'Priscos',
-                        'Real, Dume e Semelhe',
-                        'Ruilhe',
-                        'Santa Lucrécia de Algeriz e Navarra',
-                        'Sequeira',
-                        'Sobreposta',
-                        'Tadim',
-                        'Tebosa',
-                        'Vilaça e Fradelos'
-                    ]
-
-                    for parish in parishes:
-                        cursor.execute(
-                            """
-                            INSERT INTO parishes (name, municipality_id, population, description)
-                            VALUES (%s, %s, NULL, NULL)
-                            ON CONFLICT (name, municipality_id) DO NOTHING
-                            """,
-                            (parish, municipality_id)
-                        )
-
-            conn.commit()
-            cursor.close()
-            conn.close()
-
-            print("Database initialized successfully!")
+            if partitions:
+                print(f"Created {partitions} message partition(s)")
             return True
 
         except OperationalError as e:
@@ -0,0 +1,23 @@
+"""
+Interest counter folding - Periodic maintenance of event interest counts
+
+Interests are counted in event_interest_counts shard rows (see
+migrations/0008_event_interest_counts.sql); this job moves them into
+events.interested_count so reading a count sums fewer rows. It is safe to
+run at any time and writes nothing when there is nothing to fold. Run it
+periodically, e.g. hourly from cron:
+    cd src && python fold_interest_counts.py
+"""
+
+from models.event_model import fold_interest_counts_in_db
+
+
+def fold_interest_counts():
+    """Fold the interest counter shards into the events; returns the number of events updated"""
+    folded = fold_interest_counts_in_db()
+    print(f"Interest counters folded into {folded} event(s)")
+    return folded
+
+
+if __name__ == "__main__":
+    fold_interest_counts()
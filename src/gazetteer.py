@@ -0,0 +1,149 @@
+"""
+Gazetteer loader - Bulk load of districts, municipalities and parishes
+
+The reference data ships as data/gazetteer.csv with one row per
+(district, municipality, parish); municipality and parish may be empty
+to list a district or municipality on its own. The file is COPYed into a
+temporary staging table and merged with three set-based inserts, all in
+one transaction. Its checksum is kept in reference_data, so a start with
+an unchanged file only compares hashes.
+
+Coverage: the bundled file is not the national dataset. It lists the 18
+districts and 2 autonomous regions, but only the municipalities of Braga
+district and the parishes of Braga municipality (see TODO.md). Pass a
+complete file in the same format to load the rest.
+"""
+
+import hashlib
+import os
+import sys
+from database import get_db_connection
+from models.location_cache import invalidate_location_index
+
+GAZETTEER_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.csv"
+)
+GAZETTEER_NAME = "gazetteer"
+
+# pg_advisory_xact_lock key held while the gazetteer is being loaded
+GAZETTEER_LOCK_ID = 7_243_002
+
+
+def _file_checksum(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _loaded_checksum(cursor):
+    cursor.execute("SELECT checksum FROM reference_data WHERE name = %s", (GAZETTEER_NAME,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _merge_staging(cursor):
+    """Insert the staged locations that do not exist yet; returns (districts, municipalities, parishes) added"""
+    cursor.execute(
+        """
+        INSERT INTO districts (name)
+        SELECT DISTINCT district FROM gazetteer_staging
+        ON CONFLICT (name) DO NOTHING
+        """
+    )
+    districts = cursor.rowcount
+
+    cursor.execute(
+        """
+        INSERT INTO municipalities (name, district_id)
+        SELECT DISTINCT s.municipality, d.id
+        FROM gazetteer_staging s
+        JOIN districts d ON d.name = s.district
+        WHERE s.municipality IS NOT NULL
+        ON CONFLICT (name, district_id) DO NOTHING
+        """
+    )
+    municipalities = cursor.rowcount
+
+    cursor.execute(
+        """
+        INSERT INTO parishes (name, municipality_id)
+        SELECT DISTINCT s.parish, m.id
+        FROM gazetteer_staging s
+        JOIN districts d ON d.name = s.district
+        JOIN municipalities m ON m.district_id = d.id AND m.name = s.municipality
+        WHERE s.parish IS NOT NULL
+        ON CONFLICT (name, municipality_id) DO NOTHING
+        """
+    )
+    parishes = cursor.rowcount
+
+    return districts, municipalities, parishes
+
+
+def load_gazetteer(conn, path=GAZETTEER_PATH, force=False):
+    """
+    Load the gazetteer file unless the same file was already loaded
+    Returns: (districts, municipalities, parishes) inserted, or None if skipped
+    """
+    checksum = _file_checksum(path)
+    cursor = conn.cursor()
+
+    try:
+        if not force and _loaded_checksum(cursor) == checksum:
+            conn.rollback()
+            return None
+
+        # Serialise concurrent loaders; re-check once the lock is held. The
+        # bulk load is not bound by DB_STATEMENT_TIMEOUT_MS.
+        cursor.execute("SET LOCAL statement_timeout = 0")
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (GAZETTEER_LOCK_ID,))
+        if not force and _loaded_checksum(cursor) == checksum:
+            conn.rollback()
+            return None
+
+        cursor.execute(
+            """
+            CREATE TEMP TABLE gazetteer_staging (
+                district VARCHAR(255) NOT NULL,
+                municipality VARCHAR(255),
+                parish VARCHAR(255)
+            ) ON COMMIT DROP
+            """
+        )
+        with open(path, encoding="utf-8") as f:
+            cursor.copy_expert(
+                "COPY gazetteer_staging (district, municipality, parish) FROM STDIN WITH (FORMAT csv, HEADER true)",
+                f,
+            )
+        row_count = cursor.rowcount
+
+        inserted = _merge_staging(cursor)
+
+        cursor.execute(
+            """
+            INSERT INTO reference_data (name, checksum, row_count, loaded_at)
+            VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (name) DO UPDATE
+            SET checksum = EXCLUDED.checksum, row_count = EXCLUDED.row_count, loaded_at = EXCLUDED.loaded_at
+            """,
+            (GAZETTEER_NAME, checksum, row_count),
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    invalidate_location_index()
+    return inserted
+
+
+if __name__ == "__main__":
+    conn = get_db_connection()
+    try:
+        result = load_gazetteer(conn, *sys.argv[1:2], force=True)
+    finally:
+        conn.close()
+    print(
+        "Gazetteer loaded: {} districts, {} municipalities, {} parishes added".format(*result)
+    )
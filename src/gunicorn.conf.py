@@ -0,0 +1,104 @@
+"""
+Gunicorn configuration - Production WSGI server for the Events API
+
+Run from the repository root with:
+    gunicorn --config src/gunicorn.conf.py --chdir src app:app
+
+The master process initialises the database once and then forks the
+workers; each worker opens its own connection pool after the fork.
+`kill -HUP <master pid>` gracefully replaces the workers.
+
+Workers share their Prometheus metrics through files in
+PROMETHEUS_MULTIPROC_DIR; unless it is set, a fresh temporary directory
+is used for each run of the master (see metrics.py).
+"""
+
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+
+# Must be set before prometheus_client is imported by the app. This file is
+# read again on HUP, when the variable already names the directory in use.
+METRICS_DIR_PREFIX = "events-api-metrics-"
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix=METRICS_DIR_PREFIX)
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Processes x threads; keep workers x (DB_POOL_MAX_SIZE + 1) below Postgres max_connections
+# (each worker also holds one LISTEN connection for message streams)
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+# Request threads, plus one per open message stream (an idle stream only waits
+# on a queue); threads are started as they are needed. Only MAX_CONCURRENT_REQUESTS
+# (default GUNICORN_THREADS) ordinary requests run at once, the rest wait for a slot
+# (see utils/request_limit.py), so the extra threads never compete for DB_POOL_MAX_SIZE
+threads = int(os.getenv("GUNICORN_THREADS", "4")) + int(os.getenv("MESSAGE_STREAMS_PER_WORKER", "64"))
+
+# Seconds before a silent worker is killed / before shutdown stops waiting
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+# Import the app once in the master so workers fork with it loaded
+preload_app = True
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    """Initialise the database once, in the master, before any worker exists"""
+    from database import close_pool
+    from db_init import init_database
+
+    init_database()
+    # Do not hand the master's connections down to forked workers
+    close_pool()
+
+
+def post_fork(server, worker):
+    """Give each worker its own connection pool and warm the location cache"""
+    from database import close_pool
+    from models.location_cache import preload_location_index
+
+    close_pool()
+    try:
+        preload_location_index()
+    except Exception as e:
+        # The index is loaded lazily on first use instead
+        server.log.warning(f"Could not preload location index: {e}")
+
+
+def post_worker_init(worker):
+    """End open message streams as soon as the worker is told to stop, not after graceful_timeout"""
+    from message_notifications import close_message_streams
+
+    handle_exit = signal.getsignal(signal.SIGTERM)
+
+    def handle_exit_and_close_streams(sig, frame):
+        handle_exit(sig, frame)
+        close_message_streams()
+
+    signal.signal(signal.SIGTERM, handle_exit_and_close_streams)
+
+
+def child_exit(server, worker):
+    """Stop counting an exited worker's pool gauges"""
+    from metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    """Remove the metrics directory if it is the temporary one created for this run"""
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    if os.path.basename(metrics_dir).startswith(METRICS_DIR_PREFIX):
+        shutil.rmtree(metrics_dir, ignore_errors=True)
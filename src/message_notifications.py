@@ -0,0 +1,314 @@
+"""
+Message notifications - Push new messages to open message streams
+
+create_message() sends a NOTIFY on MESSAGE_CHANNEL with the ids of the
+new message, its sender and receiver; Postgres delivers it when the
+transaction commits. Each process runs one listener thread on one
+dedicated LISTEN connection. Open streams subscribe to their user; for
+every batch of notifications the listener loads the messages whose
+receiver has an open stream in one query and puts them on those streams'
+queues. An idle stream is a thread waiting on its queue: it holds no
+database connection and does no work until a message or a heartbeat is due.
+
+Streams resume from the last message they saw (the SSE Last-Event-ID):
+the listener replays the newer messages of a stream that subscribes with
+one, and of every stream after the LISTEN connection was lost and
+re-established. Streams that cannot be replayed get a RESYNC item telling
+the client to reload its messages. Delivery is at least once: a resumed
+stream may repeat a message the client already has.
+"""
+
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+from psycopg2 import connect
+from database import get_pool
+from metrics import set_message_streams
+from models.message_model import (
+    MESSAGE_CHANNEL,
+    get_messages_by_ids,
+    get_received_messages_after,
+)
+
+# Open streams per process; each holds a server thread (see gunicorn.conf.py)
+MESSAGE_STREAMS_PER_WORKER = int(os.getenv("MESSAGE_STREAMS_PER_WORKER", "64"))
+# Seconds between heartbeats of an idle stream / before a stream ends and the client reconnects
+MESSAGE_STREAM_HEARTBEAT_SECONDS = float(os.getenv("MESSAGE_STREAM_HEARTBEAT_SECONDS", "15"))
+MESSAGE_STREAM_MAX_SECONDS = float(os.getenv("MESSAGE_STREAM_MAX_SECONDS", "300"))
+
+# Messages queued for a stream that does not keep up before it is closed (it resumes on reconnect)
+STREAM_QUEUE_SIZE = 1000
+# Messages replayed to a resuming stream; beyond that it gets RESYNC instead
+MAX_REPLAY_MESSAGES = 500
+# Seconds to wait for the LISTEN connection when the first stream opens
+LISTENER_READY_TIMEOUT = 5.0
+# Seconds between pings of an idle LISTEN connection, and the reconnect backoff
+LISTENER_PING_SECONDS = 30.0
+LISTENER_RETRY_SECONDS = 1.0
+LISTENER_MAX_RETRY_SECONDS = 30.0
+
+# Queue items besides message rows
+RESYNC = "resync"
+CLOSE = "close"
+
+logger = logging.getLogger("events_api.message_notifications")
+
+
+class StreamUnavailableError(Exception):
+    """Raised when a stream cannot be opened (too many streams, or no LISTEN connection)"""
+
+
+class Subscription:
+    """An open stream: the messages received by `user_id` after `last_id`"""
+
+    def __init__(self, listener, user_id, last_id=None):
+        self.listener = listener
+        self.user_id = user_id
+        self.last_id = last_id
+        self.queue = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+        # Set while the messages after last_id still have to be replayed;
+        # ids of the last replay, whose notifications may still be on their way
+        self.replay = last_id is not None
+        self.replayed = set()
+        self.closed = False
+
+    def push(self, item):
+        """Queue an item; a stream that fell too far behind is closed instead"""
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.closed = True
+            return False
+
+    def events(self):
+        """
+        Yield ("message", id, row) for each message and ("resync", None, {})
+        when messages may have been missed; None when a heartbeat is due.
+        Ends after MESSAGE_STREAM_MAX_SECONDS, or when the stream is closed.
+        """
+        deadline = time.monotonic() + MESSAGE_STREAM_MAX_SECONDS
+        try:
+            while not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    item = self.queue.get(timeout=min(MESSAGE_STREAM_HEARTBEAT_SECONDS, remaining))
+                except queue.Empty:
+                    yield None
+                    continue
+                if item is CLOSE:
+                    return
+                if item is RESYNC:
+                    yield "resync", None, {}
+                else:
+                    yield "message", item["id"], item
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop receiving messages (safe to call more than once)"""
+        self.closed = True
+        self.listener.unsubscribe(self)
+
+
+class MessageListener:
+    """Per-process LISTEN connection fanning message notifications out to subscriptions"""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+        self._count = 0
+        self._ready = threading.Event()
+        self._thread = None
+        self._close_requested = False
+        # Wakes the listener thread when a subscription needs a replay or streams must close
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_write, False)
+
+    def subscribe(self, user_id, last_id=None):
+        """Open a subscription; raises StreamUnavailableError"""
+        with self._lock:
+            if self._count >= MESSAGE_STREAMS_PER_WORKER:
+                raise StreamUnavailableError("Too many open message streams, retry later")
+            subscription = Subscription(self, user_id, last_id)
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+            self._count += 1
+            set_message_streams(self._count)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="message-listener", daemon=True
+                )
+                self._thread.start()
+
+        if not self._ready.wait(LISTENER_READY_TIMEOUT):
+            subscription.close()
+            raise StreamUnavailableError("Message notifications are unavailable, retry later")
+        if subscription.replay:
+            self._wake()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+            self._count -= 1
+            set_message_streams(self._count)
+
+    def request_close(self):
+        """
+        Have the listener thread end every open stream. Takes no locks, so
+        it is safe in a signal handler (which may interrupt itself).
+        """
+        self._close_requested = True
+        self._wake()
+
+    def _close_all(self):
+        for subscription in self._all_subscriptions():
+            subscription.closed = True
+            subscription.push(CLOSE)
+
+    def _wake(self):
+        try:
+            os.write(self._wake_write, b"\0")
+        except BlockingIOError:
+            # Already has pending wake-ups
+            pass
+
+    def _all_subscriptions(self):
+        with self._lock:
+            return [s for group in self._subscriptions.values() for s in group]
+
+    def _run(self):
+        retry = LISTENER_RETRY_SECONDS
+        reconnecting = False
+        while True:
+            try:
+                conn = connect(**get_pool().connect_kwargs)
+            except Exception as e:
+                logger.warning(f"Message listener cannot connect: {e}")
+                time.sleep(retry)
+                retry = min(retry * 2, LISTENER_MAX_RETRY_SECONDS)
+                reconnecting = True
+                continue
+
+            retry = LISTENER_RETRY_SECONDS
+            try:
+                conn.autocommit = True
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {MESSAGE_CHANNEL}")
+                if reconnecting:
+                    self._resync()
+                self._ready.set()
+                self._listen(conn, cursor)
+            except Exception as e:
+                logger.warning(f"Message listener connection lost: {e}")
+            finally:
+                self._ready.clear()
+                conn.close()
+            reconnecting = True
+
+    def _resync(self):
+        """Catch up every stream on what was sent while not listening"""
+        for subscription in self._all_subscriptions():
+            if subscription.last_id is not None:
+                subscription.replay = True
+            else:
+                subscription.push(RESYNC)
+
+    def _listen(self, conn, cursor):
+        while True:
+            self._replay_pending()
+
+            readable, _, _ = select.select([conn, self._wake_read], [], [], LISTENER_PING_SECONDS)
+            if self._wake_read in readable:
+                os.read(self._wake_read, 4096)
+                if self._close_requested:
+                    self._close_requested = False
+                    self._close_all()
+            if conn in readable:
+                conn.poll()
+                notifies = list(conn.notifies)
+                conn.notifies.clear()
+                self._deliver(notifies)
+            elif not readable:
+                # Detect a connection that died silently
+                cursor.execute("SELECT 1")
+
+    def _replay_pending(self):
+        for subscription in self._all_subscriptions():
+            if not subscription.replay:
+                continue
+            rows = get_received_messages_after(
+                subscription.user_id, subscription.last_id, MAX_REPLAY_MESSAGES + 1
+            )
+            if len(rows) > MAX_REPLAY_MESSAGES:
+                subscription.push(RESYNC)
+                subscription.last_id = rows[-1]["id"]
+                subscription.replayed = set()
+            else:
+                for row in rows:
+                    self._push(subscription, row)
+                subscription.replayed = {row["id"] for row in rows}
+            subscription.replay = False
+
+    def _deliver(self, notifies):
+        """Load the notified messages of users with open streams and queue them"""
+        with self._lock:
+            message_ids = []
+            for notify in notifies:
+                try:
+                    payload = json.loads(notify.payload)
+                except ValueError:
+                    continue
+                if payload.get("receiver_id") in self._subscriptions:
+                    message_ids.append(payload["id"])
+        if not message_ids:
+            return
+
+        rows = get_messages_by_ids(message_ids)
+        with self._lock:
+            for row in rows:
+                for subscription in self._subscriptions.get(row["receiver_id"], ()):
+                    # Replays pick up anything committed before they run
+                    if not subscription.replay and row["id"] not in subscription.replayed:
+                        self._push(subscription, row)
+
+    def _push(self, subscription, row):
+        # Ids are not committed in order: remember the highest one for replays
+        if subscription.push(row):
+            subscription.last_id = max(subscription.last_id or 0, row["id"])
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def get_message_listener():
+    """Get the process-wide message listener, creating it on first use"""
+    global _listener
+    listener = _listener
+    if listener is not None and listener.pid == os.getpid():
+        return listener
+
+    with _listener_lock:
+        if _listener is None or _listener.pid != os.getpid():
+            _listener = MessageListener()
+        return _listener
+
+
+def close_message_streams():
+    """End every stream open in this process (the listener keeps running); signal-safe"""
+    listener = _listener
+    if listener is not None and listener.pid == os.getpid():
+        listener.request_close()
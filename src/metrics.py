@@ -0,0 +1,173 @@
+"""
+Metrics - Prometheus counters, gauges and histograms served at /metrics
+
+Values are kept with prometheus_client. Under gunicorn each worker writes
+them to memory-mapped files in PROMETHEUS_MULTIPROC_DIR (set up by
+gunicorn.conf.py) and a scrape adds up every worker's files, so whichever
+worker answers, /metrics reports the totals of the whole server. Without
+that variable (e.g. `python app.py`) the values live in the process.
+
+Labelled children are cached in plain dicts, so after the first
+observation of a label set no metric-wide lock is taken; only the
+increments themselves are locked.
+"""
+
+import os
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Request latency (its _count is the number of requests) by route and status code",
+    ("blueprint", "endpoint", "method", "status"),
+    buckets=REQUEST_BUCKETS,
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds",
+    "Database statement latency by the function that ran it",
+    ("function",),
+    buckets=QUERY_BUCKETS,
+)
+cache_lookups = Counter(
+    "cache_lookups",
+    "Cache lookups by cache and result (hit or miss)",
+    ("cache", "result"),
+)
+# Pool gauges are per process; "livesum" adds up the live workers
+db_pool_connections = Gauge(
+    "db_pool_connections",
+    "Pooled database connections by state (in_use or idle)",
+    ("state",),
+    multiprocess_mode="livesum",
+)
+db_pool_max_connections = Gauge(
+    "db_pool_max_connections",
+    "Maximum size of the database connection pools",
+    multiprocess_mode="livesum",
+)
+db_pool_waiting = Gauge(
+    "db_pool_waiting",
+    "Threads waiting for a pooled database connection",
+    multiprocess_mode="livesum",
+)
+message_streams_open = Gauge(
+    "message_streams_open",
+    "Open message streams (Server-Sent Events)",
+    multiprocess_mode="livesum",
+)
+
+
+class _Children:
+    """labels() of a metric, cached so known label sets skip the metric's lock"""
+
+    def __init__(self, metric):
+        self._metric = metric
+        self._children = {}
+
+    def get(self, *labels):
+        child = self._children.get(labels)
+        if child is None:
+            child = self._children[labels] = self._metric.labels(*labels)
+        return child
+
+
+_request_durations = _Children(http_request_duration)
+_query_durations = _Children(db_query_duration)
+_cache_lookups = _Children(cache_lookups)
+_pool_connections = _Children(db_pool_connections)
+
+
+def observe_request(blueprint, endpoint, method, status, seconds):
+    """Record a finished request"""
+    _request_durations.get(blueprint or "none", endpoint or "none", method, status).observe(seconds)
+
+
+def observe_query(function, seconds):
+    """Record a database statement run by `function` (module-qualified name)"""
+    _query_durations.get(function).observe(seconds)
+
+
+def record_cache_lookup(cache, hit):
+    """Count a hit or a miss of an in-process or HTTP cache"""
+    _cache_lookups.get(cache, "hit" if hit else "miss").inc()
+
+
+def set_pool_gauges(stats):
+    """Publish this process's connection pool stats (see database.get_pool_stats)"""
+    if stats is None:
+        return
+    _pool_connections.get("in_use").set(stats["in_use"])
+    _pool_connections.get("idle").set(stats["idle"])
+    db_pool_max_connections.set(stats["max_size"])
+    db_pool_waiting.set(stats["waiting"])
+
+
+def set_message_streams(count):
+    """Publish the number of message streams open in this process"""
+    message_streams_open.set(count)
+
+
+def _cache_hit_ratios(families):
+    """cache_hit_ratio gauge computed from the (aggregated) cache_lookups counters"""
+    lookups = {}
+    for family in families:
+        if family.name != "cache_lookups":
+            continue
+        for sample in family.samples:
+            if sample.name == "cache_lookups_total":
+                counts = lookups.setdefault(sample.labels["cache"], [0.0, 0.0])
+                counts[sample.labels["result"] == "hit"] += sample.value
+
+    ratios = GaugeMetricFamily(
+        "cache_hit_ratio", "Share of cache lookups that were hits since start", labels=("cache",)
+    )
+    for cache, (misses, hits) in sorted(lookups.items()):
+        if hits + misses:
+            ratios.add_metric((cache,), hits / (hits + misses))
+    return ratios
+
+
+class _Snapshot:
+    """Already collected metric families, in the shape generate_latest() expects"""
+
+    def __init__(self, families):
+        self._families = families
+
+    def collect(self):
+        return self._families
+
+
+def render_metrics():
+    """
+    Collect every metric in the Prometheus text exposition format
+    Returns: (body bytes, content type)
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    families = list(registry.collect())
+    families.append(_cache_hit_ratios(families))
+    return generate_latest(_Snapshot(families)), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """Drop the live gauges of an exited worker (gunicorn child_exit hook)"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,205 @@
+-- Initial schema: locations, users, organisations, events and the
+-- volunteer / transport / messaging tables.
+-- Uses IF NOT EXISTS so databases created before migrations existed
+-- are adopted as-is.
+
+CREATE TABLE IF NOT EXISTS districts (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    population INTEGER,
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS municipalities (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    district_id INTEGER NOT NULL,
+    population INTEGER,
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (district_id) REFERENCES districts(id) ON DELETE CASCADE,
+    UNIQUE(name, district_id)
+);
+
+CREATE TABLE IF NOT EXISTS parishes (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    municipality_id INTEGER NOT NULL,
+    population INTEGER,
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (municipality_id) REFERENCES municipalities(id) ON DELETE CASCADE,
+    UNIQUE(name, municipality_id)
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    age INTEGER NOT NULL CHECK (age >= 0),
+    gender VARCHAR(10) NOT NULL CHECK (gender IN ('male', 'female', 'other')),
+    street VARCHAR(255) NOT NULL,
+    street_number VARCHAR(20) NOT NULL,
+    apartment VARCHAR(50),
+    postal_code VARCHAR(20) NOT NULL,
+    city VARCHAR(100) NOT NULL,
+    is_volunteer BOOLEAN DEFAULT FALSE,
+    is_assisted BOOLEAN DEFAULT FALSE,
+    has_organisation BOOLEAN DEFAULT FALSE,
+    organisation_id INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS organisation_allowed_municipalities (
+    id SERIAL PRIMARY KEY,
+    organisation_id INTEGER NOT NULL,
+    municipality_id INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(organisation_id, municipality_id)
+);
+
+CREATE TABLE IF NOT EXISTS organisation_allowed_parishes (
+    id SERIAL PRIMARY KEY,
+    organisation_id INTEGER NOT NULL,
+    parish_id INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(organisation_id, parish_id)
+);
+
+CREATE TABLE IF NOT EXISTS organisations (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    description TEXT,
+    head_user_id INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS events (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    description TEXT NOT NULL,
+    date DATE NOT NULL,
+    organisation_id INTEGER,
+    interested_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (organisation_id) REFERENCES organisations(id) ON DELETE SET NULL
+);
+
+-- Which users are interested in which events
+CREATE TABLE IF NOT EXISTS event_interest (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    event_id INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+    UNIQUE(user_id, event_id)
+);
+
+-- QR codes used to link volunteers and assisted users
+CREATE TABLE IF NOT EXISTS user_codes (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL UNIQUE,
+    code VARCHAR(20) NOT NULL UNIQUE,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS volunteer_assisted (
+    id SERIAL PRIMARY KEY,
+    volunteer_id INTEGER NOT NULL,
+    assisted_id INTEGER NOT NULL UNIQUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (volunteer_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (assisted_id) REFERENCES users(id) ON DELETE CASCADE,
+    UNIQUE(volunteer_id, assisted_id)
+);
+
+CREATE TABLE IF NOT EXISTS event_transport_requests (
+    id SERIAL PRIMARY KEY,
+    event_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    requested_by_volunteer_id INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (requested_by_volunteer_id) REFERENCES users(id) ON DELETE SET NULL,
+    UNIQUE(event_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS messages (
+    id SERIAL PRIMARY KEY,
+    sender_id INTEGER NOT NULL,
+    receiver_id INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    is_read BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (sender_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (receiver_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Foreign keys between tables that reference each other
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'users_organisation_id_fkey') THEN
+        ALTER TABLE users
+        ADD CONSTRAINT users_organisation_id_fkey
+        FOREIGN KEY (organisation_id) REFERENCES organisations(id) ON DELETE SET NULL;
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'organisations_head_user_id_fkey') THEN
+        ALTER TABLE organisations
+        ADD CONSTRAINT organisations_head_user_id_fkey
+        FOREIGN KEY (head_user_id) REFERENCES users(id) ON DELETE RESTRICT;
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'org_allowed_municipalities_org_fkey') THEN
+        ALTER TABLE organisation_allowed_municipalities
+        ADD CONSTRAINT org_allowed_municipalities_org_fkey
+        FOREIGN KEY (organisation_id) REFERENCES organisations(id) ON DELETE CASCADE;
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'org_allowed_municipalities_mun_fkey') THEN
+        ALTER TABLE organisation_allowed_municipalities
+        ADD CONSTRAINT org_allowed_municipalities_mun_fkey
+        FOREIGN KEY (municipality_id) REFERENCES municipalities(id) ON DELETE CASCADE;
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'org_allowed_parishes_org_fkey') THEN
+        ALTER TABLE organisation_allowed_parishes
+        ADD CONSTRAINT org_allowed_parishes_org_fkey
+        FOREIGN KEY (organisation_id) REFERENCES organisations(id) ON DELETE CASCADE;
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'org_allowed_parishes_parish_fkey') THEN
+        ALTER TABLE organisation_allowed_parishes
+        ADD CONSTRAINT org_allowed_parishes_parish_fkey
+        FOREIGN KEY (parish_id) REFERENCES parishes(id) ON DELETE CASCADE;
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_events_date ON events(date);
+CREATE INDEX IF NOT EXISTS idx_events_organisation ON events(organisation_id);
+CREATE INDEX IF NOT EXISTS idx_events_name ON events(name);
+CREATE INDEX IF NOT EXISTS idx_users_organisation ON users(organisation_id);
+CREATE INDEX IF NOT EXISTS idx_event_interest_user ON event_interest(user_id);
+CREATE INDEX IF NOT EXISTS idx_event_interest_event ON event_interest(event_id);
+CREATE INDEX IF NOT EXISTS idx_municipalities_district ON municipalities(district_id);
+CREATE INDEX IF NOT EXISTS idx_parishes_municipality ON parishes(municipality_id);
+CREATE INDEX IF NOT EXISTS idx_org_allowed_mun_org ON organisation_allowed_municipalities(organisation_id);
+CREATE INDEX IF NOT EXISTS idx_org_allowed_par_org ON organisation_allowed_parishes(organisation_id);
+CREATE INDEX IF NOT EXISTS idx_user_codes_user ON user_codes(user_id);
+CREATE INDEX IF NOT EXISTS idx_user_codes_code ON user_codes(code);
+CREATE INDEX IF NOT EXISTS idx_volunteer_assisted_volunteer ON volunteer_assisted(volunteer_id);
+CREATE INDEX IF NOT EXISTS idx_volunteer_assisted_assisted ON volunteer_assisted(assisted_id);
+CREATE INDEX IF NOT EXISTS idx_transport_requests_event ON event_transport_requests(event_id);
+CREATE INDEX IF NOT EXISTS idx_transport_requests_user ON event_transport_requests(user_id);
+CREATE INDEX IF NOT EXISTS idx_messages_sender ON messages(sender_id);
+CREATE INDEX IF NOT EXISTS idx_messages_receiver ON messages(receiver_id);
@@ -0,0 +1,74 @@
+-- Seed data: the district of Braga, its municipalities and the
+-- parishes of the municipality of Braga
+
+INSERT INTO districts (name, population, description)
+VALUES ('Braga', NULL, NULL)
+ON CONFLICT (name) DO NOTHING;
+
+INSERT INTO municipalities (name, district_id, population, description)
+SELECT m.name, d.id, NULL, NULL
+FROM districts d
+CROSS JOIN (VALUES
+    ('Celorico de Basto'),
+    ('Cabeceiras de Basto'),
+    ('Fafe'),
+    ('Guimarães'),
+    ('Póvoa de Lanhoso'),
+    ('Vieira do Minho'),
+    ('Vila Nova de Famalicão'),
+    ('Vizela'),
+    ('Amares'),
+    ('Barcelos'),
+    ('Braga'),
+    ('Esposende'),
+    ('Terras de Bouro'),
+    ('Vila Verde')
+) AS m(name)
+WHERE d.name = 'Braga'
+ON CONFLICT (name, district_id) DO NOTHING;
+
+INSERT INTO parishes (name, municipality_id, population, description)
+SELECT p.name, m.id, NULL, NULL
+FROM municipalities m
+JOIN districts d ON d.id = m.district_id
+CROSS JOIN (VALUES
+    ('Adaúfe'),
+    ('Arentim e Cunha'),
+    ('Braga (Maximinos, Sé e Cividade)'),
+    ('Braga (São José de São Lázaro e São João do Souto)'),
+    ('Braga (São Vicente)'),
+    ('Braga (São Vítor)'),
+    ('Cabreiros e Passos (São Julião)'),
+    ('Celeirós, Aveleda e Vimieiro'),
+    ('Crespos e Pousada'),
+    ('Escudeiros e Penso (Santo Estêvão e São Vicente)'),
+    ('Espinho'),
+    ('Esporões'),
+    ('Este (São Pedro e São Mamede)'),
+    ('Ferreiros e Gondizalves'),
+    ('Figueiredo'),
+    ('Gualtar'),
+    ('Guisande e Oliveira (São Pedro)'),
+    ('Lamas'),
+    ('Lomar e Arcos'),
+    ('Merelim (São Paio), Panóias e Parada de Tibães'),
+    ('Merelim (São Pedro) e Frossos'),
+    ('Mire de Tibães'),
+    ('Morreira e Trandeiras'),
+    ('Nogueira, Fraião e Lamaçães'),
+    ('Nogueiró e Tenões'),
+    ('Padim da Graça'),
+    ('Palmeira'),
+    ('Pedralva'),
+    ('Priscos'),
+    ('Real, Dume e Semelhe'),
+    ('Ruilhe'),
+    ('Santa Lucrécia de Algeriz e Navarra'),
+    ('Sequeira'),
+    ('Sobreposta'),
+    ('Tadim'),
+    ('Tebosa'),
+    ('Vilaça e Fradelos')
+) AS p(name)
+WHERE d.name = 'Braga' AND m.name = 'Braga'
+ON CONFLICT (name, municipality_id) DO NOTHING;
@@ -0,0 +1,9 @@
+-- Full-text search vector over event name (weight A) and description (weight B)
+
+ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector
+GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_events_search ON events USING GIN (search_vector);
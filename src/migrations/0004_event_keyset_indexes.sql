@@ -0,0 +1,8 @@
+-- Keyset pagination on (date, id), optionally within an organisation
+
+CREATE INDEX IF NOT EXISTS idx_events_date_id ON events(date, id);
+CREATE INDEX IF NOT EXISTS idx_events_organisation_date ON events(organisation_id, date, id);
+
+-- Superseded by the composite indexes above
+DROP INDEX IF EXISTS idx_events_date;
+DROP INDEX IF EXISTS idx_events_organisation;
@@ -0,0 +1,49 @@
+-- Change counters for HTTP cache watermarks.
+-- Every writing statement on a tracked table bumps one of 16 shards
+-- (picked by backend pid) so concurrent writers rarely share a row.
+
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(63) NOT NULL,
+    shard SMALLINT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, shard)
+);
+
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO table_versions (table_name, shard, version, updated_at)
+    VALUES (TG_TABLE_NAME, pg_backend_pid() % 16, 1, clock_timestamp())
+    ON CONFLICT (table_name, shard) DO UPDATE
+    SET version = table_versions.version + 1, updated_at = clock_timestamp();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER events_bump_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON events
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE OR REPLACE TRIGGER organisations_bump_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON organisations
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE OR REPLACE TRIGGER organisation_allowed_municipalities_bump_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON organisation_allowed_municipalities
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE OR REPLACE TRIGGER organisation_allowed_parishes_bump_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON organisation_allowed_parishes
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE OR REPLACE TRIGGER districts_bump_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON districts
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE OR REPLACE TRIGGER municipalities_bump_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON municipalities
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE OR REPLACE TRIGGER parishes_bump_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON parishes
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
@@ -0,0 +1,9 @@
+-- Bundled reference datasets (e.g. the gazetteer) loaded into the database,
+-- keyed by name with the checksum of the file that was loaded
+
+CREATE TABLE IF NOT EXISTS reference_data (
+    name VARCHAR(63) PRIMARY KEY,
+    checksum CHAR(64) NOT NULL,
+    row_count INTEGER NOT NULL,
+    loaded_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,10 @@
+-- Location of each user, resolved from the postal code when the user is created
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS district_id INTEGER REFERENCES districts(id) ON DELETE SET NULL;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS municipality_id INTEGER REFERENCES municipalities(id) ON DELETE SET NULL;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS parish_id INTEGER REFERENCES parishes(id) ON DELETE SET NULL;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION;
+
+CREATE INDEX IF NOT EXISTS idx_users_municipality ON users(municipality_id);
+CREATE INDEX IF NOT EXISTS idx_users_parish ON users(parish_id);
@@ -0,0 +1,88 @@
+-- Sharded interest counters.
+-- Marking interest no longer updates the event row, where concurrent
+-- clicks on a popular event queued on its row lock. Statement triggers on
+-- event_interest add each statement's net change to one of 16 counter rows
+-- per event (picked by backend pid, as for table_versions). The exact count
+-- is events.interested_count plus the event's counter rows;
+-- fold_event_interest_counts() moves the counter rows into the events.
+
+CREATE TABLE IF NOT EXISTS event_interest_counts (
+    event_id INTEGER NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+    shard SMALLINT NOT NULL,
+    delta INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (event_id, shard)
+);
+
+-- Start from the real number of interests
+UPDATE events e
+SET interested_count = (SELECT COUNT(*) FROM event_interest i WHERE i.event_id = e.id)
+WHERE e.interested_count IS DISTINCT FROM (SELECT COUNT(*) FROM event_interest i WHERE i.event_id = e.id);
+
+ALTER TABLE events ALTER COLUMN interested_count SET NOT NULL;
+
+CREATE OR REPLACE FUNCTION count_event_interest() RETURNS trigger AS $$
+BEGIN
+    -- Rows are locked in event order so concurrent bulk statements cannot deadlock
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO event_interest_counts (event_id, shard, delta)
+        SELECT event_id, pg_backend_pid() % 16, COUNT(*)
+        FROM new_rows
+        GROUP BY event_id
+        ORDER BY event_id
+        ON CONFLICT (event_id, shard) DO UPDATE
+        SET delta = event_interest_counts.delta + EXCLUDED.delta;
+    ELSE
+        -- Interests removed because their event was deleted have nothing left to count
+        INSERT INTO event_interest_counts (event_id, shard, delta)
+        SELECT o.event_id, pg_backend_pid() % 16, -COUNT(*)
+        FROM old_rows o
+        WHERE EXISTS (SELECT 1 FROM events e WHERE e.id = o.event_id)
+        GROUP BY o.event_id
+        ORDER BY o.event_id
+        ON CONFLICT (event_id, shard) DO UPDATE
+        SET delta = event_interest_counts.delta + EXCLUDED.delta;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER event_interest_count_inserts
+AFTER INSERT ON event_interest
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION count_event_interest();
+
+CREATE OR REPLACE TRIGGER event_interest_count_deletes
+AFTER DELETE ON event_interest
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION count_event_interest();
+
+-- Interest counts are part of the event responses, so they move the events watermark
+CREATE OR REPLACE TRIGGER event_interest_counts_bump_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON event_interest_counts
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+-- Move the counter rows into events.interested_count; returns the number of events updated.
+-- Safe to run at any time: concurrent increments wait for it or land in new counter rows.
+CREATE OR REPLACE FUNCTION fold_event_interest_counts() RETURNS INTEGER AS $$
+DECLARE
+    folded INTEGER;
+BEGIN
+    -- Lock in the order increments use, so folding cannot deadlock with them
+    WITH locked AS (
+        SELECT event_id, shard FROM event_interest_counts ORDER BY event_id, shard FOR UPDATE
+    ), deltas AS (
+        DELETE FROM event_interest_counts c
+        USING locked l
+        WHERE c.event_id = l.event_id AND c.shard = l.shard
+        RETURNING c.event_id, c.delta
+    ), totals AS (
+        SELECT event_id, SUM(delta) AS delta FROM deltas GROUP BY event_id
+    )
+    UPDATE events e
+    SET interested_count = e.interested_count + t.delta
+    FROM totals t
+    WHERE e.id = t.event_id AND t.delta <> 0;
+    GET DIAGNOSTICS folded = ROW_COUNT;
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
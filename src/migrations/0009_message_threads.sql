@@ -0,0 +1,111 @@
+-- Conversation threads for the inbox.
+-- message_threads keeps one row per participant and counterpart with the
+-- last message and the participant's unread count, maintained by statement
+-- triggers on messages, so listing an inbox reads one row per conversation
+-- however long the history is. Thread history and bulk mark-as-read are
+-- served by the composite / partial indexes below.
+
+CREATE INDEX IF NOT EXISTS idx_messages_receiver_created ON messages(receiver_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_messages_sender_receiver_created ON messages(sender_id, receiver_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_messages_unread ON messages(receiver_id, sender_id) WHERE is_read IS NOT TRUE;
+
+-- Prefixes of the composite indexes
+DROP INDEX IF EXISTS idx_messages_receiver;
+DROP INDEX IF EXISTS idx_messages_sender;
+
+CREATE TABLE IF NOT EXISTS message_threads (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    counterpart_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    last_message_id INTEGER NOT NULL,
+    last_sender_id INTEGER NOT NULL,
+    last_message TEXT NOT NULL,
+    last_message_at TIMESTAMP NOT NULL,
+    unread_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, counterpart_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_message_threads_user_recent
+ON message_threads(user_id, last_message_at, counterpart_id);
+
+-- Existing conversations, seen from both sides
+INSERT INTO message_threads
+    (user_id, counterpart_id, last_message_id, last_sender_id, last_message, last_message_at, unread_count)
+SELECT DISTINCT ON (v.user_id, v.counterpart_id)
+       v.user_id, v.counterpart_id, m.id, m.sender_id, m.message,
+       COALESCE(m.created_at, CURRENT_TIMESTAMP),
+       COUNT(*) FILTER (WHERE v.user_id = m.receiver_id AND m.is_read IS NOT TRUE)
+           OVER (PARTITION BY v.user_id, v.counterpart_id)
+FROM messages m
+CROSS JOIN LATERAL (VALUES (m.receiver_id, m.sender_id), (m.sender_id, m.receiver_id)) AS v(user_id, counterpart_id)
+ORDER BY v.user_id, v.counterpart_id, m.id DESC
+ON CONFLICT (user_id, counterpart_id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION update_message_threads() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        -- Newest message of each conversation in the statement, for both
+        -- participants; rows are locked in key order to avoid deadlocks
+        INSERT INTO message_threads AS t
+            (user_id, counterpart_id, last_message_id, last_sender_id, last_message, last_message_at, unread_count)
+        SELECT DISTINCT ON (v.user_id, v.counterpart_id)
+               v.user_id, v.counterpart_id, n.id, n.sender_id, n.message,
+               COALESCE(n.created_at, CURRENT_TIMESTAMP),
+               COUNT(*) FILTER (WHERE v.user_id = n.receiver_id AND n.is_read IS NOT TRUE)
+                   OVER (PARTITION BY v.user_id, v.counterpart_id)
+        FROM new_rows n
+        CROSS JOIN LATERAL (VALUES (n.receiver_id, n.sender_id), (n.sender_id, n.receiver_id)) AS v(user_id, counterpart_id)
+        ORDER BY v.user_id, v.counterpart_id, n.id DESC
+        ON CONFLICT (user_id, counterpart_id) DO UPDATE
+        SET unread_count = t.unread_count + EXCLUDED.unread_count,
+            -- Concurrent senders may commit out of order: keep the newest message
+            last_message_id = GREATEST(t.last_message_id, EXCLUDED.last_message_id),
+            last_sender_id = CASE WHEN EXCLUDED.last_message_id > t.last_message_id
+                                  THEN EXCLUDED.last_sender_id ELSE t.last_sender_id END,
+            last_message = CASE WHEN EXCLUDED.last_message_id > t.last_message_id
+                                THEN EXCLUDED.last_message ELSE t.last_message END,
+            last_message_at = CASE WHEN EXCLUDED.last_message_id > t.last_message_id
+                                   THEN EXCLUDED.last_message_at ELSE t.last_message_at END;
+
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- Messages marked read (or unread) move their receiver's unread count
+        UPDATE message_threads t
+        SET unread_count = GREATEST(t.unread_count + c.delta, 0)
+        FROM (
+            SELECT n.receiver_id, n.sender_id,
+                   SUM(CASE WHEN n.is_read IS TRUE THEN -1 ELSE 1 END) AS delta
+            FROM old_rows o
+            JOIN new_rows n ON n.id = o.id
+            WHERE (o.is_read IS TRUE) <> (n.is_read IS TRUE)
+            GROUP BY n.receiver_id, n.sender_id
+        ) c
+        WHERE t.user_id = c.receiver_id AND t.counterpart_id = c.sender_id AND c.delta <> 0;
+
+    ELSE
+        UPDATE message_threads t
+        SET unread_count = GREATEST(t.unread_count - c.unread, 0)
+        FROM (
+            SELECT receiver_id, sender_id, COUNT(*) AS unread
+            FROM old_rows
+            WHERE is_read IS NOT TRUE
+            GROUP BY receiver_id, sender_id
+        ) c
+        WHERE t.user_id = c.receiver_id AND t.counterpart_id = c.sender_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER messages_thread_inserts
+AFTER INSERT ON messages
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION update_message_threads();
+
+CREATE OR REPLACE TRIGGER messages_thread_updates
+AFTER UPDATE ON messages
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION update_message_threads();
+
+CREATE OR REPLACE TRIGGER messages_thread_deletes
+AFTER DELETE ON messages
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION update_message_threads();
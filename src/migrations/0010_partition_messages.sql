@@ -0,0 +1,141 @@
+-- Monthly partitions for messages.
+-- messages becomes range-partitioned by created_at, one partition per
+-- month (messages_YYYY_MM) plus a default partition that only catches rows
+-- whose month has no partition yet. create_message_partitions() adds the
+-- coming months (run at startup and by archive_messages.py);
+-- archive_message_partitions() detaches months past the retention period
+-- into the messages_archive schema, so queries, indexes and vacuum only
+-- deal with recent months. Partitioned tables need the partition key in
+-- the primary key, which becomes (id, created_at); ids still come from
+-- messages_id_seq.
+
+CREATE SCHEMA IF NOT EXISTS messages_archive;
+
+ALTER TABLE messages RENAME TO messages_unpartitioned;
+ALTER TABLE messages_unpartitioned RENAME CONSTRAINT messages_pkey TO messages_unpartitioned_pkey;
+DROP TRIGGER IF EXISTS messages_thread_inserts ON messages_unpartitioned;
+DROP TRIGGER IF EXISTS messages_thread_updates ON messages_unpartitioned;
+DROP TRIGGER IF EXISTS messages_thread_deletes ON messages_unpartitioned;
+DROP INDEX IF EXISTS idx_messages_receiver_created;
+DROP INDEX IF EXISTS idx_messages_sender_receiver_created;
+DROP INDEX IF EXISTS idx_messages_unread;
+
+CREATE TABLE messages (
+    id INTEGER NOT NULL DEFAULT nextval('messages_id_seq'),
+    sender_id INTEGER NOT NULL,
+    receiver_id INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    is_read BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at),
+    FOREIGN KEY (sender_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (receiver_id) REFERENCES users(id) ON DELETE CASCADE
+) PARTITION BY RANGE (created_at);
+
+ALTER SEQUENCE messages_id_seq OWNED BY messages.id;
+
+CREATE TABLE messages_default PARTITION OF messages DEFAULT;
+
+CREATE INDEX idx_messages_receiver_created ON messages(receiver_id, created_at, id);
+CREATE INDEX idx_messages_sender_receiver_created ON messages(sender_id, receiver_id, created_at, id);
+CREATE INDEX idx_messages_unread ON messages(receiver_id, sender_id) WHERE is_read IS NOT TRUE;
+
+-- Create the monthly partitions from from_month's month to months_ahead
+-- months after the current one; returns the number created. Rows of a new
+-- month already in the default partition are moved into it.
+CREATE OR REPLACE FUNCTION create_message_partitions(from_month DATE, months_ahead INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+    month DATE := date_trunc('month', from_month)::date;
+    last_month DATE := (date_trunc('month', LOCALTIMESTAMP) + make_interval(months => months_ahead))::date;
+    next_month DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month <= last_month LOOP
+        next_month := (month + INTERVAL '1 month')::date;
+        partition_name := 'messages_' || to_char(month, 'YYYY_MM');
+        IF to_regclass('public.' || partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE public.%I (LIKE messages INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                partition_name
+            );
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM messages_default WHERE created_at >= %L AND created_at < %L RETURNING *)
+                 INSERT INTO public.%I SELECT * FROM moved',
+                month, next_month, partition_name
+            );
+            EXECUTE format(
+                'ALTER TABLE messages ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month, next_month
+            );
+            created := created + 1;
+        END IF;
+        month := next_month;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detach the monthly partitions older than retention_months into the
+-- messages_archive schema; returns their names. Their unread messages no
+-- longer count in message_threads.
+CREATE OR REPLACE FUNCTION archive_message_partitions(retention_months INTEGER)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', LOCALTIMESTAMP) - make_interval(months => retention_months))::date;
+    part RECORD;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'messages'::regclass
+          AND c.relname ~ '^messages_\d{4}_\d{2}$'
+          AND to_date(right(c.relname, 7), 'YYYY_MM') < cutoff
+        ORDER BY c.relname
+    LOOP
+        -- Detaching locks messages until commit, so no message of the
+        -- partition can be marked read while its unread ones are counted
+        EXECUTE format('ALTER TABLE messages DETACH PARTITION public.%I', part.relname);
+        EXECUTE format(
+            'UPDATE message_threads t
+             SET unread_count = GREATEST(t.unread_count - c.unread, 0)
+             FROM (SELECT receiver_id, sender_id, COUNT(*) AS unread
+                   FROM public.%I
+                   WHERE is_read IS NOT TRUE
+                   GROUP BY receiver_id, sender_id) c
+             WHERE t.user_id = c.receiver_id AND t.counterpart_id = c.sender_id',
+            part.relname
+        );
+        EXECUTE format('ALTER TABLE public.%I SET SCHEMA messages_archive', part.relname);
+        RETURN NEXT part.relname;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT create_message_partitions(
+    COALESCE((SELECT MIN(created_at) FROM messages_unpartitioned)::date, CURRENT_DATE), 3
+);
+
+INSERT INTO messages (id, sender_id, receiver_id, message, is_read, created_at)
+SELECT id, sender_id, receiver_id, message, is_read, COALESCE(created_at, LOCALTIMESTAMP)
+FROM messages_unpartitioned;
+
+DROP TABLE messages_unpartitioned;
+
+-- message_threads triggers (see 0009_message_threads.sql), on the partitioned table
+CREATE TRIGGER messages_thread_inserts
+AFTER INSERT ON messages
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION update_message_threads();
+
+CREATE TRIGGER messages_thread_updates
+AFTER UPDATE ON messages
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION update_message_threads();
+
+CREATE TRIGGER messages_thread_deletes
+AFTER DELETE ON messages
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION update_message_threads();
@@ -0,0 +1,40 @@
+-- Folding without counter rows writes nothing.
+-- Every statement on events / event_interest_counts moves their cache
+-- watermarks, even when it changes no row, so a fold with nothing to do
+-- invalidated every event ETag. It now returns before writing, and only
+-- updates the events whose counters add up to a change.
+
+CREATE OR REPLACE FUNCTION fold_event_interest_counts() RETURNS INTEGER AS $$
+DECLARE
+    event_ids INTEGER[];
+    deltas BIGINT[];
+    folded INTEGER := 0;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM event_interest_counts) THEN
+        RETURN 0;
+    END IF;
+
+    -- Lock in the order increments use, so folding cannot deadlock with them
+    WITH locked AS (
+        SELECT event_id, shard FROM event_interest_counts ORDER BY event_id, shard FOR UPDATE
+    ), removed AS (
+        DELETE FROM event_interest_counts c
+        USING locked l
+        WHERE c.event_id = l.event_id AND c.shard = l.shard
+        RETURNING c.event_id, c.delta
+    )
+    SELECT array_agg(event_id ORDER BY event_id), array_agg(delta ORDER BY event_id)
+    INTO event_ids, deltas
+    FROM (SELECT event_id, SUM(delta) AS delta FROM removed GROUP BY event_id) totals
+    WHERE delta <> 0;
+
+    IF event_ids IS NOT NULL THEN
+        UPDATE events e
+        SET interested_count = e.interested_count + t.delta
+        FROM unnest(event_ids, deltas) AS t(event_id, delta)
+        WHERE e.id = t.event_id;
+        GET DIAGNOSTICS folded = ROW_COUNT;
+    END IF;
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
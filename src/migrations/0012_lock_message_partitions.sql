@@ -0,0 +1,77 @@
+-- Serialize message partition maintenance.
+-- create_message_partitions() checked for a month's partition and then
+-- created it, so two callers at once (workers starting together, or the
+-- archival job) could both try to create the same table and one failed.
+-- Both partition functions now take the transaction-level advisory lock
+-- 7_243_003 first (the gazetteer uses 7_243_002, migrations 7_243_001),
+-- so a concurrent caller waits and then finds the partitions in place.
+
+CREATE OR REPLACE FUNCTION create_message_partitions(from_month DATE, months_ahead INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+    month DATE := date_trunc('month', from_month)::date;
+    last_month DATE := (date_trunc('month', LOCALTIMESTAMP) + make_interval(months => months_ahead))::date;
+    next_month DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(7243003);
+    WHILE month <= last_month LOOP
+        next_month := (month + INTERVAL '1 month')::date;
+        partition_name := 'messages_' || to_char(month, 'YYYY_MM');
+        IF to_regclass('public.' || partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE public.%I (LIKE messages INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                partition_name
+            );
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM messages_default WHERE created_at >= %L AND created_at < %L RETURNING *)
+                 INSERT INTO public.%I SELECT * FROM moved',
+                month, next_month, partition_name
+            );
+            EXECUTE format(
+                'ALTER TABLE messages ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month, next_month
+            );
+            created := created + 1;
+        END IF;
+        month := next_month;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION archive_message_partitions(retention_months INTEGER)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', LOCALTIMESTAMP) - make_interval(months => retention_months))::date;
+    part RECORD;
+BEGIN
+    PERFORM pg_advisory_xact_lock(7243003);
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'messages'::regclass
+          AND c.relname ~ '^messages_\d{4}_\d{2}$'
+          AND to_date(right(c.relname, 7), 'YYYY_MM') < cutoff
+        ORDER BY c.relname
+    LOOP
+        -- Detaching locks messages until commit, so no message of the
+        -- partition can be marked read while its unread ones are counted
+        EXECUTE format('ALTER TABLE messages DETACH PARTITION public.%I', part.relname);
+        EXECUTE format(
+            'UPDATE message_threads t
+             SET unread_count = GREATEST(t.unread_count - c.unread, 0)
+             FROM (SELECT receiver_id, sender_id, COUNT(*) AS unread
+                   FROM public.%I
+                   WHERE is_read IS NOT TRUE
+                   GROUP BY receiver_id, sender_id) c
+             WHERE t.user_id = c.receiver_id AND t.counterpart_id = c.sender_id',
+            part.relname
+        );
+        EXECUTE format('ALTER TABLE public.%I SET SCHEMA messages_archive', part.relname);
+        RETURN NEXT part.relname;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
@@ -2,7 +2,27 @@
 Event model - Event and Event Interest database operations
 """
 
-from database import get_db_connection, get_db_cursor
+import re
+from database import get_db_connection, get_db_cursor, stream_query
+
+# Search terms are reduced to letters/digits so they are always valid tsquery lexemes
+SEARCH_TERM_PATTERN = re.compile(r"[^\W_]+")
+
+# Exact interest count: the count folded into the event row plus its counter
+# shards (see migrations/0008_event_interest_counts.sql)
+INTERESTED_COUNT_SQL = (
+    "events.interested_count + COALESCE((SELECT SUM(c.delta) FROM event_interest_counts c "
+    "WHERE c.event_id = events.id), 0) AS interested_count"
+)
+
+
+def build_search_query(text, prefix=True):
+    """Turn free text into a tsquery string ANDing every term (as prefixes if requested)"""
+    terms = SEARCH_TERM_PATTERN.findall(text.lower()) if text else []
+    if not terms:
+        return None
+    suffix = ":*" if prefix else ""
+    return " & ".join(f"{term}{suffix}" for term in terms)
 
 
 def create_event_in_db(name, description, date_obj, organisation_id=None):
@@ -75,8 +95,9 @@ def get_event_by_id_from_db(event_id):
 
     try:
         cursor.execute(
-            "SELECT id, name, description, date, organisation_id, interested_count FROM events WHERE id = %s",
-            (event_id,)
+            f"SELECT id, name, description, date, organisation_id, {INTERESTED_COUNT_SQL} "
+            "FROM events WHERE id = %s",
+            (event_id,),
         )
         return cursor.fetchone()
     finally:
@@ -84,26 +105,75 @@ def get_event_by_id_from_db(event_id):
         conn.close()
 
 
-def get_events_from_db(name_filter=None, date_obj=None):
-    """Get all events with optional filters"""
+def _events_query(
+    name_filter=None,
+    date_obj=None,
+    date_from=None,
+    date_to=None,
+    organisation_id=None,
+    after=None,
+    limit=None,
+    prefix=True,
+):
+    """
+    Build the events listing query
+    A name filter is matched against the indexed search_vector (name and
+    description) and results are ranked by relevance. Otherwise events are
+    ordered by (date, id) and `after` = (date, id) seeks past the previous
+    page, which idx_events_date_id / idx_events_organisation_date serve as
+    an index range scan.
+    """
+    query = f"SELECT id, name, description, date, organisation_id, {INTERESTED_COUNT_SQL} FROM events"
+    conditions = []
+    params = []
+    order_by = "date ASC, id ASC"
+
+    search_query = build_search_query(name_filter, prefix)
+    if search_query:
+        query += ", to_tsquery('simple', %s) AS search_query"
+        params.append(search_query)
+        conditions.append("search_vector @@ search_query")
+        order_by = "ts_rank(search_vector, search_query) DESC, date ASC, id ASC"
+
+    if date_obj:
+        conditions.append("date = %s")
+        params.append(date_obj)
+
+    if date_from:
+        conditions.append("date >= %s")
+        params.append(date_from)
+
+    if date_to:
+        conditions.append("date <= %s")
+        params.append(date_to)
+
+    if organisation_id is not None:
+        conditions.append("organisation_id = %s")
+        params.append(organisation_id)
+
+    if after:
+        conditions.append("(date, id) > (%s, %s)")
+        params.extend(after)
+
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    query += " ORDER BY " + order_by
+
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+
+    return query, params
+
+
+def get_events_from_db(**filters):
+    """Get events with optional filters (see _events_query; name searches are ranked)"""
     conn = get_db_connection()
     cursor = get_db_cursor(conn)
 
     try:
-        query = "SELECT id, name, description, date, organisation_id, interested_count FROM events WHERE 1=1"
-        params = []
-
-        if name_filter:
-            query += " AND LOWER(name) LIKE LOWER(%s)"
-            params.append(f"%{name_filter}%")
-
-        if date_obj:
-            query += " AND date = %s"
-            params.append(date_obj)
-
-        query += " ORDER BY date ASC"
-
-        cursor.execute(query, params)
+        cursor.execute(*_events_query(**filters))
         events = cursor.fetchall()
         return events
     finally:
@@ -111,6 +181,11 @@ def get_events_from_db(name_filter=None, date_obj=None):
         conn.close()
 
 
+def iter_events_from_db(**filters):
+    """Stream events through a server-side cursor (same filters as get_events_from_db)"""
+    return stream_query(*_events_query(**filters))
+
+
 # ============= EVENT INTEREST OPERATIONS =============
 
 
@@ -132,52 +207,98 @@ def check_user_interest_exists(user_id, event_id):
 
 
 def add_user_interest_in_event(user_id, event_id):
-    """Add user interest in an event and increment interested_count"""
+    """
+    Add user interest in an event, returns False if it already existed
+    The event's interested_count is kept by triggers on event_interest,
+    without locking the event row.
+    """
     conn = get_db_connection()
     cursor = get_db_cursor(conn, dict_cursor=False)
 
     try:
-        # Insert interest record
         cursor.execute(
-            "INSERT INTO event_interest (user_id, event_id) VALUES (%s, %s)",
+            """INSERT INTO event_interest (user_id, event_id) VALUES (%s, %s)
+               ON CONFLICT (user_id, event_id) DO NOTHING""",
             (user_id, event_id),
         )
+        added_count = cursor.rowcount
+        conn.commit()
+        return added_count > 0
+    finally:
+        cursor.close()
+        conn.close()
+
 
-        # Update interested_count
+def add_assisted_interests_in_db(event_id, volunteer_id, assisted_ids):
+    """
+    Register interest for the given users who are assisted by the volunteer,
+    checking every association and inserting in a single statement
+    (the interest count trigger then runs once for the whole batch)
+    Returns: list of (assisted_id, user_exists, associated, added) in input order
+    """
+    conn = get_db_connection()
+    cursor = get_db_cursor(conn, dict_cursor=False)
+
+    try:
         cursor.execute(
-            "UPDATE events SET interested_count = interested_count + 1 WHERE id = %s",
-            (event_id,),
+            """WITH requested AS (
+                   SELECT assisted_id, position
+                   FROM unnest(%(assisted_ids)s::integer[]) WITH ORDINALITY AS r(assisted_id, position)
+               ), checked AS (
+                   SELECT r.assisted_id, r.position,
+                          EXISTS (SELECT 1 FROM users u WHERE u.id = r.assisted_id) AS user_exists,
+                          EXISTS (SELECT 1 FROM volunteer_assisted va
+                                  WHERE va.volunteer_id = %(volunteer_id)s
+                                    AND va.assisted_id = r.assisted_id) AS associated
+                   FROM requested r
+               ), inserted AS (
+                   INSERT INTO event_interest (user_id, event_id)
+                   SELECT assisted_id, %(event_id)s FROM checked WHERE associated
+                   ORDER BY assisted_id
+                   ON CONFLICT (user_id, event_id) DO NOTHING
+                   RETURNING user_id
+               )
+               SELECT c.assisted_id, c.user_exists, c.associated, i.user_id IS NOT NULL
+               FROM checked c LEFT JOIN inserted i ON i.user_id = c.assisted_id
+               ORDER BY c.position""",
+            {"event_id": event_id, "volunteer_id": volunteer_id, "assisted_ids": assisted_ids},
         )
-
+        results = cursor.fetchall()
         conn.commit()
-        return True
+        return results
     finally:
         cursor.close()
         conn.close()
 
 
 def remove_user_interest_in_event(user_id, event_id):
-    """Remove user interest in an event and decrement interested_count"""
+    """Remove user interest in an event (interested_count follows through triggers)"""
     conn = get_db_connection()
     cursor = get_db_cursor(conn, dict_cursor=False)
 
     try:
-        # Delete interest record
         cursor.execute(
             "DELETE FROM event_interest WHERE user_id = %s AND event_id = %s",
             (user_id, event_id),
         )
         deleted_count = cursor.rowcount
+        conn.commit()
+        return deleted_count > 0
+    finally:
+        cursor.close()
+        conn.close()
+
 
-        if deleted_count > 0:
-            # Update interested_count
-            cursor.execute(
-                "UPDATE events SET interested_count = interested_count - 1 WHERE id = %s",
-                (event_id,),
-            )
+def fold_interest_counts_in_db():
+    """Fold the interest counter shards into events.interested_count, returns the events updated"""
+    conn = get_db_connection()
+    cursor = get_db_cursor(conn, dict_cursor=False)
 
+    try:
+        cursor.execute("SELECT fold_event_interest_counts()")
+        folded = cursor.fetchone()[0]
         conn.commit()
-        return deleted_count > 0
+        return folded
     finally:
         cursor.close()
         conn.close()
@@ -0,0 +1,97 @@
+"""
+Export model - COPY ... TO STDOUT queries for bulk exports
+"""
+
+from database import stream_copy
+from models.event_model import INTERESTED_COUNT_SQL
+from models.user_model import USER_FIELDS
+
+EVENT_EXPORT_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "date",
+    "organisation_id",
+    INTERESTED_COUNT_SQL,
+    "created_at",
+    "updated_at",
+)
+
+# NDJSON rides on CSV mode with quote/delimiter bytes that never occur in
+# row_to_json output, so each JSON document is written verbatim on its line
+COPY_OPTIONS = {
+    "csv": "FORMAT csv, HEADER true",
+    "ndjson": "FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02'",
+}
+
+
+def _copy_statement(query, export_format):
+    if export_format == "ndjson":
+        query = f"SELECT row_to_json(export_row) FROM ({query}) export_row"
+    return f"COPY ({query}) TO STDOUT WITH ({COPY_OPTIONS[export_format]})"
+
+
+def _where(conditions):
+    return f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def export_users_from_db(export_format, created_from=None, created_to=None, organisation_id=None):
+    """Stream users ordered by id; `created_from`/`created_to` are inclusive dates"""
+    conditions, params = [], []
+    if created_from is not None:
+        conditions.append("created_at >= %s")
+        params.append(created_from)
+    if created_to is not None:
+        conditions.append("created_at < %s::date + 1")
+        params.append(created_to)
+    if organisation_id is not None:
+        conditions.append("organisation_id = %s")
+        params.append(organisation_id)
+
+    query = f"SELECT {', '.join(USER_FIELDS)} FROM users{_where(conditions)} ORDER BY id"
+    return stream_copy(_copy_statement(query, export_format), params)
+
+
+def export_events_from_db(export_format, date_from=None, date_to=None, organisation_id=None):
+    """Stream events ordered by (date, id); `date_from`/`date_to` are inclusive"""
+    conditions, params = [], []
+    if date_from is not None:
+        conditions.append("date >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append("date <= %s")
+        params.append(date_to)
+    if organisation_id is not None:
+        conditions.append("organisation_id = %s")
+        params.append(organisation_id)
+
+    query = (
+        f"SELECT {', '.join(EVENT_EXPORT_FIELDS)} FROM events{_where(conditions)} "
+        "ORDER BY date, id"
+    )
+    return stream_copy(_copy_statement(query, export_format), params)
+
+
+def export_interests_from_db(export_format, date_from=None, date_to=None, organisation_id=None, event_id=None):
+    """Stream event interests with their event, filtered on the event's date and organisation"""
+    conditions, params = [], []
+    if date_from is not None:
+        conditions.append("e.date >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append("e.date <= %s")
+        params.append(date_to)
+    if organisation_id is not None:
+        conditions.append("e.organisation_id = %s")
+        params.append(organisation_id)
+    if event_id is not None:
+        conditions.append("ei.event_id = %s")
+        params.append(event_id)
+
+    query = (
+        "SELECT ei.user_id, ei.event_id, e.name AS event_name, e.date AS event_date, "
+        "e.organisation_id, ei.created_at "
+        f"FROM event_interest ei JOIN events e ON e.id = ei.event_id{_where(conditions)} "
+        "ORDER BY ei.event_id, ei.user_id"
+    )
+    return stream_copy(_copy_statement(query, export_format), params)
@@ -0,0 +1,33 @@
+"""
+Health model - Database probe for readiness checks
+"""
+
+import time
+from psycopg2 import errors
+from database import get_pool
+
+
+def probe_database(timeout):
+    """
+    Time one round-trip that also reads the applied migrations, on a pooled
+    connection borrowed for at most `timeout` seconds (never the request's,
+    so a probe does not join or wait behind its transaction)
+    Returns: (latency in seconds, set of applied migration versions)
+    Raises PoolTimeoutError when the pool is exhausted, OperationalError when
+    the database is unreachable.
+    """
+    conn = get_pool().getconn(timeout=timeout)
+    try:
+        cursor = conn.cursor()
+        started = time.perf_counter()
+        try:
+            cursor.execute("SELECT version FROM schema_version")
+            versions = {row[0] for row in cursor.fetchall()}
+        except errors.UndefinedTable:
+            versions = set()
+        latency = time.perf_counter() - started
+        cursor.close()
+        conn.rollback()
+        return latency, versions
+    finally:
+        conn.close()
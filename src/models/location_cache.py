@@ -0,0 +1,156 @@
+"""
+Location cache - Process-wide, read-only index of the location hierarchy
+
+Districts, municipalities and parishes are reference data seeded by
+migrations and the gazetteer, so they are loaded once per process and
+served from memory. Every LOCATION_INDEX_CHECK_SECONDS the table_versions
+counters of the three tables are compared with those seen at load time,
+so changes made by another process (e.g. `python gazetteer.py`) reach
+running workers within that interval. invalidate_location_index() drops
+this process's copy at once.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from types import MappingProxyType
+from metrics import record_cache_lookup
+from models.location_model import (
+    get_districts_from_db,
+    get_municipalities_from_db,
+    get_parishes_from_db,
+)
+from models.watermark_model import get_table_watermark
+
+LOCATION_TABLES = ("districts", "municipalities", "parishes")
+# Seconds between checks of the location tables' change counters (one query per process)
+LOCATION_INDEX_CHECK_SECONDS = float(os.getenv("LOCATION_INDEX_CHECK_SECONDS", "5"))
+
+
+def _group_by(rows, key):
+    """Group rows (already ordered by name) into id -> tuple of rows"""
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[key], []).append(row)
+    return MappingProxyType({group_id: tuple(items) for group_id, items in groups.items()})
+
+
+def _to_id(value):
+    """Coerce an id coming from JSON or a query string; None if it is not an integer"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class LocationIndex:
+    """Immutable snapshot of districts, municipalities and parishes with O(1) lookups"""
+
+    def __init__(self, districts, municipalities, parishes, table_versions=None):
+        self.districts = tuple(dict(row) for row in districts)
+        self.municipalities = tuple(dict(row) for row in municipalities)
+        self.parishes = tuple(dict(row) for row in parishes)
+
+        self.districts_by_id = MappingProxyType({d["id"]: d for d in self.districts})
+        self.municipalities_by_id = MappingProxyType({m["id"]: m for m in self.municipalities})
+        self.parishes_by_id = MappingProxyType({p["id"]: p for p in self.parishes})
+
+        self.municipalities_by_district = _group_by(self.municipalities, "district_id")
+        self.parishes_by_municipality = _group_by(self.parishes, "municipality_id")
+
+        self.loaded_at = time.time()
+        # table_versions counters read before the rows, to detect later changes
+        self.table_versions = table_versions
+
+        # Content hash and newest change, used as the HTTP cache watermark
+        rows = (self.districts, self.municipalities, self.parishes)
+        self.version = hashlib.sha1(repr(rows).encode()).hexdigest()
+        self.last_modified = max(
+            (
+                row.get("updated_at") or row.get("created_at")
+                for group in rows
+                for row in group
+                if row.get("updated_at") or row.get("created_at")
+            ),
+            default=None,
+        )
+
+    def watermark(self):
+        """Get (version, last_modified) for conditional requests"""
+        return self.version, self.last_modified
+
+    def has_municipality(self, municipality_id):
+        """Check if a municipality exists"""
+        return _to_id(municipality_id) in self.municipalities_by_id
+
+    def has_parish(self, parish_id):
+        """Check if a parish exists"""
+        return _to_id(parish_id) in self.parishes_by_id
+
+    def get_municipalities(self, district_id=None):
+        """Get municipalities ordered by name, optionally for one district"""
+        if district_id is None:
+            return self.municipalities
+        return self.municipalities_by_district.get(_to_id(district_id), ())
+
+    def get_parishes(self, municipality_id=None):
+        """Get parishes ordered by name, optionally for one municipality"""
+        if municipality_id is None:
+            return self.parishes
+        return self.parishes_by_municipality.get(_to_id(municipality_id), ())
+
+
+_index = None
+_checked_at = 0.0
+_index_lock = threading.Lock()
+
+
+def load_location_index():
+    """Read the whole location hierarchy from the database"""
+    table_versions, _ = get_table_watermark(*LOCATION_TABLES)
+    return LocationIndex(
+        get_districts_from_db(),
+        get_municipalities_from_db(),
+        get_parishes_from_db(),
+        table_versions,
+    )
+
+
+def get_location_index():
+    """Get the cached location index, loading it on first use and reloading it when the tables changed"""
+    global _checked_at
+    index = _index
+    if index is not None and time.monotonic() - _checked_at < LOCATION_INDEX_CHECK_SECONDS:
+        record_cache_lookup("location_index", True)
+        return index
+
+    with _index_lock:
+        if _index is not None and time.monotonic() - _checked_at >= LOCATION_INDEX_CHECK_SECONDS:
+            table_versions, _ = get_table_watermark(*LOCATION_TABLES)
+            if table_versions != _index.table_versions:
+                invalidate_location_index()
+            _checked_at = time.monotonic()
+        record_cache_lookup("location_index", _index is not None)
+        if _index is None:
+            preload_location_index()
+        return _index
+
+
+def get_location_watermark():
+    """Get the (version, last_modified) watermark of the cached location index"""
+    return get_location_index().watermark()
+
+
+def preload_location_index():
+    """(Re)load the location index now, e.g. at process start"""
+    global _index, _checked_at
+    _index = load_location_index()
+    _checked_at = time.monotonic()
+    return _index
+
+
+def invalidate_location_index():
+    """Drop the cached index; the next lookup reloads it from the database"""
+    global _index
+    _index = None
@@ -4,6 +4,8 @@ Location model - District, Municipality, and Parish database operations
 
 from database import get_db_connection, get_db_cursor
 
+DISTRICTS_QUERY = "SELECT * FROM districts ORDER BY name ASC"
+
 
 def check_municipality_exists(municipality_id):
     """Check if a municipality exists"""
@@ -35,13 +37,44 @@ def check_parish_exists(parish_id):
         conn.close()
 
 
+def _municipalities_query(district_id=None):
+    """Build the municipalities listing query"""
+    query = """SELECT m.*, d.name as district_name 
+               FROM municipalities m
+               JOIN districts d ON m.district_id = d.id"""
+    params = []
+
+    if district_id:
+        query += " WHERE m.district_id = %s"
+        params.append(district_id)
+
+    query += " ORDER BY m.name ASC"
+    return query, params
+
+
+def _parishes_query(municipality_id=None):
+    """Build the parishes listing query"""
+    query = """SELECT p.*, m.name as municipality_name, d.name as district_name
+               FROM parishes p
+               JOIN municipalities m ON p.municipality_id = m.id
+               JOIN districts d ON m.district_id = d.id"""
+    params = []
+
+    if municipality_id:
+        query += " WHERE p.municipality_id = %s"
+        params.append(municipality_id)
+
+    query += " ORDER BY p.name ASC"
+    return query, params
+
+
 def get_districts_from_db():
     """Get all districts"""
     conn = get_db_connection()
     cursor = get_db_cursor(conn)
 
     try:
-        cursor.execute("SELECT * FROM districts ORDER BY name ASC")
+        cursor.execute(DISTRICTS_QUERY)
         districts = cursor.fetchall()
         return districts
     finally:
@@ -55,22 +88,7 @@ def get_municipalities_from_db(district_id=None):
     cursor = get_db_cursor(conn)
 
     try:
-        if district_id:
-            cursor.execute(
-                """SELECT m.*, d.name as district_name 
-                   FROM municipalities m
-                   JOIN districts d ON m.district_id = d.id
-                   WHERE m.district_id = %s 
-                   ORDER BY m.name ASC""",
-                (district_id,),
-            )
-        else:
-            cursor.execute(
-                """SELECT m.*, d.name as district_name 
-                   FROM municipalities m
-                   JOIN districts d ON m.district_id = d.id
-                   ORDER BY m.name ASC"""
-            )
+        cursor.execute(*_municipalities_query(district_id))
         municipalities = cursor.fetchall()
         return municipalities
     finally:
@@ -84,24 +102,7 @@ def get_parishes_from_db(municipality_id=None):
     cursor = get_db_cursor(conn)
 
     try:
-        if municipality_id:
-            cursor.execute(
-                """SELECT p.*, m.name as municipality_name, d.name as district_name
-                   FROM parishes p
-                   JOIN municipalities m ON p.municipality_id = m.id
-                   JOIN districts d ON m.district_id = d.id
-                   WHERE p.municipality_id = %s 
-                   ORDER BY p.name ASC""",
-                (municipality_id,),
-            )
-        else:
-            cursor.execute(
-                """SELECT p.*, m.name as municipality_name, d.name as district_name
-                   FROM parishes p
-                   JOIN municipalities m ON p.municipality_id = m.id
-                   JOIN districts d ON m.district_id = d.id
-                   ORDER BY p.name ASC"""
-            )
+        cursor.execute(*_parishes_query(municipality_id))
         parishes = cursor.fetchall()
         return parishes
     finally:
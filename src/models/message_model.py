@@ -2,20 +2,37 @@
 Message model - In-app messaging operations
 """
 
+from datetime import datetime
 from database import get_db_connection, get_db_cursor
 
+MESSAGE_COLUMNS = "id, sender_id, receiver_id, message, is_read, created_at"
+# NOTIFY channel announcing new messages (see message_notifications.py)
+MESSAGE_CHANNEL = "messages"
+# messages is partitioned by created_at month (see 0010_partition_messages.sql);
+# lookups by id are bounded by created_at so they only read recent partitions.
+# Ids are taken on insert but created_at is the transaction start, so a
+# message can be older than one with a lower id by the length of a transaction.
+RECENT_MESSAGES_WINDOW = "1 day"
+ID_ORDER_SLACK = "1 hour"
+
 
 def create_message(sender_id, receiver_id, message):
-    """Create a new message"""
+    """Create a new message and notify open message streams (delivered on commit)"""
     conn = get_db_connection()
     cursor = get_db_cursor(conn)
 
     try:
         cursor.execute(
-            """INSERT INTO messages (sender_id, receiver_id, message)
-               VALUES (%s, %s, %s)
-               RETURNING id, sender_id, receiver_id, message, is_read, created_at""",
-            (sender_id, receiver_id, message),
+            f"""WITH inserted AS (
+                    INSERT INTO messages (sender_id, receiver_id, message)
+                    VALUES (%s, %s, %s)
+                    RETURNING {MESSAGE_COLUMNS}
+                )
+                SELECT inserted.*
+                FROM inserted,
+                     pg_notify(%s, json_build_object('id', inserted.id, 'sender_id', inserted.sender_id,
+                                                     'receiver_id', inserted.receiver_id)::text)""",
+            (sender_id, receiver_id, message, MESSAGE_CHANNEL),
         )
         result = cursor.fetchone()
         conn.commit()
@@ -25,36 +42,190 @@ def create_message(sender_id, receiver_id, message):
         conn.close()
 
 
-def get_messages_for_user(user_id):
-    """Get all messages received by a user, grouped by sender"""
+def get_messages_for_user(user_id, before=None, limit=None):
+    """
+    Get messages received by a user, newest first.
+    `before` = (created_at, id) of the last message of the previous page (keyset pagination).
+    """
     conn = get_db_connection()
     cursor = get_db_cursor(conn)
 
-    try:
-        cursor.execute(
-            """SELECT m.id, m.sender_id, m.receiver_id, m.message, m.is_read, m.created_at,
+    query = """SELECT m.id, m.sender_id, m.receiver_id, m.message, m.is_read, m.created_at,
                       u.name as sender_name, u.city as sender_city
                FROM messages m
                JOIN users u ON m.sender_id = u.id
-               WHERE m.receiver_id = %s
-               ORDER BY m.created_at DESC""",
+               WHERE m.receiver_id = %s"""
+    params = [user_id]
+
+    if before:
+        # The plain bound prunes the partitions after the cursor
+        query += " AND m.created_at <= %s AND (m.created_at, m.id) < (%s, %s)"
+        params.extend((before[0], *before))
+
+    query += " ORDER BY m.created_at DESC, m.id DESC"
+
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+
+    try:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_threads_for_user(user_id, before=None, limit=None):
+    """
+    Get a user's conversations, most recent first, with the last message and
+    the user's unread count. `before` = (last_message_at, counterpart_id) of
+    the last thread of the previous page.
+    """
+    conn = get_db_connection()
+    cursor = get_db_cursor(conn)
+
+    query = """SELECT t.counterpart_id, u.name AS counterpart_name, t.unread_count,
+                      t.last_message_id, t.last_sender_id, t.last_message, t.last_message_at
+               FROM message_threads t
+               JOIN users u ON u.id = t.counterpart_id
+               WHERE t.user_id = %s"""
+    params = [user_id]
+
+    if before:
+        query += " AND (t.last_message_at, t.counterpart_id) < (%s, %s)"
+        params.extend(before)
+
+    query += " ORDER BY t.last_message_at DESC, t.counterpart_id DESC"
+
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+
+    try:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_messages_by_ids(message_ids):
+    """Get recent messages (created in the last RECENT_MESSAGES_WINDOW) by id, in id order"""
+    conn = get_db_connection()
+    cursor = get_db_cursor(conn)
+
+    try:
+        cursor.execute(
+            f"""SELECT {MESSAGE_COLUMNS} FROM messages
+                WHERE id = ANY(%s) AND created_at >= LOCALTIMESTAMP - %s::interval
+                ORDER BY id""",
+            (list(message_ids), RECENT_MESSAGES_WINDOW),
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_received_messages_after(user_id, after_id, limit):
+    """
+    Get the messages received by a user with an id above `after_id`, in id order.
+    Only the partitions from `after_id`'s month on are read (all of them if it is unknown).
+    """
+    conn = get_db_connection()
+    cursor = get_db_cursor(conn)
+
+    try:
+        # A literal bound, so the partitions are pruned when planning
+        cursor.execute(
+            "SELECT created_at - %s::interval AS since FROM messages WHERE id = %s",
+            (ID_ORDER_SLACK, after_id),
+        )
+        row = cursor.fetchone()
+        since = row["since"] if row else datetime.min
+
+        cursor.execute(
+            f"""SELECT {MESSAGE_COLUMNS} FROM messages
+                WHERE receiver_id = %s AND id > %s AND created_at >= %s
+                ORDER BY id
+                LIMIT %s""",
+            (user_id, after_id, since, limit),
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_unread_total(user_id):
+    """Get the number of unread messages across all of a user's conversations"""
+    conn = get_db_connection()
+    cursor = get_db_cursor(conn, dict_cursor=False)
+
+    try:
+        cursor.execute(
+            "SELECT COALESCE(SUM(unread_count), 0) FROM message_threads WHERE user_id = %s",
             (user_id,),
         )
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_thread_messages(user_id, counterpart_id, before=None, limit=100):
+    """
+    Get the messages exchanged by two users, newest first.
+    Each direction is read from the (sender, receiver, created_at) index and
+    the two pages are merged, so a page costs the same however long the
+    history is. `before` = (created_at, id) of the last message of the previous page.
+    """
+    conn = get_db_connection()
+    cursor = get_db_cursor(conn)
+
+    seek = (
+        " AND created_at <= %(before_at)s AND (created_at, id) < (%(before_at)s, %(before_id)s)"
+        if before else ""
+    )
+    params = {"user_id": user_id, "counterpart_id": counterpart_id, "limit": limit}
+    if before:
+        params["before_at"], params["before_id"] = before
+
+    try:
+        cursor.execute(
+            f"""SELECT {MESSAGE_COLUMNS}
+                FROM ((SELECT {MESSAGE_COLUMNS} FROM messages
+                       WHERE sender_id = %(user_id)s AND receiver_id = %(counterpart_id)s{seek}
+                       ORDER BY created_at DESC, id DESC
+                       LIMIT %(limit)s)
+                      UNION ALL
+                      (SELECT {MESSAGE_COLUMNS} FROM messages
+                       WHERE sender_id = %(counterpart_id)s AND receiver_id = %(user_id)s{seek}
+                       ORDER BY created_at DESC, id DESC
+                       LIMIT %(limit)s)) m
+                ORDER BY created_at DESC, id DESC
+                LIMIT %(limit)s""",
+            params,
+        )
         return cursor.fetchall()
     finally:
         cursor.close()
         conn.close()
 
 
-def mark_message_as_read(message_id, user_id):
-    """Mark a message as read"""
+def mark_message_as_read(message_id, user_id, retention_months):
+    """Mark a message as read (among the last `retention_months` months, the ones not archived)"""
     conn = get_db_connection()
     cursor = get_db_cursor(conn, dict_cursor=False)
 
     try:
         cursor.execute(
-            "UPDATE messages SET is_read = TRUE WHERE id = %s AND receiver_id = %s",
-            (message_id, user_id),
+            """UPDATE messages SET is_read = TRUE
+               WHERE id = %s AND receiver_id = %s
+                 AND created_at >= date_trunc('month', LOCALTIMESTAMP) - make_interval(months => %s)
+                 AND created_at < LOCALTIMESTAMP + %s::interval""",
+            (message_id, user_id, retention_months, ID_ORDER_SLACK),
         )
         conn.commit()
         return cursor.rowcount > 0
@@ -62,3 +233,82 @@ def mark_message_as_read(message_id, user_id):
         cursor.close()
         conn.close()
 
+
+def mark_thread_as_read(user_id, counterpart_id):
+    """Mark every message a user received from a counterpart as read, returns the number marked"""
+    conn = get_db_connection()
+    cursor = get_db_cursor(conn, dict_cursor=False)
+
+    try:
+        cursor.execute(
+            """UPDATE messages SET is_read = TRUE
+               WHERE receiver_id = %s AND sender_id = %s AND is_read IS NOT TRUE""",
+            (user_id, counterpart_id),
+        )
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def mark_messages_as_read(user_id, message_ids, retention_months):
+    """
+    Mark the given messages received by a user as read, returns the number
+    marked. Only the last `retention_months` months (the ones not archived)
+    are searched, so the update skips the other partitions.
+    """
+    conn = get_db_connection()
+    cursor = get_db_cursor(conn, dict_cursor=False)
+
+    try:
+        cursor.execute(
+            """UPDATE messages SET is_read = TRUE
+               WHERE receiver_id = %s AND id = ANY(%s) AND is_read IS NOT TRUE
+                 AND created_at >= date_trunc('month', LOCALTIMESTAMP) - make_interval(months => %s)
+                 AND created_at < LOCALTIMESTAMP + %s::interval""",
+            (user_id, list(message_ids), retention_months, ID_ORDER_SLACK),
+        )
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def create_message_partitions_in_db(months_ahead):
+    """Create the missing monthly message partitions up to `months_ahead` months ahead, returns how many"""
+    conn = get_db_connection()
+    cursor = get_db_cursor(conn, dict_cursor=False)
+
+    try:
+        # Waits for any other process creating or archiving partitions
+        cursor.execute("SET LOCAL statement_timeout = 0")
+        cursor.execute("SELECT create_message_partitions(CURRENT_DATE, %s)", (months_ahead,))
+        created = cursor.fetchone()[0]
+        conn.commit()
+        return created
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def archive_message_partitions_in_db(retention_months, lock_timeout="5s"):
+    """
+    Detach the message partitions older than `retention_months` into the
+    messages_archive schema, returns their names. Detaching waits at most
+    `lock_timeout` for the queries running on messages (then raises).
+    """
+    conn = get_db_connection()
+    cursor = get_db_cursor(conn, dict_cursor=False)
+
+    try:
+        cursor.execute("SELECT set_config('lock_timeout', %s, true)", (lock_timeout,))
+        cursor.execute("SET LOCAL statement_timeout = 0")
+        cursor.execute("SELECT archive_message_partitions(%s)", (retention_months,))
+        archived = [row[0] for row in cursor.fetchall()]
+        conn.commit()
+        return archived
+    finally:
+        cursor.close()
+        conn.close()
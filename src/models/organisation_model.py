@@ -2,7 +2,21 @@
 Organisation model - Organisation database operations
 """
 
-from database import get_db_connection, get_db_cursor
+from database import get_db_connection, get_db_cursor, stream_query
+
+ORGANISATIONS_QUERY = """SELECT 
+    o.id, o.name, o.description, o.head_user_id,
+    ARRAY_AGG(DISTINCT m.id) FILTER (WHERE m.id IS NOT NULL) as allowed_municipality_ids,
+    ARRAY_AGG(DISTINCT m.name) FILTER (WHERE m.name IS NOT NULL) as allowed_municipalities,
+    ARRAY_AGG(DISTINCT p.id) FILTER (WHERE p.id IS NOT NULL) as allowed_parish_ids,
+    ARRAY_AGG(DISTINCT p.name) FILTER (WHERE p.name IS NOT NULL) as allowed_parishes
+   FROM organisations o
+   LEFT JOIN organisation_allowed_municipalities oam ON o.id = oam.organisation_id
+   LEFT JOIN municipalities m ON oam.municipality_id = m.id
+   LEFT JOIN organisation_allowed_parishes oap ON o.id = oap.organisation_id
+   LEFT JOIN parishes p ON oap.parish_id = p.id
+   GROUP BY o.id, o.name, o.description, o.head_user_id
+   ORDER BY o.id ASC"""
 
 
 def create_organisation_in_db(
@@ -100,23 +114,14 @@ def get_organisations_from_db():
     cursor = get_db_cursor(conn)
 
     try:
-        cursor.execute(
-            """SELECT 
-                o.id, o.name, o.description, o.head_user_id,
-                ARRAY_AGG(DISTINCT m.id) FILTER (WHERE m.id IS NOT NULL) as allowed_municipality_ids,
-                ARRAY_AGG(DISTINCT m.name) FILTER (WHERE m.name IS NOT NULL) as allowed_municipalities,
-                ARRAY_AGG(DISTINCT p.id) FILTER (WHERE p.id IS NOT NULL) as allowed_parish_ids,
-                ARRAY_AGG(DISTINCT p.name) FILTER (WHERE p.name IS NOT NULL) as allowed_parishes
-               FROM organisations o
-               LEFT JOIN organisation_allowed_municipalities oam ON o.id = oam.organisation_id
-               LEFT JOIN municipalities m ON oam.municipality_id = m.id
-               LEFT JOIN organisation_allowed_parishes oap ON o.id = oap.organisation_id
-               LEFT JOIN parishes p ON oap.parish_id = p.id
-               GROUP BY o.id, o.name, o.description, o.head_user_id
-               ORDER BY o.id ASC"""
-        )
+        cursor.execute(ORGANISATIONS_QUERY)
         organisations = cursor.fetchall()
         return organisations
     finally:
         cursor.close()
         conn.close()
+
+
+def iter_organisations_from_db():
+    """Stream organisations through a server-side cursor"""
+    return stream_query(ORGANISATIONS_QUERY)
@@ -0,0 +1,173 @@
+"""
+Postal code index - Offline postal code to location resolver
+
+Portuguese postal codes (CP4-CP3, e.g. 4700-001) are read from the
+bundled data/postal_codes.csv and kept as sorted arrays of integer keys
+with parallel id / coordinate arrays, so a lookup is a binary search.
+Rows may give a full code or just the CP4 block (e.g. 4700); a full code
+that is not listed falls back to its block. Location names in the file
+are mapped to ids once, at load time, through the location index.
+
+Coverage: the bundled file is not the national dataset. It only maps the
+blocks 4700, 4705, 4710 and 4715 to Braga municipality, without parish
+or coordinates, so other codes resolve to None (see TODO.md).
+"""
+
+import csv
+import math
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from metrics import record_cache_lookup
+from models.location_cache import get_location_index
+
+POSTAL_CODES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "postal_codes.csv"
+)
+
+POSTAL_CODE_PATTERN = re.compile(r"^(\d{4})(?:-?(\d{3}))?$")
+
+
+def parse_postal_code(value):
+    """Get (cp4, cp3) from '4700-001', '4700001' or '4700'; cp3 is None for a bare CP4"""
+    if not isinstance(value, str):
+        return None
+    match = POSTAL_CODE_PATTERN.match(value.replace(" ", ""))
+    if not match:
+        return None
+    cp3 = match.group(2)
+    return int(match.group(1)), int(cp3) if cp3 is not None else None
+
+
+class _SortedTable:
+    """Integer keys in a sorted array with parallel arrays of location ids and coordinates"""
+
+    def __init__(self, entries):
+        entries = sorted(entries)
+        self.keys = array("I", (entry[0] for entry in entries))
+        # 0 stands for "unknown" in the id arrays, NaN in the coordinate arrays
+        self.parish_ids = array("I", (entry[1] or 0 for entry in entries))
+        self.municipality_ids = array("I", (entry[2] or 0 for entry in entries))
+        self.district_ids = array("I", (entry[3] or 0 for entry in entries))
+        self.latitudes = array("d", (math.nan if entry[4] is None else entry[4] for entry in entries))
+        self.longitudes = array("d", (math.nan if entry[5] is None else entry[5] for entry in entries))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get(self, key):
+        position = bisect_left(self.keys, key)
+        if position == len(self.keys) or self.keys[position] != key:
+            return None
+
+        latitude = self.latitudes[position]
+        longitude = self.longitudes[position]
+        return {
+            "parish_id": self.parish_ids[position] or None,
+            "municipality_id": self.municipality_ids[position] or None,
+            "district_id": self.district_ids[position] or None,
+            "latitude": None if math.isnan(latitude) else latitude,
+            "longitude": None if math.isnan(longitude) else longitude,
+        }
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class PostalCodeIndex:
+    """Immutable postal code lookup built from the bundled dataset and a location index"""
+
+    def __init__(self, rows, location_index):
+        self.location_index = location_index
+
+        district_ids = {d["name"]: d["id"] for d in location_index.districts}
+        municipality_ids = {(m["district_id"], m["name"]): m["id"] for m in location_index.municipalities}
+        parish_ids = {(p["municipality_id"], p["name"]): p["id"] for p in location_index.parishes}
+
+        codes = []
+        blocks = []
+        self.skipped = 0
+        for row in rows:
+            parsed = parse_postal_code(row.get("postal_code"))
+            district_id = district_ids.get(row.get("district"))
+            if parsed is None or district_id is None:
+                self.skipped += 1
+                continue
+
+            municipality_id = municipality_ids.get((district_id, row.get("municipality")))
+            parish_id = parish_ids.get((municipality_id, row.get("parish"))) if municipality_id else None
+            cp4, cp3 = parsed
+            entry = (
+                cp4,
+                parish_id,
+                municipality_id,
+                district_id,
+                _to_float(row.get("latitude")),
+                _to_float(row.get("longitude")),
+            )
+            if cp3 is None:
+                blocks.append(entry)
+            else:
+                codes.append((cp4 * 1000 + cp3,) + entry[1:])
+
+        self.codes = _SortedTable(codes)
+        self.blocks = _SortedTable(blocks)
+
+    def __len__(self):
+        return len(self.codes) + len(self.blocks)
+
+    def resolve(self, postal_code):
+        """
+        Resolve a postal code in O(log n)
+        Returns: dict with parish_id, municipality_id, district_id, latitude, longitude
+        (any of them may be None), or None if the code is malformed or unknown
+        """
+        parsed = parse_postal_code(postal_code)
+        if parsed is None:
+            return None
+
+        cp4, cp3 = parsed
+        if cp3 is not None:
+            location = self.codes.get(cp4 * 1000 + cp3)
+            if location is not None:
+                return location
+        return self.blocks.get(cp4)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def load_postal_code_index(path=POSTAL_CODES_PATH, location_index=None):
+    """Read the postal code dataset and map it onto the location index"""
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    return PostalCodeIndex(rows, location_index or get_location_index())
+
+
+def get_postal_code_index():
+    """Get the cached postal code index, rebuilding it when the location index was reloaded"""
+    global _index
+    location_index = get_location_index()
+    index = _index
+    if index is not None and index.location_index is location_index:
+        record_cache_lookup("postal_code_index", True)
+        return index
+
+    with _index_lock:
+        stale = _index is None or _index.location_index is not location_index
+        record_cache_lookup("postal_code_index", not stale)
+        if stale:
+            _index = load_postal_code_index(location_index=location_index)
+        return _index
+
+
+def resolve_postal_code(postal_code):
+    """Resolve a postal code to its location ids and coordinates, or None"""
+    return get_postal_code_index().resolve(postal_code)
@@ -0,0 +1,110 @@
+"""
+Precondition model - Resolve all checks for a write operation in one query
+"""
+
+from database import get_db_connection, get_db_cursor
+
+
+def _fetch_checks(query, params):
+    """Run a single-row precondition query and return it as a dict"""
+    conn = get_db_connection()
+    cursor = get_db_cursor(conn)
+
+    try:
+        cursor.execute(query, params)
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_interest_preconditions(user_id, event_id):
+    """Check user, event and existing interest for marking interest"""
+    return _fetch_checks(
+        """SELECT
+               EXISTS (SELECT 1 FROM users WHERE id = %(user_id)s) AS user_exists,
+               EXISTS (SELECT 1 FROM events WHERE id = %(event_id)s) AS event_exists,
+               EXISTS (SELECT 1 FROM event_interest
+                       WHERE user_id = %(user_id)s AND event_id = %(event_id)s) AS interest_exists""",
+        {"user_id": user_id, "event_id": event_id},
+    )
+
+
+def get_assisted_preconditions(event_id, volunteer_id, assisted_id):
+    """
+    Check volunteer, assisted user, event, association and any existing
+    interest or transport request for an action on behalf of an assisted user
+    """
+    return _fetch_checks(
+        """SELECT
+               EXISTS (SELECT 1 FROM users WHERE id = %(volunteer_id)s) AS volunteer_exists,
+               EXISTS (SELECT 1 FROM users WHERE id = %(assisted_id)s) AS assisted_exists,
+               EXISTS (SELECT 1 FROM events WHERE id = %(event_id)s) AS event_exists,
+               EXISTS (SELECT 1 FROM volunteer_assisted
+                       WHERE volunteer_id = %(volunteer_id)s
+                         AND assisted_id = %(assisted_id)s) AS association_exists,
+               EXISTS (SELECT 1 FROM event_interest
+                       WHERE user_id = %(assisted_id)s AND event_id = %(event_id)s) AS interest_exists,
+               EXISTS (SELECT 1 FROM event_transport_requests
+                       WHERE user_id = %(assisted_id)s AND event_id = %(event_id)s) AS transport_request_exists""",
+        {"event_id": event_id, "volunteer_id": volunteer_id, "assisted_id": assisted_id},
+    )
+
+
+def get_bulk_assisted_preconditions(event_id, volunteer_id):
+    """Check volunteer and event for an action on behalf of several assisted users"""
+    return _fetch_checks(
+        """SELECT
+               EXISTS (SELECT 1 FROM users WHERE id = %(volunteer_id)s) AS volunteer_exists,
+               EXISTS (SELECT 1 FROM events WHERE id = %(event_id)s) AS event_exists""",
+        {"event_id": event_id, "volunteer_id": volunteer_id},
+    )
+
+
+def get_transport_request_preconditions(event_id, user_id, volunteer_id=None):
+    """Check event, user, optional volunteer/association and existing request"""
+    return _fetch_checks(
+        """SELECT
+               EXISTS (SELECT 1 FROM events WHERE id = %(event_id)s) AS event_exists,
+               EXISTS (SELECT 1 FROM users WHERE id = %(user_id)s) AS user_exists,
+               EXISTS (SELECT 1 FROM users WHERE id = %(volunteer_id)s) AS volunteer_exists,
+               EXISTS (SELECT 1 FROM volunteer_assisted
+                       WHERE volunteer_id = %(volunteer_id)s
+                         AND assisted_id = %(user_id)s) AS association_exists,
+               EXISTS (SELECT 1 FROM event_transport_requests
+                       WHERE event_id = %(event_id)s AND user_id = %(user_id)s) AS transport_request_exists""",
+        {"event_id": event_id, "user_id": user_id, "volunteer_id": volunteer_id},
+    )
+
+
+def get_association_preconditions(volunteer_id, code):
+    """Check volunteer, QR code owner and both users' assisted status"""
+    return _fetch_checks(
+        """WITH code_owner AS (
+               SELECT user_id FROM user_codes WHERE code = %(code)s AND is_active = TRUE
+           )
+           SELECT
+               EXISTS (SELECT 1 FROM users WHERE id = %(volunteer_id)s) AS volunteer_exists,
+               EXISTS (SELECT 1 FROM volunteer_assisted
+                       WHERE assisted_id = %(volunteer_id)s) AS volunteer_is_assisted,
+               (SELECT user_id FROM code_owner) AS assisted_id,
+               EXISTS (SELECT 1 FROM users u
+                       JOIN code_owner c ON u.id = c.user_id) AS assisted_exists,
+               EXISTS (SELECT 1 FROM volunteer_assisted va
+                       JOIN code_owner c ON va.assisted_id = c.user_id) AS assisted_is_assisted""",
+        {"volunteer_id": volunteer_id, "code": code},
+    )
+
+
+def get_message_preconditions(sender_id, receiver_id):
+    """Check both users and whether they share a volunteer-assisted link"""
+    return _fetch_checks(
+        """SELECT
+               EXISTS (SELECT 1 FROM users WHERE id = %(sender_id)s) AS sender_exists,
+               EXISTS (SELECT 1 FROM users WHERE id = %(receiver_id)s) AS receiver_exists,
+               EXISTS (SELECT 1 FROM volunteer_assisted
+                       WHERE (volunteer_id = %(sender_id)s AND assisted_id = %(receiver_id)s)
+                          OR (volunteer_id = %(receiver_id)s AND assisted_id = %(sender_id)s)
+                      ) AS can_communicate""",
+        {"sender_id": sender_id, "receiver_id": receiver_id},
+    )
@@ -2,20 +2,50 @@
 User model - User database operations
 """
 
-from database import get_db_connection, get_db_cursor
+from database import copy_rows, get_db_connection, get_db_cursor, stream_query
 
+# Columns that can be requested through field projection
+USER_FIELDS = (
+    "id",
+    "name",
+    "age",
+    "gender",
+    "street",
+    "street_number",
+    "apartment",
+    "postal_code",
+    "city",
+    "district_id",
+    "municipality_id",
+    "parish_id",
+    "latitude",
+    "longitude",
+    "is_volunteer",
+    "is_assisted",
+    "has_organisation",
+    "organisation_id",
+    "created_at",
+    "updated_at",
+)
 
-def create_user_in_db(data):
-    """Insert user into database and return the created user"""
+
+def create_user_in_db(data, location=None):
+    """
+    Insert user into database and return the created user
+    `location` holds the ids and coordinates resolved from the postal code.
+    """
+    location = location or {}
     conn = get_db_connection()
     cursor = get_db_cursor(conn)
 
     try:
         cursor.execute(
             """INSERT INTO users (name, age, gender, street, street_number, apartment, postal_code, city, 
+               district_id, municipality_id, parish_id, latitude, longitude,
                is_volunteer, is_assisted, has_organisation, organisation_id) 
-               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) 
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) 
                RETURNING id, name, age, gender, street, street_number, apartment, postal_code, city, 
+               district_id, municipality_id, parish_id, latitude, longitude,
                is_volunteer, is_assisted, has_organisation, organisation_id""",
             (
                 data["name"],
@@ -26,6 +56,11 @@ def create_user_in_db(data):
                 data.get("apartment"),
                 data["postal_code"],
                 data["city"],
+                location.get("district_id"),
+                location.get("municipality_id"),
+                location.get("parish_id"),
+                location.get("latitude"),
+                location.get("longitude"),
                 data.get("is_volunteer", False),
                 data.get("is_assisted", False),
                 data.get("has_organisation", False),
@@ -40,6 +75,90 @@ def create_user_in_db(data):
         conn.close()
 
 
+# Columns of each row passed to bulk_create_users_in_db, after the row number
+IMPORT_COLUMNS = (
+    "name",
+    "age",
+    "gender",
+    "street",
+    "street_number",
+    "apartment",
+    "postal_code",
+    "city",
+    "district_id",
+    "municipality_id",
+    "parish_id",
+    "latitude",
+    "longitude",
+    "is_volunteer",
+    "is_assisted",
+    "has_organisation",
+    "organisation_id",
+)
+
+
+def bulk_create_users_in_db(rows):
+    """
+    Insert many users with COPY through a staging table
+    `rows` is an iterable of (row_number, *IMPORT_COLUMNS) tuples, consumed lazily.
+    User ids are drawn from users_id_seq while copying, in row order.
+    Returns: (created: list of (row_number, id), missing_organisations: list of (row_number, organisation_id))
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    columns = ", ".join(IMPORT_COLUMNS)
+
+    try:
+        # COPY reads the upload as the client sends it, which can outlast DB_STATEMENT_TIMEOUT_MS
+        cursor.execute("SET LOCAL statement_timeout = 0")
+        cursor.execute(
+            """CREATE TEMP TABLE user_import_staging (
+                   row_number INTEGER NOT NULL,
+                   id INTEGER NOT NULL DEFAULT nextval('users_id_seq'),
+                   name VARCHAR(255), age INTEGER, gender VARCHAR(10),
+                   street VARCHAR(255), street_number VARCHAR(20), apartment VARCHAR(50),
+                   postal_code VARCHAR(20), city VARCHAR(100),
+                   district_id INTEGER, municipality_id INTEGER, parish_id INTEGER,
+                   latitude DOUBLE PRECISION, longitude DOUBLE PRECISION,
+                   is_volunteer BOOLEAN, is_assisted BOOLEAN, has_organisation BOOLEAN,
+                   organisation_id INTEGER
+               ) ON COMMIT DROP"""
+        )
+        copy_rows(cursor, "user_import_staging", ("row_number",) + IMPORT_COLUMNS, rows)
+
+        cursor.execute(
+            """SELECT s.row_number, s.organisation_id
+               FROM user_import_staging s
+               WHERE s.organisation_id IS NOT NULL
+                 AND NOT EXISTS (SELECT 1 FROM organisations o WHERE o.id = s.organisation_id)
+               ORDER BY s.row_number"""
+        )
+        missing_organisations = cursor.fetchall()
+
+        cursor.execute(
+            f"""WITH inserted AS (
+                    INSERT INTO users (id, {columns})
+                    SELECT s.id, {", ".join("s." + column for column in IMPORT_COLUMNS)}
+                    FROM user_import_staging s
+                    WHERE s.organisation_id IS NULL
+                       OR EXISTS (SELECT 1 FROM organisations o WHERE o.id = s.organisation_id)
+                    RETURNING id
+                )
+                SELECT s.row_number, s.id
+                FROM user_import_staging s
+                JOIN inserted i ON i.id = s.id
+                ORDER BY s.row_number"""
+        )
+        created = cursor.fetchall()
+
+        cursor.execute("DROP TABLE user_import_staging")
+        conn.commit()
+        return created, missing_organisations
+    finally:
+        cursor.close()
+        conn.close()
+
+
 def check_user_exists(user_id):
     """Check if a user exists"""
     conn = get_db_connection()
@@ -54,13 +173,35 @@ def check_user_exists(user_id):
         conn.close()
 
 
-def get_users_from_db():
-    """Get all users"""
+def _users_query(after_id=None, limit=None, fields=None):
+    """Build the keyset-paginated users query"""
+    columns = [field for field in USER_FIELDS if not fields or field == "id" or field in fields]
+    query = f"SELECT {', '.join(columns)} FROM users"
+    params = []
+
+    if after_id is not None:
+        query += " WHERE id > %s"
+        params.append(after_id)
+
+    query += " ORDER BY id ASC"
+
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+
+    return query, params
+
+
+def get_users_from_db(after_id=None, limit=None, fields=None):
+    """
+    Get users ordered by id, starting after `after_id` (keyset pagination).
+    `fields` must be a subset of USER_FIELDS; id is always included.
+    """
     conn = get_db_connection()
     cursor = get_db_cursor(conn)
 
     try:
-        cursor.execute("SELECT * FROM users ORDER BY id ASC")
+        cursor.execute(*_users_query(after_id, limit, fields))
         users = cursor.fetchall()
         return users
     finally:
@@ -68,6 +209,11 @@ def get_users_from_db():
         conn.close()
 
 
+def iter_users_from_db(after_id=None, limit=None, fields=None):
+    """Stream users through a server-side cursor (same filters as get_users_from_db)"""
+    return stream_query(*_users_query(after_id, limit, fields))
+
+
 def delete_user_from_db(user_id):
     """Delete a user from database"""
     conn = get_db_connection()
@@ -29,20 +29,20 @@ def get_or_create_user_code(user_id):
         if result:
             return result["code"]
 
-        # Generate new unique code
+        # Generate new unique code (conflicts skip the row instead of
+        # aborting the transaction, so no rollback is needed between tries)
         max_attempts = 10
         for _ in range(max_attempts):
             code = generate_unique_code()
-            try:
-                cursor.execute(
-                    "INSERT INTO user_codes (user_id, code) VALUES (%s, %s)",
-                    (user_id, code)
-                )
+            cursor.execute(
+                """INSERT INTO user_codes (user_id, code) VALUES (%s, %s)
+                   ON CONFLICT DO NOTHING
+                   RETURNING code""",
+                (user_id, code)
+            )
+            if cursor.fetchone():
                 conn.commit()
                 return code
-            except Exception:
-                conn.rollback()
-                continue
 
         raise Exception("Failed to generate unique code")
     finally:
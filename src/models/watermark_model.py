@@ -0,0 +1,31 @@
+"""
+Watermark model - Cheap change markers for HTTP conditional requests
+"""
+
+from database import get_db_connection, get_db_cursor
+
+
+def get_table_watermark(*table_names):
+    """
+    Get the change counters of tables tracked in table_versions
+    Returns: (versions: tuple of (table, version), last_modified: datetime or None)
+    """
+    conn = get_db_connection()
+    cursor = get_db_cursor(conn)
+
+    try:
+        cursor.execute(
+            """SELECT table_name, SUM(version) AS version, MAX(updated_at) AS updated_at
+               FROM table_versions
+               WHERE table_name = ANY(%s)
+               GROUP BY table_name
+               ORDER BY table_name""",
+            (list(table_names),),
+        )
+        rows = cursor.fetchall()
+        versions = tuple((row["table_name"], int(row["version"])) for row in rows)
+        last_modified = max((row["updated_at"] for row in rows), default=None)
+        return versions, last_modified
+    finally:
+        cursor.close()
+        conn.close()
@@ -10,6 +10,8 @@ from .health_routes import health_api
 from .volunteer_routes import volunteer_api
 from .transport_routes import transport_api
 from .message_routes import message_api
+from .export_routes import export_api
+from .metrics_routes import metrics_api
 
 
 def register_routes(app):
@@ -22,6 +24,8 @@ def register_routes(app):
     app.register_blueprint(volunteer_api)
     app.register_blueprint(transport_api)
     app.register_blueprint(message_api)
+    app.register_blueprint(export_api)
+    app.register_blueprint(metrics_api)
 
 
 __all__ = ["register_routes"]
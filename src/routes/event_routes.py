@@ -4,14 +4,20 @@ Event routes - HTTP endpoints for events
 
 from flask import Blueprint, request, jsonify
 from utils.validators import extract_request_data
+from utils.formatters import format_event_row
+from utils.streaming import get_stream_format, stream_json_response
+from utils.http_cache import conditional_get
 from services.event_service import (
     create_event as create_event_service,
     delete_event as delete_event_service,
     get_events as get_events_service,
+    stream_events as stream_events_service,
     mark_user_interest,
     remove_user_interest,
     mark_interest_for_assisted,
+    mark_interest_for_assisted_bulk,
     get_event_by_id,
+    get_events_watermark,
 )
 
 events_api = Blueprint("events", __name__)
@@ -50,13 +56,23 @@ def delete_event():
 
 
 @events_api.route("/events", methods=["GET"])
+@conditional_get(get_events_watermark)
 def get_events():
-    """Get all events with optional filters"""
+    """Get a page of events with optional filters"""
     try:
-        name_filter = request.form.get("name") or request.args.get("name")
-        date_filter = request.form.get("date") or request.args.get("date")
+        filters = request.args.to_dict()
+        for field in ("name", "date"):
+            if request.form.get(field):
+                filters[field] = request.form.get(field)
+
+        stream_format = get_stream_format(request)
+        if stream_format:
+            success, result, status_code = stream_events_service(filters)
+            if success:
+                return stream_json_response("events", result, stream_format, format_event_row)
+            return jsonify({"error": result}), status_code
 
-        success, result, status_code = get_events_service(name_filter, date_filter)
+        success, result, status_code = get_events_service(filters)
 
         if success:
             return jsonify(result), status_code
@@ -104,6 +120,7 @@ def remove_interest(event_id):
 
 
 @events_api.route("/event/<int:event_id>", methods=["GET"])
+@conditional_get(get_events_watermark)
 def get_event(event_id):
     """Get a specific event by ID"""
     try:
@@ -143,3 +160,30 @@ def mark_interest_assisted(event_id):
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+@events_api.route("/event/<int:event_id>/interest/assisted/bulk", methods=["POST"])
+def mark_interest_assisted_bulk(event_id):
+    """Mark several assisted users as interested in an event (by their volunteer)"""
+    try:
+        data = extract_request_data(request)
+        volunteer_id = data.get("volunteer_id")
+        assisted_ids = data.get("assisted_ids")
+
+        if not volunteer_id or not assisted_ids:
+            return (
+                jsonify({"error": "Missing required fields: volunteer_id, assisted_ids"}),
+                400,
+            )
+
+        success, result, status_code = mark_interest_for_assisted_bulk(
+            event_id, volunteer_id, assisted_ids
+        )
+
+        if success:
+            return jsonify(result), status_code
+        else:
+            return jsonify({"error": result}), status_code
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,66 @@
+"""
+Export routes - HTTP endpoints for bulk CSV / NDJSON exports
+"""
+
+from flask import Blueprint, Response, request, jsonify
+from utils.validators import validate_boolean
+from utils.streaming import NDJSON_MIMETYPE, gzip_chunks
+from services.export_service import (
+    export_users as export_users_service,
+    export_events as export_events_service,
+    export_interests as export_interests_service,
+)
+
+export_api = Blueprint("export", __name__)
+
+EXPORT_MIMETYPES = {"csv": "text/csv", "ndjson": NDJSON_MIMETYPE}
+
+
+def _export_response(name, export_service):
+    """Run an export service and stream its output as a file download"""
+    is_valid, compress, error = validate_boolean(request.args.get("gzip", "false"), "gzip")
+    if not is_valid:
+        return jsonify({"error": error}), 400
+
+    success, result, status_code = export_service(request.args.to_dict())
+    if not success:
+        return jsonify({"error": result}), status_code
+
+    export_format, chunks = result
+    filename = f"{name}.{export_format}"
+    mimetype = EXPORT_MIMETYPES[export_format]
+    if compress:
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        mimetype = "application/gzip"
+
+    response = Response(chunks, mimetype=mimetype)
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@export_api.route("/export/users", methods=["GET"])
+def export_users():
+    """Export users as CSV or NDJSON"""
+    try:
+        return _export_response("users", export_users_service)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@export_api.route("/export/events", methods=["GET"])
+def export_events():
+    """Export events as CSV or NDJSON"""
+    try:
+        return _export_response("events", export_events_service)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@export_api.route("/export/interests", methods=["GET"])
+def export_interests():
+    """Export event interests as CSV or NDJSON"""
+    try:
+        return _export_response("interests", export_interests_service)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
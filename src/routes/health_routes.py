@@ -3,11 +3,32 @@ Health check routes - System health monitoring endpoints
 """
 
 from flask import Blueprint, jsonify
+from services.health_service import get_readiness
+from utils.request_limit import exempt_from_request_limit
 
 health_api = Blueprint("health", __name__)
 
 
 @health_api.route("/health", methods=["GET"])
+@exempt_from_request_limit
 def health_check():
     """Health check endpoint for the API"""
     return jsonify({"status": "ok", "message": "Events API is running"}), 200
+
+
+@health_api.route("/health/live", methods=["GET"])
+@exempt_from_request_limit
+def liveness_check():
+    """Liveness probe: the process is up and serving requests (no dependencies checked)"""
+    return jsonify({"status": "ok"}), 200
+
+
+@health_api.route("/health/ready", methods=["GET"])
+@exempt_from_request_limit
+def readiness_check():
+    """Readiness probe: database latency, connection pool and migrations"""
+    try:
+        _, result, status_code = get_readiness()
+        return jsonify(result), status_code
+    except Exception as e:
+        return jsonify({"status": "down", "error": str(e)}), 503
@@ -3,54 +3,67 @@ Location routes - HTTP endpoints for districts, municipalities, and parishes
 """
 
 from flask import Blueprint, request, jsonify
-from models.location_model import (
-    get_districts_from_db,
-    get_municipalities_from_db,
-    get_parishes_from_db,
-)
+from utils.validators import validate_integer
+from utils.streaming import get_stream_format, stream_json_response
+from utils.http_cache import conditional_get
+from models.location_cache import get_location_index, get_location_watermark
+
+# Reference data: let clients reuse responses for an hour
+LOCATIONS_MAX_AGE = 3600
 
 locations_api = Blueprint("locations", __name__)
 
 
+def _list_response(key, rows):
+    """Build a list response (streamed if requested) from cached rows"""
+    stream_format = get_stream_format(request)
+    if stream_format:
+        return stream_json_response(key, rows, stream_format)
+    return jsonify({key: list(rows), "count": len(rows)}), 200
+
+
 @locations_api.route("/districts", methods=["GET"])
+@conditional_get(get_location_watermark, max_age=LOCATIONS_MAX_AGE)
 def get_districts():
     """Get all districts"""
     try:
-        districts = get_districts_from_db()
-        return jsonify(
-            {"districts": [district for district in districts], "count": len(districts)}
-        ), 200
+        return _list_response("districts", get_location_index().districts)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @locations_api.route("/municipalities", methods=["GET"])
+@conditional_get(get_location_watermark, max_age=LOCATIONS_MAX_AGE)
 def get_municipalities():
     """Get all municipalities, optionally filtered by district"""
     try:
-        district_id = request.args.get("district_id")
-        municipalities = get_municipalities_from_db(district_id)
-        return jsonify(
-            {
-                "municipalities": [mun for mun in municipalities],
-                "count": len(municipalities),
-            }
-        ), 200
+        district_id = request.args.get("district_id") or None
+        if district_id:
+            is_valid, district_id, error = validate_integer(district_id, "district_id")
+            if not is_valid:
+                return jsonify({"error": error}), 400
+
+        municipalities = get_location_index().get_municipalities(district_id)
+        return _list_response("municipalities", municipalities)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @locations_api.route("/parishes", methods=["GET"])
+@conditional_get(get_location_watermark, max_age=LOCATIONS_MAX_AGE)
 def get_parishes():
     """Get all parishes, optionally filtered by municipality"""
     try:
-        municipality_id = request.args.get("municipality_id")
-        parishes = get_parishes_from_db(municipality_id)
-        return jsonify(
-            {"parishes": [parish for parish in parishes], "count": len(parishes)}
-        ), 200
+        municipality_id = request.args.get("municipality_id") or None
+        if municipality_id:
+            is_valid, municipality_id, error = validate_integer(municipality_id, "municipality_id")
+            if not is_valid:
+                return jsonify({"error": error}), 400
+
+        parishes = get_location_index().get_parishes(municipality_id)
+        return _list_response("parishes", parishes)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
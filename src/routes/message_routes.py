@@ -3,8 +3,17 @@ Message routes - HTTP endpoints for in-app messaging
 """
 
 from flask import Blueprint, request, jsonify
+from utils.request_limit import exempt_from_request_limit
+from utils.streaming import sse_response
 from utils.validators import extract_request_data
-from services.message_service import send_message, get_user_messages
+from services.message_service import (
+    send_message,
+    get_user_messages,
+    get_user_threads,
+    get_thread,
+    mark_messages_read,
+    open_message_stream,
+)
 
 message_api = Blueprint("messages", __name__)
 
@@ -39,7 +48,7 @@ def send_message_route():
 
 @message_api.route("/messages", methods=["GET"])
 def get_messages_route():
-    """Get all messages for a user"""
+    """Get the messages received by a user (all, or a page with limit / cursor)"""
     try:
         user_id = request.args.get("user_id")
 
@@ -51,7 +60,7 @@ def get_messages_route():
         except ValueError:
             return jsonify({"error": "Invalid user_id format"}), 400
 
-        success, result, status_code = get_user_messages(user_id)
+        success, result, status_code = get_user_messages(user_id, request.args.to_dict())
 
         if success:
             return jsonify(result), status_code
@@ -61,3 +70,107 @@ def get_messages_route():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+
+@message_api.route("/messages/threads", methods=["GET"])
+def get_threads_route():
+    """Get a page of a user's conversations with last message and unread count"""
+    try:
+        user_id = request.args.get("user_id")
+
+        if not user_id:
+            return jsonify({"error": "Missing required parameter: user_id"}), 400
+
+        try:
+            user_id = int(user_id)
+        except ValueError:
+            return jsonify({"error": "Invalid user_id format"}), 400
+
+        success, result, status_code = get_user_threads(user_id, request.args.to_dict())
+
+        if success:
+            return jsonify(result), status_code
+        else:
+            return jsonify({"error": result}), status_code
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@message_api.route("/messages/threads/<int:counterpart_id>", methods=["GET"])
+def get_thread_route(counterpart_id):
+    """Get a page of the messages exchanged by a user and a counterpart"""
+    try:
+        user_id = request.args.get("user_id")
+
+        if not user_id:
+            return jsonify({"error": "Missing required parameter: user_id"}), 400
+
+        try:
+            user_id = int(user_id)
+        except ValueError:
+            return jsonify({"error": "Invalid user_id format"}), 400
+
+        success, result, status_code = get_thread(user_id, counterpart_id, request.args.to_dict())
+
+        if success:
+            return jsonify(result), status_code
+        else:
+            return jsonify({"error": result}), status_code
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@message_api.route("/messages/read", methods=["POST"])
+def mark_messages_read_route():
+    """Mark a conversation, or a list of messages, as read"""
+    try:
+        data = extract_request_data(request)
+        user_id = data.get("user_id")
+
+        if not user_id:
+            return jsonify({"error": "Missing required field: user_id"}), 400
+
+        success, result, status_code = mark_messages_read(
+            user_id, data.get("counterpart_id"), data.get("message_ids")
+        )
+
+        if success:
+            return jsonify(result), status_code
+        else:
+            return jsonify({"error": result}), status_code
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@message_api.route("/messages/stream", methods=["GET"])
+@exempt_from_request_limit
+def message_stream_route():
+    """Stream the messages a user receives as Server-Sent Events"""
+    try:
+        user_id = request.args.get("user_id")
+
+        if not user_id:
+            return jsonify({"error": "Missing required parameter: user_id"}), 400
+
+        try:
+            user_id = int(user_id)
+        except ValueError:
+            return jsonify({"error": "Invalid user_id format"}), 400
+
+        # Sent by EventSource when it reconnects; the query parameter covers the first connection
+        last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+
+        success, result, status_code = open_message_stream(user_id, last_event_id)
+
+        if success:
+            return sse_response(result.events(), on_close=result.close)
+        else:
+            response = jsonify({"error": result})
+            if status_code == 503:
+                response.headers["Retry-After"] = "5"
+            return response, status_code
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
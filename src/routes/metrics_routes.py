@@ -0,0 +1,22 @@
+"""
+Metrics routes - Prometheus scrape endpoint
+"""
+
+from flask import Blueprint, Response, jsonify
+from database import get_pool_stats
+from metrics import render_metrics, set_pool_gauges
+from utils.request_limit import exempt_from_request_limit
+
+metrics_api = Blueprint("metrics", __name__)
+
+
+@metrics_api.route("/metrics", methods=["GET"])
+@exempt_from_request_limit
+def get_metrics():
+    """Request, query, pool and cache metrics in the Prometheus text format"""
+    try:
+        set_pool_gauges(get_pool_stats())
+        body, content_type = render_metrics()
+        return Response(body, content_type=content_type)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -4,9 +4,13 @@ Organisation routes - HTTP endpoints for organisations
 
 from flask import Blueprint, request, jsonify
 from utils.validators import extract_request_data
+from utils.streaming import get_stream_format, stream_json_response
+from utils.http_cache import conditional_get
 from services.organisation_service import (
     create_organisation as create_organisation_service,
     get_organisations as get_organisations_service,
+    stream_organisations as stream_organisations_service,
+    get_organisations_watermark,
 )
 
 organisations_api = Blueprint("organisations", __name__)
@@ -29,9 +33,17 @@ def create_organisation():
 
 
 @organisations_api.route("/organisations", methods=["GET"])
+@conditional_get(get_organisations_watermark)
 def get_organisations():
     """Get all organisations with their allowed locations"""
     try:
+        stream_format = get_stream_format(request)
+        if stream_format:
+            success, result, status_code = stream_organisations_service()
+            if success:
+                return stream_json_response("organisations", result, stream_format)
+            return jsonify({"error": result}), status_code
+
         success, result, status_code = get_organisations_service()
 
         if success:
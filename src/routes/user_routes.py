@@ -4,9 +4,13 @@ User routes - HTTP endpoints for users
 
 from flask import Blueprint, request, jsonify
 from utils.validators import extract_request_data
+from utils.streaming import get_stream_format, stream_json_response
+from utils.uploads import get_upload, iter_upload_records
 from services.user_service import (
     create_user as create_user_service,
+    import_users as import_users_service,
     get_users as get_users_service,
+    stream_users as stream_users_service,
     delete_user as delete_user_service,
 )
 
@@ -29,11 +33,45 @@ def create_user():
         return jsonify({"error": str(e)}), 500
 
 
+@users_api.route("/users/bulk", methods=["POST"])
+def bulk_create_users():
+    """Create users from a CSV or NDJSON upload"""
+    try:
+        upload_format, stream = get_upload(request)
+        if upload_format is None:
+            return jsonify({"error": "Upload a CSV or NDJSON file"}), 400
+
+        success, result, status_code = import_users_service(
+            iter_upload_records(stream, upload_format)
+        )
+
+        if success:
+            return jsonify(result), status_code
+        else:
+            return jsonify({"error": result}), status_code
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @users_api.route("/users", methods=["GET"])
 def get_users():
-    """Get all users"""
+    """Get a page of users (keyset pagination with optional field projection)"""
     try:
-        success, result, status_code = get_users_service()
+        args = (
+            request.args.get("after_id"),
+            request.args.get("limit"),
+            request.args.get("fields"),
+        )
+
+        stream_format = get_stream_format(request)
+        if stream_format:
+            success, result, status_code = stream_users_service(*args)
+            if success:
+                return stream_json_response("users", result, stream_format)
+            return jsonify({"error": result}), status_code
+
+        success, result, status_code = get_users_service(*args)
 
         if success:
             return jsonify(result), status_code
@@ -2,22 +2,38 @@
 Event service - Business logic for events
 """
 
-from utils.validators import validate_required_fields, validate_date_format
-from utils.formatters import format_event
+from utils.validators import (
+    validate_required_fields,
+    validate_date_format,
+    validate_integer,
+    validate_id,
+    validate_boolean,
+)
+from utils.formatters import format_event, format_event_row, format_date
 from models.event_model import (
+    build_search_query,
     create_event_in_db,
     check_event_exists_by_name,
-    check_event_exists_by_id,
     delete_event_from_db,
     get_events_from_db,
+    iter_events_from_db,
     get_event_by_id_from_db,
-    check_user_interest_exists,
     add_user_interest_in_event,
+    add_assisted_interests_in_db,
     remove_user_interest_in_event,
 )
 from models.organisation_model import check_organisation_exists_by_id
-from models.user_model import check_user_exists
-from models.volunteer_model import check_association_exists, get_assisted_users_by_volunteer
+from models.watermark_model import get_table_watermark
+from models.precondition_model import (
+    get_interest_preconditions,
+    get_assisted_preconditions,
+    get_bulk_assisted_preconditions,
+)
+
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_SEARCH_LIMIT = 20
+MAX_BULK_ASSISTED_IDS = 1000
+MAX_PAGE_SIZE = 1000
 
 
 def validate_event_data(data):
@@ -90,25 +106,113 @@ def delete_event(event_id):
     return True, "Event deleted successfully", 200
 
 
-def get_events(name_filter=None, date_filter=None):
+def get_events_watermark():
+    """Get the (version, last_modified) watermark of event data for conditional requests"""
+    # Interest counts live in their own table
+    return get_table_watermark("events", "event_interest_counts")
+
+
+def validate_event_filters(args):
     """
-    Get all events with optional filters
-    Returns: (success: bool, result: dict/str, status_code: int)
+    Validate event listing filters from a dict of raw (string) values:
+    name, date, from, to, organisation_id, after_date, after_id, limit, prefix
+    Returns: (is_valid, filters: dict for get_events_from_db, error)
     """
-    # Parse date filter if provided
-    date_obj = None
-    if date_filter:
-        is_valid, date_obj, error = validate_date_format(date_filter)
+    filters = {"name_filter": args.get("name"), "prefix": True}
+
+    # A search with no searchable terms must not fall back to listing everything
+    if filters["name_filter"] and not build_search_query(filters["name_filter"]):
+        return False, None, "name must contain at least one letter or digit"
+
+    # Parse date filters if provided (dates compare against the DATE column)
+    for arg, key in (("date", "date_obj"), ("from", "date_from"), ("to", "date_to")):
+        if args.get(arg):
+            is_valid, date_obj, error = validate_date_format(args[arg])
+            if not is_valid:
+                return False, None, f"{error} ({arg})"
+            filters[key] = date_obj.date()
+
+    if args.get("organisation_id"):
+        is_valid, filters["organisation_id"], error = validate_integer(
+            args["organisation_id"], "organisation_id"
+        )
+        if not is_valid:
+            return False, None, error
+
+    # Keyset cursor: both halves of (date, id) are needed
+    after_date, after_id = args.get("after_date"), args.get("after_id")
+    if after_date or after_id:
+        if not (after_date and after_id):
+            return False, None, "after_date and after_id must be provided together"
+        if filters["name_filter"]:
+            return False, None, "Cursor pagination is not available for name searches"
+        is_valid, after_date, error = validate_date_format(after_date)
+        if not is_valid:
+            return False, None, f"{error} (after_date)"
+        is_valid, after_id, error = validate_integer(after_id, "after_id")
+        if not is_valid:
+            return False, None, error
+        filters["after"] = (after_date.date(), after_id)
+
+    if args.get("limit"):
+        is_valid, limit, error = validate_integer(args["limit"], "limit", minimum=1)
+        if not is_valid:
+            return False, None, error
+        filters["limit"] = min(limit, MAX_PAGE_SIZE)
+
+    if args.get("prefix"):
+        is_valid, filters["prefix"], error = validate_boolean(args["prefix"], "prefix")
         if not is_valid:
-            return False, error, 400
+            return False, None, error
 
-    # Get events
-    events = get_events_from_db(name_filter, date_obj)
+    return True, filters, None
+
+
+def get_events(args=None):
+    """
+    Get a page of events with optional filters (see validate_event_filters)
+    Listings are ordered by (date, id) and include `next_cursor` for keyset
+    pagination. A `name` filter is a full-text search over name and
+    description, ranked by relevance and limited to DEFAULT_SEARCH_LIMIT.
+    Returns: (success: bool, result: dict/str, status_code: int)
+    """
+    is_valid, filters, error = validate_event_filters(args or {})
+    if not is_valid:
+        return False, error, 400
+
+    searching = bool(filters["name_filter"])
+    page_size = filters.pop("limit", DEFAULT_SEARCH_LIMIT if searching else DEFAULT_PAGE_SIZE)
+
+    # Fetch one extra row to know whether another page exists
+    events = get_events_from_db(limit=page_size + 1, **filters)
+    has_more = len(events) > page_size
+    events = events[:page_size]
+
+    next_cursor = None
+    if has_more and not searching:
+        last = events[-1]
+        next_cursor = {"after_date": format_date(last["date"]), "after_id": last["id"]}
 
     # Format events
-    formatted_events = [format_event(event) for event in events]
+    formatted_events = [format_event_row(event) for event in events]
+
+    return (
+        True,
+        {"events": formatted_events, "count": len(formatted_events), "next_cursor": next_cursor},
+        200,
+    )
+
+
+def stream_events(args=None):
+    """
+    Stream all matching events, without the page size cap (rows are not yet formatted)
+    Returns: (success: bool, result: row iterator/str, status_code: int)
+    """
+    is_valid, filters, error = validate_event_filters(args or {})
+    if not is_valid:
+        return False, error, 400
 
-    return True, {"events": formatted_events, "count": len(formatted_events)}, 200
+    return True, iter_events_from_db(**filters), 200
 
 
 def mark_user_interest(event_id, user_id):
@@ -119,20 +223,24 @@ def mark_user_interest(event_id, user_id):
     if not user_id:
         return False, "Missing required field: user_id", 400
 
+    # Resolve all preconditions in one query
+    checks = get_interest_preconditions(user_id, event_id)
+
     # Verify user exists
-    if not check_user_exists(user_id):
+    if not checks["user_exists"]:
         return False, "User not found", 404
 
     # Verify event exists
-    if not check_event_exists_by_id(event_id):
+    if not checks["event_exists"]:
         return False, "Event not found", 404
 
     # Check if already interested
-    if check_user_interest_exists(user_id, event_id):
+    if checks["interest_exists"]:
         return True, "User is already interested in this event", 200
 
-    # Add interest
-    add_user_interest_in_event(user_id, event_id)
+    # Add interest (a concurrent request may have added it first)
+    if not add_user_interest_in_event(user_id, event_id):
+        return True, "User is already interested in this event", 200
 
     return True, "Interest registered successfully", 201
 
@@ -159,32 +267,99 @@ def mark_interest_for_assisted(event_id, volunteer_id, assisted_id):
     Mark an assisted user as interested in an event (by their volunteer)
     Returns: (success: bool, message: str, status_code: int)
     """
+    # Resolve all preconditions in one query
+    checks = get_assisted_preconditions(event_id, volunteer_id, assisted_id)
+
     # Verify volunteer exists
-    if not check_user_exists(volunteer_id):
+    if not checks["volunteer_exists"]:
         return False, "Volunteer not found", 404
 
     # Verify assisted user exists
-    if not check_user_exists(assisted_id):
+    if not checks["assisted_exists"]:
         return False, "Assisted user not found", 404
 
     # Verify event exists
-    if not check_event_exists_by_id(event_id):
+    if not checks["event_exists"]:
         return False, "Event not found", 404
 
     # Verify association exists
-    if not check_association_exists(volunteer_id, assisted_id):
+    if not checks["association_exists"]:
         return False, "User is not associated with this volunteer", 403
 
     # Check if already interested
-    if check_user_interest_exists(assisted_id, event_id):
+    if checks["interest_exists"]:
         return True, "User is already interested in this event", 200
 
     # Add interest (for the assisted user)
-    add_user_interest_in_event(assisted_id, event_id)
+    if not add_user_interest_in_event(assisted_id, event_id):
+        return True, "User is already interested in this event", 200
 
     return True, "Interest registered successfully for assisted user", 201
 
 
+def mark_interest_for_assisted_bulk(event_id, volunteer_id, assisted_ids):
+    """
+    Mark several assisted users as interested in an event (by their volunteer)
+    Associations are checked and interests inserted in one statement; each
+    assisted id gets its own outcome: registered, already_interested,
+    not_found, not_associated or invalid.
+    Returns: (success: bool, result: dict/str, status_code: int)
+    """
+    is_valid, volunteer_id, error = validate_id(volunteer_id, "volunteer_id")
+    if not is_valid:
+        return False, error, 400
+
+    if isinstance(assisted_ids, str):
+        assisted_ids = [value for value in assisted_ids.split(",") if value.strip()]
+    if not isinstance(assisted_ids, list) or not assisted_ids:
+        return False, "assisted_ids must be a non-empty list", 400
+    if len(assisted_ids) > MAX_BULK_ASSISTED_IDS:
+        return False, f"At most {MAX_BULK_ASSISTED_IDS} assisted_ids per request", 400
+
+    # One result per distinct id, in request order
+    results = []
+    pending = {}
+    for value in assisted_ids:
+        is_valid, assisted_id, error = validate_id(value, "assisted_id")
+        if not is_valid:
+            results.append({"assisted_id": value, "status": "invalid", "error": error})
+        elif assisted_id not in pending:
+            pending[assisted_id] = {"assisted_id": assisted_id}
+            results.append(pending[assisted_id])
+
+    # Resolve volunteer and event in one query
+    checks = get_bulk_assisted_preconditions(event_id, volunteer_id)
+    if not checks["volunteer_exists"]:
+        return False, "Volunteer not found", 404
+    if not checks["event_exists"]:
+        return False, "Event not found", 404
+
+    rows = add_assisted_interests_in_db(event_id, volunteer_id, list(pending)) if pending else []
+    for assisted_id, user_exists, associated, added in rows:
+        result = pending[assisted_id]
+        if added:
+            result["status"] = "registered"
+        elif not user_exists:
+            result.update(status="not_found", error="Assisted user not found")
+        elif not associated:
+            result.update(status="not_associated", error="User is not associated with this volunteer")
+        else:
+            result["status"] = "already_interested"
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+
+    return True, {
+        "event_id": event_id,
+        "volunteer_id": volunteer_id,
+        "results": results,
+        "registered_count": counts.get("registered", 0),
+        "already_interested_count": counts.get("already_interested", 0),
+        "failed_count": len(results) - counts.get("registered", 0) - counts.get("already_interested", 0),
+    }, 200
+
+
 def get_event_by_id(event_id):
     """
     Get a specific event by ID
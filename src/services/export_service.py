@@ -0,0 +1,100 @@
+"""
+Export service - Business logic for bulk CSV / NDJSON exports
+"""
+
+from utils.validators import validate_date_format, validate_integer
+from models.export_model import (
+    COPY_OPTIONS,
+    export_users_from_db,
+    export_events_from_db,
+    export_interests_from_db,
+)
+
+EXPORT_FORMATS = tuple(COPY_OPTIONS)
+
+
+def validate_export_args(args, allowed=("from", "to", "organisation_id")):
+    """
+    Validate export options from a dict of raw (string) values:
+    format (csv or ndjson), from / to (dd-MM-yyyy, inclusive) and ids
+    Returns: (is_valid, (export_format, filters), error)
+    """
+    export_format = (args.get("format") or "csv").lower()
+    if export_format not in EXPORT_FORMATS:
+        return False, None, f"Format must be one of: {', '.join(EXPORT_FORMATS)}"
+
+    filters = {}
+    for arg in ("from", "to"):
+        if arg in allowed and args.get(arg):
+            is_valid, date_obj, error = validate_date_format(args[arg])
+            if not is_valid:
+                return False, None, f"{error} ({arg})"
+            filters[arg] = date_obj.date()
+
+    for arg in ("organisation_id", "event_id"):
+        if arg in allowed and args.get(arg):
+            is_valid, filters[arg], error = validate_integer(args[arg], arg)
+            if not is_valid:
+                return False, None, error
+
+    return True, (export_format, filters), None
+
+
+def export_users(args):
+    """
+    Export users, optionally created within from/to or in one organisation
+    Returns: (success: bool, result: (format, bytes chunks)/str, status_code: int)
+    """
+    is_valid, params, error = validate_export_args(args)
+    if not is_valid:
+        return False, error, 400
+    export_format, filters = params
+
+    chunks = export_users_from_db(
+        export_format,
+        created_from=filters.get("from"),
+        created_to=filters.get("to"),
+        organisation_id=filters.get("organisation_id"),
+    )
+    return True, (export_format, chunks), 200
+
+
+def export_events(args):
+    """
+    Export events, optionally dated within from/to or of one organisation
+    Returns: (success: bool, result: (format, bytes chunks)/str, status_code: int)
+    """
+    is_valid, params, error = validate_export_args(args)
+    if not is_valid:
+        return False, error, 400
+    export_format, filters = params
+
+    chunks = export_events_from_db(
+        export_format,
+        date_from=filters.get("from"),
+        date_to=filters.get("to"),
+        organisation_id=filters.get("organisation_id"),
+    )
+    return True, (export_format, chunks), 200
+
+
+def export_interests(args):
+    """
+    Export event interests, filtered on the event's date, organisation or id
+    Returns: (success: bool, result: (format, bytes chunks)/str, status_code: int)
+    """
+    is_valid, params, error = validate_export_args(
+        args, allowed=("from", "to", "organisation_id", "event_id")
+    )
+    if not is_valid:
+        return False, error, 400
+    export_format, filters = params
+
+    chunks = export_interests_from_db(
+        export_format,
+        date_from=filters.get("from"),
+        date_to=filters.get("to"),
+        organisation_id=filters.get("organisation_id"),
+        event_id=filters.get("event_id"),
+    )
+    return True, (export_format, chunks), 200
@@ -0,0 +1,125 @@
+"""
+Health service - Readiness checks for load balancers and orchestrators
+"""
+
+import os
+import threading
+import time
+from psycopg2 import OperationalError
+from database import PoolTimeoutError, get_pool_stats
+from db_init import load_migrations
+from models.health_model import probe_database
+
+# Seconds a readiness result is reused, so frequent probes from many
+# load balancers cost one database round-trip per process and interval
+HEALTH_CACHE_SECONDS = float(os.getenv("HEALTH_CACHE_SECONDS", "2"))
+# Seconds to wait for a pooled connection before reporting the pool as exhausted
+HEALTH_DB_TIMEOUT_SECONDS = float(os.getenv("HEALTH_DB_TIMEOUT_SECONDS", "2"))
+# Round-trip latency / share of pool connections in use above which the process is degraded
+HEALTH_DB_DEGRADED_MS = float(os.getenv("HEALTH_DB_DEGRADED_MS", "100"))
+HEALTH_POOL_DEGRADED_RATIO = float(os.getenv("HEALTH_POOL_DEGRADED_RATIO", "0.9"))
+# HTTP status of a degraded readiness answer (503 takes the process out of rotation)
+HEALTH_DEGRADED_STATUS = int(os.getenv("HEALTH_DEGRADED_STATUS", "503"))
+
+STATUS_CODES = {"ok": 200, "degraded": HEALTH_DEGRADED_STATUS, "down": 503}
+
+_expected_migrations = None
+_readiness = None
+_readiness_lock = threading.Lock()
+
+
+def _get_expected_migrations():
+    """Versions of the migration files shipped with this code (read once)"""
+    global _expected_migrations
+    if _expected_migrations is None:
+        _expected_migrations = {version for version, *_ in load_migrations()}
+    return _expected_migrations
+
+
+def _check_pool(stats):
+    saturation = stats["in_use"] / stats["max_size"]
+    degraded = saturation >= HEALTH_POOL_DEGRADED_RATIO or stats["waiting"] > 0
+    return {
+        "status": "degraded" if degraded else "ok",
+        "in_use": stats["in_use"],
+        "max_size": stats["max_size"],
+        "waiting": stats["waiting"],
+        "saturation": round(saturation, 3),
+    }
+
+
+def _check_migrations(applied):
+    expected = _get_expected_migrations()
+    pending = sorted(expected - applied)
+    return {
+        "status": "pending" if pending else "ok",
+        "applied": len(applied),
+        "latest": max(applied, default=None),
+        "pending": pending,
+        # Newer versions than this code knows about, e.g. during a rolling deploy
+        "unknown": sorted(applied - expected),
+    }
+
+
+def _probe():
+    """Run every check once; returns the readiness result"""
+    checks = {}
+
+    # Pool usage before our own borrow
+    stats = get_pool_stats()
+    if stats is not None:
+        checks["pool"] = _check_pool(stats)
+
+    try:
+        latency, applied = probe_database(HEALTH_DB_TIMEOUT_SECONDS)
+    except PoolTimeoutError as e:
+        checks["database"] = {"status": "down", "error": str(e)}
+        checks["pool"] = dict(checks.get("pool", {}), status="exhausted")
+    except OperationalError as e:
+        checks["database"] = {"status": "down", "error": str(e).strip()}
+    else:
+        latency_ms = latency * 1000
+        checks["database"] = {
+            "status": "degraded" if latency_ms >= HEALTH_DB_DEGRADED_MS else "ok",
+            "latency_ms": round(latency_ms, 3),
+            "degraded_ms": HEALTH_DB_DEGRADED_MS,
+        }
+        checks["migrations"] = _check_migrations(applied)
+
+    if stats is None:
+        stats = get_pool_stats()
+        if stats is not None:
+            checks["pool"] = _check_pool(stats)
+
+    statuses = {check["status"] for check in checks.values()}
+    if statuses & {"down", "exhausted", "pending"}:
+        status = "down"
+    elif "degraded" in statuses:
+        status = "degraded"
+    else:
+        status = "ok"
+    return {"status": status, "checks": checks, "checked_at": time.time()}
+
+
+def get_readiness():
+    """
+    Check whether this process can serve traffic: database reachable and
+    fast enough, connection pool not saturated, no pending migrations.
+    Results are cached for HEALTH_CACHE_SECONDS and concurrent callers share one probe.
+    Returns: (success: bool, result: dict, status_code: int)
+    """
+    global _readiness
+    readiness = _readiness
+    if readiness is None or time.monotonic() - readiness[0] >= HEALTH_CACHE_SECONDS:
+        with _readiness_lock:
+            readiness = _readiness
+            if readiness is None or time.monotonic() - readiness[0] >= HEALTH_CACHE_SECONDS:
+                result = _probe()
+                readiness = _readiness = (time.monotonic(), result)
+                return _readiness_response(readiness[1], cached=False)
+    return _readiness_response(readiness[1], cached=True)
+
+
+def _readiness_response(result, cached):
+    status_code = STATUS_CODES[result["status"]]
+    return status_code == 200, dict(result, cached=cached), status_code
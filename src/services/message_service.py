@@ -2,9 +2,63 @@
 Message service - Business logic for in-app messaging
 """
 
-from models.message_model import create_message, get_messages_for_user
+import os
+from utils.validators import validate_integer, validate_timestamp
+from models.message_model import (
+    create_message,
+    get_messages_for_user,
+    get_threads_for_user,
+    get_unread_total,
+    get_thread_messages,
+    mark_thread_as_read,
+    mark_messages_as_read,
+)
 from models.user_model import check_user_exists
-from models.volunteer_model import check_association_exists, check_user_is_assisted, get_volunteer_by_assisted
+from message_notifications import StreamUnavailableError, get_message_listener
+from models.precondition_model import get_message_preconditions
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_READ_MESSAGE_IDS = 1000
+# Months of messages kept besides the current one; archive_messages.py archives older ones
+MESSAGE_RETENTION_MONTHS = int(os.getenv("MESSAGE_RETENTION_MONTHS", "24"))
+
+
+def validate_page(args):
+    """
+    Validate keyset pagination parameters from a dict of raw (string) values:
+    limit, before_at (ISO 8601 timestamp) and before_id
+    Returns: (is_valid, (before: tuple or None, limit: int or None), error)
+    """
+    before = None
+    before_at, before_id = args.get("before_at"), args.get("before_id")
+    if before_at or before_id:
+        if not (before_at and before_id):
+            return False, None, "before_at and before_id must be provided together"
+        is_valid, before_at, error = validate_timestamp(before_at, "before_at")
+        if not is_valid:
+            return False, None, error
+        is_valid, before_id, error = validate_integer(before_id, "before_id")
+        if not is_valid:
+            return False, None, error
+        before = (before_at, before_id)
+
+    limit = None
+    if args.get("limit"):
+        is_valid, limit, error = validate_integer(args["limit"], "limit", minimum=1)
+        if not is_valid:
+            return False, None, error
+        limit = min(limit, MAX_PAGE_SIZE)
+
+    return True, (before, limit), None
+
+
+def _next_cursor(rows, page_size, timestamp_field, id_field):
+    """Cursor of the page after `rows` (fetched with page_size + 1), or None"""
+    if len(rows) <= page_size:
+        return None
+    last = rows[page_size - 1]
+    return {"before_at": last[timestamp_field].isoformat(), "before_id": last[id_field]}
 
 
 def send_message(sender_id, receiver_id, message_text):
@@ -16,28 +70,20 @@ def send_message(sender_id, receiver_id, message_text):
     if not message_text or not message_text.strip():
         return False, "Message cannot be empty", 400
 
+    # Resolve all preconditions in one query
+    checks = get_message_preconditions(sender_id, receiver_id)
+
     # Verify users exist
-    if not check_user_exists(sender_id):
+    if not checks["sender_exists"]:
         return False, "Sender not found", 404
 
-    if not check_user_exists(receiver_id):
+    if not checks["receiver_exists"]:
         return False, "Receiver not found", 404
 
     # Check if users can communicate
     # Volunteers can message their assisted users
     # Assisted users can message their volunteer
-    can_communicate = False
-
-    # Check if sender is volunteer and receiver is assisted
-    if check_association_exists(sender_id, receiver_id):
-        can_communicate = True
-
-    # Check if sender is assisted and receiver is volunteer
-    volunteer = get_volunteer_by_assisted(sender_id)
-    if volunteer and volunteer["id"] == receiver_id:
-        can_communicate = True
-
-    if not can_communicate:
+    if not checks["can_communicate"]:
         return (
             False,
             "Users can only communicate if they have a volunteer-assisted relationship",
@@ -59,24 +105,183 @@ def send_message(sender_id, receiver_id, message_text):
         return False, f"Failed to send message: {str(e)}", 500
 
 
-def get_user_messages(user_id):
+def get_user_messages(user_id, args=None):
     """
-    Get all messages for a user
+    Get the messages received by a user, newest first
+    Without `limit` or a cursor every message is returned; with them the
+    result is a page and includes `next_cursor` (see validate_page).
     Returns: (success: bool, result: dict/str, status_code: int)
     """
+    is_valid, page, error = validate_page(args or {})
+    if not is_valid:
+        return False, error, 400
+    before, limit = page
+
     # Verify user exists
     if not check_user_exists(user_id):
         return False, "User not found", 404
 
-    # Get messages
-    messages = get_messages_for_user(user_id)
+    if before is None and limit is None:
+        messages = get_messages_for_user(user_id)
+        return True, {"messages": messages, "count": len(messages)}, 200
+
+    # Fetch one extra row to know whether another page exists
+    page_size = limit or DEFAULT_PAGE_SIZE
+    messages = get_messages_for_user(user_id, before, page_size + 1)
+    next_cursor = _next_cursor(messages, page_size, "created_at", "id")
+    messages = messages[:page_size]
+
+    return (
+        True,
+        {"messages": messages, "count": len(messages), "next_cursor": next_cursor},
+        200,
+    )
+
+
+def get_user_threads(user_id, args=None):
+    """
+    Get a page of a user's conversations, most recent first, each with its
+    last message and the user's unread count, plus the user's total unread count
+    Returns: (success: bool, result: dict/str, status_code: int)
+    """
+    is_valid, page, error = validate_page(args or {})
+    if not is_valid:
+        return False, error, 400
+    before, limit = page
+
+    if not check_user_exists(user_id):
+        return False, "User not found", 404
+
+    # Fetch one extra row to know whether another page exists
+    page_size = limit or DEFAULT_PAGE_SIZE
+    threads = get_threads_for_user(user_id, before, page_size + 1)
+    next_cursor = _next_cursor(threads, page_size, "last_message_at", "counterpart_id")
+
+    formatted_threads = [
+        {
+            "counterpart_id": thread["counterpart_id"],
+            "counterpart_name": thread["counterpart_name"],
+            "unread_count": thread["unread_count"],
+            "last_message": {
+                "id": thread["last_message_id"],
+                "sender_id": thread["last_sender_id"],
+                "message": thread["last_message"],
+                "created_at": thread["last_message_at"],
+            },
+        }
+        for thread in threads[:page_size]
+    ]
+
+    return (
+        True,
+        {
+            "threads": formatted_threads,
+            "count": len(formatted_threads),
+            "unread_total": get_unread_total(user_id),
+            "next_cursor": next_cursor,
+        },
+        200,
+    )
+
+
+def get_thread(user_id, counterpart_id, args=None):
+    """
+    Get a page of the messages exchanged by two users, newest first
+    Returns: (success: bool, result: dict/str, status_code: int)
+    """
+    is_valid, page, error = validate_page(args or {})
+    if not is_valid:
+        return False, error, 400
+    before, limit = page
+
+    # Resolve both users in one query
+    checks = get_message_preconditions(user_id, counterpart_id)
+    if not checks["sender_exists"]:
+        return False, "User not found", 404
+    if not checks["receiver_exists"]:
+        return False, "Counterpart not found", 404
+
+    # Fetch one extra row to know whether another page exists
+    page_size = limit or DEFAULT_PAGE_SIZE
+    messages = get_thread_messages(user_id, counterpart_id, before, page_size + 1)
+    next_cursor = _next_cursor(messages, page_size, "created_at", "id")
+    messages = messages[:page_size]
 
     return (
         True,
         {
-            "messages": [msg for msg in messages],
+            "user_id": user_id,
+            "counterpart_id": counterpart_id,
+            "messages": messages,
             "count": len(messages),
+            "next_cursor": next_cursor,
         },
         200,
     )
 
+
+def mark_messages_read(user_id, counterpart_id=None, message_ids=None):
+    """
+    Mark messages received by a user as read: every message from
+    `counterpart_id`, or the listed `message_ids` (a list or comma-separated string)
+    Returns: (success: bool, result: dict/str, status_code: int)
+    """
+    is_valid, user_id, error = validate_integer(user_id, "user_id", minimum=1)
+    if not is_valid:
+        return False, error, 400
+
+    if (counterpart_id is None) == (message_ids is None):
+        return False, "Provide either counterpart_id or message_ids", 400
+
+    if counterpart_id is not None:
+        is_valid, counterpart_id, error = validate_integer(counterpart_id, "counterpart_id", minimum=1)
+        if not is_valid:
+            return False, error, 400
+    else:
+        if isinstance(message_ids, str):
+            message_ids = [value for value in message_ids.split(",") if value.strip()]
+        if not isinstance(message_ids, list) or not message_ids:
+            return False, "message_ids must be a non-empty list", 400
+        if len(message_ids) > MAX_READ_MESSAGE_IDS:
+            return False, f"At most {MAX_READ_MESSAGE_IDS} message_ids per request", 400
+        parsed_ids = set()
+        for value in message_ids:
+            is_valid, message_id, error = validate_integer(value, "message_id", minimum=1)
+            if not is_valid:
+                return False, error, 400
+            parsed_ids.add(message_id)
+
+    if not check_user_exists(user_id):
+        return False, "User not found", 404
+
+    if counterpart_id is not None:
+        marked = mark_thread_as_read(user_id, counterpart_id)
+    else:
+        marked = mark_messages_as_read(user_id, sorted(parsed_ids), MESSAGE_RETENTION_MONTHS)
+
+    return True, {"message": "Messages marked as read", "marked_count": marked}, 200
+
+
+def open_message_stream(user_id, last_event_id=None):
+    """
+    Open a stream of the messages a user receives from now on, after
+    replaying those newer than `last_event_id` (the last message id the
+    client saw) when given
+    Returns: (success: bool, result: Subscription/str, status_code: int)
+    """
+    if last_event_id is not None and last_event_id != "":
+        is_valid, last_event_id, error = validate_integer(last_event_id, "last_event_id")
+        if not is_valid:
+            return False, error, 400
+    else:
+        last_event_id = None
+
+    if not check_user_exists(user_id):
+        return False, "User not found", 404
+
+    try:
+        subscription = get_message_listener().subscribe(user_id, last_event_id)
+    except StreamUnavailableError as e:
+        return False, str(e), 503
+
+    return True, subscription, 200
@@ -6,9 +6,11 @@ from models.organisation_model import (
     create_organisation_in_db,
     check_organisation_exists_by_name,
     get_organisations_from_db,
+    iter_organisations_from_db,
 )
 from models.user_model import check_user_exists
-from models.location_model import check_municipality_exists, check_parish_exists
+from models.location_cache import get_location_index
+from models.watermark_model import get_table_watermark
 
 
 def validate_organisation_data(data):
@@ -45,16 +47,17 @@ def create_organisation(data):
     if not check_user_exists(data["head_user_id"]):
         return False, "User in charge not found", 404
 
-    # Get and verify municipalities
+    # Get and verify municipalities (in-memory lookups)
+    locations = get_location_index()
     allowed_municipality_ids = data.get("allowed_municipality_ids", [])
     for mun_id in allowed_municipality_ids:
-        if not check_municipality_exists(mun_id):
+        if not locations.has_municipality(mun_id):
             return False, f"Municipality with id {mun_id} not found", 404
 
     # Get and verify parishes
     allowed_parish_ids = data.get("allowed_parish_ids", [])
     for parish_id in allowed_parish_ids:
-        if not check_parish_exists(parish_id):
+        if not locations.has_parish(parish_id):
             return False, f"Parish with id {parish_id} not found", 404
 
     # Create organisation
@@ -87,3 +90,22 @@ def get_organisations():
         {"organisations": [org for org in organisations], "count": len(organisations)},
         200,
     )
+
+
+def stream_organisations():
+    """
+    Stream all organisations
+    Returns: (success: bool, result: row iterator/str, status_code: int)
+    """
+    return True, iter_organisations_from_db(), 200
+
+
+def get_organisations_watermark():
+    """Get the (version, last_modified) watermark of organisation data for conditional requests"""
+    return get_table_watermark(
+        "organisations",
+        "organisation_allowed_municipalities",
+        "organisation_allowed_parishes",
+        "municipalities",
+        "parishes",
+    )
@@ -4,13 +4,14 @@ Transport service - Business logic for transport requests
 
 from models.transport_model import (
     create_transport_request,
-    check_transport_request_exists,
     get_transport_requests_by_event,
     delete_transport_request,
 )
 from models.event_model import check_event_exists_by_id
-from models.user_model import check_user_exists
-from models.volunteer_model import check_association_exists
+from models.precondition_model import (
+    get_transport_request_preconditions,
+    get_assisted_preconditions,
+)
 
 
 def create_transport_request_service(event_id, user_id, requested_by_volunteer_id=None):
@@ -18,20 +19,25 @@ def create_transport_request_service(event_id, user_id, requested_by_volunteer_i
     Create a transport request for an event
     Returns: (success: bool, result: dict/str, status_code: int)
     """
+    # Resolve all preconditions in one query
+    checks = get_transport_request_preconditions(
+        event_id, user_id, requested_by_volunteer_id
+    )
+
     # Verify event exists
-    if not check_event_exists_by_id(event_id):
+    if not checks["event_exists"]:
         return False, "Event not found", 404
 
     # Verify user exists
-    if not check_user_exists(user_id):
+    if not checks["user_exists"]:
         return False, "User not found", 404
 
     # If requested by volunteer, verify association exists
     if requested_by_volunteer_id:
-        if not check_user_exists(requested_by_volunteer_id):
+        if not checks["volunteer_exists"]:
             return False, "Volunteer not found", 404
 
-        if not check_association_exists(requested_by_volunteer_id, user_id):
+        if not checks["association_exists"]:
             return (
                 False,
                 "User is not associated with this volunteer",
@@ -39,7 +45,7 @@ def create_transport_request_service(event_id, user_id, requested_by_volunteer_i
             )
 
     # Check if request already exists
-    if check_transport_request_exists(event_id, user_id):
+    if checks["transport_request_exists"]:
         return False, "Transport request already exists for this user and event", 409
 
     # Create transport request
@@ -62,24 +68,27 @@ def create_transport_request_for_assisted(event_id, volunteer_id, assisted_id):
     Create a transport request for an assisted user (by their volunteer)
     Returns: (success: bool, result: dict/str, status_code: int)
     """
+    # Resolve all preconditions in one query
+    checks = get_assisted_preconditions(event_id, volunteer_id, assisted_id)
+
     # Verify volunteer exists
-    if not check_user_exists(volunteer_id):
+    if not checks["volunteer_exists"]:
         return False, "Volunteer not found", 404
 
     # Verify assisted user exists
-    if not check_user_exists(assisted_id):
+    if not checks["assisted_exists"]:
         return False, "Assisted user not found", 404
 
     # Verify event exists
-    if not check_event_exists_by_id(event_id):
+    if not checks["event_exists"]:
         return False, "Event not found", 404
 
     # Verify association exists
-    if not check_association_exists(volunteer_id, assisted_id):
+    if not checks["association_exists"]:
         return False, "User is not associated with this volunteer", 403
 
     # Check if request already exists
-    if check_transport_request_exists(event_id, assisted_id):
+    if checks["transport_request_exists"]:
         return False, "Transport request already exists for this user and event", 409
 
     # Create transport request (for the assisted user, requested by volunteer)
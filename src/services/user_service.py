@@ -2,14 +2,41 @@
 User service - Business logic for users
 """
 
-from utils.validators import validate_required_fields, validate_gender
+import csv
+from utils.validators import (
+    MAX_DB_INTEGER,
+    validate_required_fields,
+    validate_gender,
+    validate_integer,
+    validate_boolean,
+)
 from models.user_model import (
+    USER_FIELDS,
+    bulk_create_users_in_db,
     check_user_exists,
     create_user_in_db,
     get_users_from_db,
+    iter_users_from_db,
     delete_user_from_db,
 )
 from models.organisation_model import check_organisation_exists_by_id
+from models.postal_code_index import get_postal_code_index, resolve_postal_code
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Column sizes of the users table, checked before imported rows reach COPY
+USER_FIELD_LENGTHS = {
+    "name": 255,
+    "street": 255,
+    "street_number": 20,
+    "apartment": 50,
+    "postal_code": 20,
+    "city": 100,
+}
+
+# Row errors listed in a bulk import response (all of them are counted)
+MAX_REPORTED_IMPORT_ERRORS = 1000
 
 
 def validate_user_data(data):
@@ -51,8 +78,11 @@ def create_user(data):
     if organisation_id and not check_organisation_exists_by_id(organisation_id):
         return False, "Organisation not found", 404
 
+    # Resolve district, municipality and parish from the postal code (None if unknown)
+    location = resolve_postal_code(data["postal_code"])
+
     # Create user
-    result = create_user_in_db(data)
+    result = create_user_in_db(data, location)
 
     if not result:
         return False, "Failed to create user", 500
@@ -60,13 +90,184 @@ def create_user(data):
     return True, {"message": "User created successfully", "user": result}, 201
 
 
-def get_users():
+def validate_import_row(data, postal_codes):
+    """
+    Validate one imported user and convert it to bulk_create_users_in_db columns
+    `postal_codes` is the PostalCodeIndex used to resolve the location.
+    Returns: (is_valid, values, error)
+    """
+    is_valid, error = validate_user_data(data)
+    if not is_valid:
+        return False, None, error
+
+    is_valid, age, error = validate_integer(data["age"], "age", maximum=MAX_DB_INTEGER)
+    if not is_valid:
+        return False, None, error
+
+    for field, max_length in USER_FIELD_LENGTHS.items():
+        value = data.get(field)
+        if value is not None and len(str(value)) > max_length:
+            return False, None, f"{field} must be at most {max_length} characters"
+        # Postgres text cannot hold NUL characters (COPY would fail for every row)
+        if value is not None and "\x00" in str(value):
+            return False, None, f"{field} must not contain NUL characters"
+
+    flags = {}
+    for field in ("is_volunteer", "is_assisted", "has_organisation"):
+        value = data.get(field)
+        if value is None or value == "":
+            flags[field] = False
+            continue
+        is_valid, flags[field], error = validate_boolean(value, field)
+        if not is_valid:
+            return False, None, error
+
+    organisation_id = data.get("organisation_id")
+    if organisation_id is None or organisation_id == "":
+        organisation_id = None
+    else:
+        is_valid, organisation_id, error = validate_integer(
+            organisation_id, "organisation_id", minimum=1, maximum=MAX_DB_INTEGER
+        )
+        if not is_valid:
+            return False, None, error
+
+    postal_code = str(data["postal_code"])
+    location = postal_codes.resolve(postal_code) or {}
+    apartment = data.get("apartment")
+
+    return True, (
+        str(data["name"]),
+        age,
+        data["gender"],
+        str(data["street"]),
+        str(data["street_number"]),
+        str(apartment) if apartment is not None else None,
+        postal_code,
+        str(data["city"]),
+        location.get("district_id"),
+        location.get("municipality_id"),
+        location.get("parish_id"),
+        location.get("latitude"),
+        location.get("longitude"),
+        flags["is_volunteer"],
+        flags["is_assisted"],
+        flags["has_organisation"],
+        organisation_id,
+    ), None
+
+
+def import_users(records):
+    """
+    Create users in bulk from (row_number, record, error) tuples, e.g. an upload
+    Records are validated in one streaming pass and valid ones are COPYed in;
+    invalid rows are skipped and reported.
+    Returns: (success: bool, result: dict/str, status_code: int)
+    """
+    errors = []
+    error_count = 0
+    upload_error = None
+
+    # Load the index up front: rows are validated while COPY holds the connection
+    postal_codes = get_postal_code_index()
+
+    def report(row_number, error):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_IMPORT_ERRORS:
+            errors.append({"row": row_number, "error": error})
+
+    def valid_rows():
+        nonlocal upload_error
+        try:
+            for row_number, record, error in records:
+                if error is None:
+                    is_valid, values, error = validate_import_row(record, postal_codes)
+                    if is_valid:
+                        yield (row_number,) + values
+                        continue
+                report(row_number, error)
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Aborts the COPY; psycopg2 re-raises it wrapped in a database error
+            upload_error = e
+            raise
+
+    try:
+        created, missing_organisations = bulk_create_users_in_db(valid_rows())
+    except Exception:
+        if upload_error is None:
+            raise
+        return False, f"Invalid upload: {upload_error}", 400
+
+    for row_number, organisation_id in missing_organisations:
+        report(row_number, "Organisation not found")
+    errors.sort(key=lambda error: error["row"])
+
+    return True, {
+        "created": [{"row": row_number, "id": user_id} for row_number, user_id in created],
+        "created_count": len(created),
+        "errors": errors,
+        "error_count": error_count,
+    }, 200
+
+
+def validate_user_listing(after_id=None, limit=None, fields=None):
+    """
+    Validate user listing parameters
+    Returns: (is_valid, (after_id, limit, fields), error)
+    """
+    if after_id is not None:
+        is_valid, after_id, error = validate_integer(after_id, "after_id")
+        if not is_valid:
+            return False, None, error
+
+    if limit is not None:
+        is_valid, limit, error = validate_integer(limit, "limit", minimum=1)
+        if not is_valid:
+            return False, None, error
+
+    selected_fields = None
+    if fields:
+        selected_fields = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = selected_fields.difference(USER_FIELDS)
+        if unknown:
+            return False, None, f"Unknown fields: {', '.join(sorted(unknown))}"
+
+    return True, (after_id, limit, selected_fields), None
+
+
+def get_users(after_id=None, limit=None, fields=None):
     """
-    Get all users
+    Get a page of users, ordered by id
+    `after_id` is the cursor from the previous page, `limit` is capped at
+    MAX_PAGE_SIZE and `fields` is a comma-separated list of columns.
     Returns: (success: bool, result: dict/str, status_code: int)
     """
-    users = get_users_from_db()
-    return True, {"users": [user for user in users], "count": len(users)}, 200
+    is_valid, params, error = validate_user_listing(after_id, limit, fields)
+    if not is_valid:
+        return False, error, 400
+    after_id, limit, selected_fields = params
+    page_size = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+
+    # Fetch one extra row to know whether another page exists
+    users = get_users_from_db(after_id, page_size + 1, selected_fields)
+    has_more = len(users) > page_size
+    users = users[:page_size]
+
+    next_cursor = {"after_id": users[-1]["id"]} if has_more else None
+    return True, {"users": users, "count": len(users), "next_cursor": next_cursor}, 200
+
+
+def stream_users(after_id=None, limit=None, fields=None):
+    """
+    Stream users, ordered by id, without the page size cap
+    Returns: (success: bool, result: row iterator/str, status_code: int)
+    """
+    is_valid, params, error = validate_user_listing(after_id, limit, fields)
+    if not is_valid:
+        return False, error, 400
+
+    return True, iter_users_from_db(*params), 200
 
 
 def delete_user(user_id):
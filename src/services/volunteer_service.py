@@ -5,7 +5,6 @@ Volunteer service - Business logic for volunteer-assisted relationships
 from models.volunteer_model import (
     get_or_create_user_code,
     get_user_code,
-    get_user_by_code,
     associate_volunteer_assisted,
     disassociate_volunteer_assisted,
     get_assisted_users_by_volunteer,
@@ -14,6 +13,7 @@ from models.volunteer_model import (
     check_association_exists,
 )
 from models.user_model import check_user_exists
+from models.precondition_model import get_association_preconditions
 
 
 def get_user_qr_code(user_id):
@@ -41,25 +41,28 @@ def associate_by_code(volunteer_id, code):
     Associate a volunteer with an assisted user using QR code
     Returns: (success: bool, result: dict/str, status_code: int)
     """
+    # Resolve all preconditions in one query
+    checks = get_association_preconditions(volunteer_id, code)
+
     # Verify volunteer exists
-    if not check_user_exists(volunteer_id):
+    if not checks["volunteer_exists"]:
         return False, "Volunteer not found", 404
 
     # Check if volunteer is already assisted (can't read codes)
-    if check_user_is_assisted(volunteer_id):
+    if checks["volunteer_is_assisted"]:
         return False, "Assisted users cannot read QR codes", 403
 
     # Get user by code
-    assisted_id = get_user_by_code(code)
+    assisted_id = checks["assisted_id"]
     if not assisted_id:
         return False, "Invalid QR code", 404
 
     # Verify assisted user exists
-    if not check_user_exists(assisted_id):
+    if not checks["assisted_exists"]:
         return False, "User associated with code not found", 404
 
     # Check if user is already assisted
-    if check_user_is_assisted(assisted_id):
+    if checks["assisted_is_assisted"]:
         return False, "This user is already associated with a volunteer", 409
 
     # Check if trying to associate with self
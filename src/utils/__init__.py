@@ -5,19 +5,45 @@ Utility functions package
 from .validators import (
     validate_required_fields,
     validate_date_format,
+    validate_timestamp,
+    validate_integer,
+    validate_id,
+    validate_boolean,
     validate_gender,
     extract_request_data,
 )
 from .formatters import (
     format_event,
+    format_event_row,
     format_date,
 )
+from .streaming import (
+    get_stream_format,
+    stream_json_response,
+    sse_response,
+    gzip_chunks,
+)
+from .uploads import (
+    get_upload,
+    iter_upload_records,
+)
 
 __all__ = [
     "validate_required_fields",
     "validate_date_format",
+    "validate_timestamp",
+    "validate_integer",
+    "validate_id",
+    "validate_boolean",
     "validate_gender",
     "extract_request_data",
     "format_event",
+    "format_event_row",
     "format_date",
+    "get_stream_format",
+    "stream_json_response",
+    "sse_response",
+    "gzip_chunks",
+    "get_upload",
+    "iter_upload_records",
 ]
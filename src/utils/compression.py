@@ -0,0 +1,101 @@
+"""
+Response compression - gzip / Brotli negotiated from Accept-Encoding
+
+Registered on the app with init_compression(app). Textual bodies of at
+least COMPRESS_MIN_SIZE bytes are compressed; streamed responses are
+compressed chunk by chunk and flushed, so clients still receive rows as
+they are produced. Brotli is used when the `brotli` package is installed
+and the client prefers or accepts it.
+"""
+
+import gzip
+import os
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+# Content types worth compressing; everything else (e.g. gzip exports) is sent as-is
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "text/csv",
+    "text/html",
+    "text/plain",
+    "text/xml",
+}
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def _compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+def _compress_stream(chunks, encoding):
+    """Compress each chunk and flush it, so streamed rows are not held back"""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=COMPRESS_BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def compress_response(response):
+    """Compress a response if the client accepts it and it is worth it (after_request hook)"""
+    if response.status_code == 304:
+        # Same Vary as the 200 it revalidates
+        response.vary.add("Accept-Encoding")
+        return response
+
+    if (
+        response.status_code < 200
+        or response.status_code == 204
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or "Content-Encoding" in response.headers
+        or request.method == "HEAD"
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.iter_encoded(), encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        response.set_data(_compress(data, encoding))
+
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_compression(app):
+    """Compress responses; register before other after_request hooks so it runs last"""
+    app.after_request(compress_response)
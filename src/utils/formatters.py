@@ -2,7 +2,11 @@
 Data formatting utilities
 """
 
+from functools import lru_cache
 
+
+# Event listings repeat the same few hundred dates; strftime dominated their cost
+@lru_cache(maxsize=4096)
 def format_date(date_obj):
     """Format a date object to dd-MM-yyyy string"""
     if date_obj is None:
@@ -10,6 +14,15 @@ def format_date(date_obj):
     return date_obj.strftime("%d-%m-%Y")
 
 
+def format_event_row(event):
+    """
+    Format, in place, an event row that already holds exactly the API fields
+    (as listed by the events query), avoiding a new dict per row
+    """
+    event["date"] = format_date(event["date"])
+    return event
+
+
 def format_event(event):
     """Format an event record for API response"""
     return {
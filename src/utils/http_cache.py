@@ -0,0 +1,87 @@
+"""
+HTTP caching utilities - ETag / Last-Modified validators and 304 responses
+"""
+
+import hashlib
+from datetime import timezone
+from functools import wraps
+from flask import current_app, make_response, request
+from metrics import record_cache_lookup
+
+
+def _as_utc(moment):
+    """HTTP dates have second precision and are UTC; naive times are taken as UTC"""
+    if moment is None:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _set_cache_control(response, max_age, public):
+    if max_age:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    if public:
+        response.cache_control.public = True
+    else:
+        response.cache_control.private = True
+
+
+def conditional_get(watermark, max_age=0, public=True):
+    """
+    Decorator for GET views that answers conditional requests.
+
+    `watermark()` must cheaply return (version, last_modified) for the data
+    behind the view. The ETag hashes that version with the request path,
+    query string and Accept header; it is weak because it identifies the
+    data, not the bytes (which vary with Content-Encoding). If-None-Match /
+    If-Modified-Since hits return 304 without running the view.
+    `max_age=0` sends `Cache-Control: no-cache` (always revalidate).
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                version, last_modified = watermark()
+            except Exception:
+                # Let the view produce its usual error response
+                return view(*args, **kwargs)
+
+            etag = hashlib.sha1(
+                repr(
+                    (request.endpoint, request.full_path, request.headers.get("Accept"), version)
+                ).encode()
+            ).hexdigest()
+            last_modified = _as_utc(last_modified)
+
+            # If-None-Match takes precedence over If-Modified-Since
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                not_modified = bool(
+                    last_modified
+                    and request.if_modified_since
+                    and last_modified <= request.if_modified_since
+                )
+
+            record_cache_lookup("http_conditional", not_modified)
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            _set_cache_control(response, max_age, public)
+            response.vary.add("Accept")
+            return response
+
+        return wrapper
+
+    return decorator
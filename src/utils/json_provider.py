@@ -0,0 +1,66 @@
+"""
+JSON provider - Fast response serialisation with orjson, stdlib fallback
+"""
+
+import decimal
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _orjson_default(o):
+    """Types orjson leaves to us, encoded exactly like Flask's default provider"""
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Drop-in for Flask's DefaultJSONProvider backed by orjson when installed.
+    psycopg2 RealDictRows (dict subclasses), lists, UUIDs and dataclasses are
+    encoded natively; dates keep Flask's RFC 822 format and Decimals become
+    strings. Keys are sorted as before, but non-ASCII text is written as
+    UTF-8 instead of \\u escapes. Calls with extra json.dumps keyword
+    arguments fall back to the stdlib.
+    """
+
+    available = orjson is not None
+
+    def _dumps_bytes(self, obj, indent=False):
+        options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_orjson_default, option=options)
+
+    def dumps(self, obj, **kwargs):
+        """Serialize data as JSON to a string"""
+        if not self.available or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        """Deserialize data as JSON from a string or bytes"""
+        if not self.available or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Serialize the arguments as a JSON response, writing bytes directly"""
+        if not self.available:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype
+        )
@@ -0,0 +1,62 @@
+"""
+Request limit - Cap the requests a process serves at once
+
+Registered on the app with init_request_limit(app). Gunicorn workers run
+a thread per open message stream on top of GUNICORN_THREADS (see
+gunicorn.conf.py), so without a cap a burst of ordinary requests could use
+all of those threads and queue on the connection pool. Each request takes
+one of MAX_CONCURRENT_REQUESTS slots, waits up to REQUEST_QUEUE_TIMEOUT
+seconds for one (then gets 503), and gives it back once its response has
+been sent. Views marked with @exempt_from_request_limit (message streams,
+which hold no database connection) do not take a slot.
+"""
+
+import os
+import threading
+from flask import current_app, g, jsonify, request
+
+# Ordinary requests served at once per process, and the wait for a free slot
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", os.getenv("GUNICORN_THREADS", "4")))
+REQUEST_QUEUE_TIMEOUT = float(os.getenv("REQUEST_QUEUE_TIMEOUT", "30"))
+
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+
+def exempt_from_request_limit(view):
+    """Mark a view as not counting towards MAX_CONCURRENT_REQUESTS"""
+    view.request_limit_exempt = True
+    return view
+
+
+def _acquire_slot():
+    view = current_app.view_functions.get(request.endpoint)
+    if getattr(view, "request_limit_exempt", False):
+        return None
+
+    if not _slots.acquire(timeout=REQUEST_QUEUE_TIMEOUT):
+        response = jsonify({"error": "Server busy, retry later"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "5"
+        return response
+    g.request_slot = True
+    return None
+
+
+def _release_slot_when_sent(response):
+    # Streamed bodies are still being produced: hold the slot until they are closed
+    if g.pop("request_slot", False):
+        response.call_on_close(_slots.release)
+    return response
+
+
+def _release_slot(exc):
+    # The request failed before producing a response
+    if g.pop("request_slot", False):
+        _slots.release()
+
+
+def init_request_limit(app):
+    """Limit the requests the app serves at once (register before any other after_request hook)"""
+    app.before_request(_acquire_slot)
+    app.after_request(_release_slot_when_sent)
+    app.teardown_request(_release_slot)
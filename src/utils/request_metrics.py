@@ -0,0 +1,129 @@
+"""
+Request metrics - Per-request timing, database usage and slow-request log
+
+Registered on the app with init_request_metrics(app). Every request gets
+a RequestMetrics collector in `g`; pooled connections and cursors (see
+database.py) report connection checkouts and statements to it. When the
+request ends the numbers are attributed to its endpoint
+(`blueprint.view`) in the Prometheus metrics, requests slower than SLOW_REQUEST_MS are written to
+the `events_api.slow_requests` logger as one JSON object, and, in debug
+mode or with SERVER_TIMING=1, a Server-Timing header exposes them to the
+browser's dev tools.
+
+Statements are recorded as written in the models, without parameter
+values. COPY streams run on their own thread and are not counted.
+"""
+
+import json
+import logging
+import os
+import time
+from flask import current_app, g, request
+from database import get_pool_stats
+from metrics import observe_request, set_pool_gauges
+
+# Requests taking at least this long are logged (0 disables the log)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+# Server-Timing header: "1" / "0", or unset to follow app.debug
+SERVER_TIMING = os.getenv("SERVER_TIMING")
+
+# Statements kept per request for the slow-request log, and their max length
+MAX_RECORDED_STATEMENTS = 50
+MAX_STATEMENT_LENGTH = 1000
+
+slow_request_logger = logging.getLogger("events_api.slow_requests")
+
+
+class RequestMetrics:
+    """Wall time, connections, queries and database time of one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = None
+        self.connections = 0
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = []
+
+    def record_connection(self):
+        self.connections += 1
+
+    def record_query(self, statement, seconds):
+        self.queries += 1
+        self.db_time += seconds
+        if len(self.statements) < MAX_RECORDED_STATEMENTS:
+            if not isinstance(statement, str):
+                statement = statement.decode() if isinstance(statement, bytes) else str(statement)
+            statement = " ".join(statement.split())[:MAX_STATEMENT_LENGTH]
+            self.statements.append((statement, seconds))
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+        return self.duration
+
+    def to_dict(self):
+        return {
+            "duration_ms": round(self.duration * 1000, 3),
+            "db_time_ms": round(self.db_time * 1000, 3),
+            "connections": self.connections,
+            "queries": self.queries,
+        }
+
+
+def _server_timing(metrics):
+    return (
+        f"total;dur={metrics.duration * 1000:.1f}, "
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries, '
+        f'{metrics.connections} connections"'
+    )
+
+
+def _log_slow_request(metrics, response):
+    record = {
+        "event": "slow_request",
+        "method": request.method,
+        "path": request.path,
+        "endpoint": request.endpoint,
+        "blueprint": request.blueprint,
+        "status": response.status_code,
+        **metrics.to_dict(),
+        "statements": [
+            {"sql": statement, "duration_ms": round(seconds * 1000, 3)}
+            for statement, seconds in metrics.statements
+        ],
+    }
+    if metrics.queries > len(metrics.statements):
+        record["statements_truncated"] = metrics.queries - len(metrics.statements)
+    slow_request_logger.warning(json.dumps(record))
+
+
+def start_request_metrics():
+    """Start collecting metrics for the current request (before_request hook)"""
+    g.request_metrics = RequestMetrics()
+
+
+def finish_request_metrics(response):
+    """Attribute the request's metrics to its endpoint and report them (after_request hook)"""
+    metrics = g.get("request_metrics")
+    if metrics is None:
+        return response
+
+    metrics.finish()
+    observe_request(
+        request.blueprint, request.endpoint, request.method, response.status_code, metrics.duration
+    )
+    set_pool_gauges(get_pool_stats())
+    if SLOW_REQUEST_MS and metrics.duration * 1000 >= SLOW_REQUEST_MS:
+        _log_slow_request(metrics, response)
+    if current_app.debug if SERVER_TIMING is None else SERVER_TIMING == "1":
+        response.headers["Server-Timing"] = _server_timing(metrics)
+    return response
+
+
+def init_request_metrics(app):
+    """
+    Collect per-request metrics; register after init_compression and before
+    init_unit_of_work so the request's commit is included in the timings
+    """
+    app.before_request(start_request_metrics)
+    app.after_request(finish_request_metrics)
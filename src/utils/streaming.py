@@ -0,0 +1,120 @@
+"""
+Streaming response utilities
+"""
+
+import zlib
+from flask import Response, current_app, stream_with_context
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+SSE_MIMETYPE = "text/event-stream"
+
+# Milliseconds an EventSource waits before reconnecting to a closed stream
+SSE_RETRY_MS = 3000
+
+# Rows serialised per chunk written to the client
+CHUNK_ROWS = 500
+
+
+def get_stream_format(request):
+    """
+    Get the requested streaming format: "ndjson", "json" or None (no streaming)
+    Enabled with ?stream=1|json|ndjson or an `Accept: application/x-ndjson` header.
+    """
+    stream = (request.args.get("stream") or "").lower()
+    if stream == "ndjson":
+        return "ndjson"
+    if stream in ("1", "true", "json"):
+        return "json"
+
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+    if best == NDJSON_MIMETYPE:
+        return "ndjson"
+    return None
+
+
+def _json_chunks(key, rows, formatter):
+    """Emit {"<key>": [...], "count": n} a chunk of rows at a time"""
+    dumps = current_app.json.dumps
+    yield "{" + dumps(key) + ": ["
+
+    count = 0
+    chunk = []
+    for row in rows:
+        chunk.append(dumps(formatter(row) if formatter else row))
+        if len(chunk) >= CHUNK_ROWS:
+            yield ("," if count else "") + ",".join(chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        yield ("," if count else "") + ",".join(chunk)
+        count += len(chunk)
+
+    yield '], "count": ' + str(count) + "}"
+
+
+def _ndjson_chunks(rows, formatter):
+    """Emit one JSON document per line, a chunk of rows at a time"""
+    dumps = current_app.json.dumps
+    chunk = []
+    for row in rows:
+        chunk.append(dumps(formatter(row) if formatter else row))
+        if len(chunk) >= CHUNK_ROWS:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+def stream_json_response(key, rows, stream_format="json", formatter=None):
+    """
+    Build a streaming Response from an iterable of rows
+    JSON mode keeps the usual {"<key>": [...], "count": n} envelope.
+    """
+    if stream_format == "ndjson":
+        chunks = _ndjson_chunks(rows, formatter)
+        mimetype = NDJSON_MIMETYPE
+    else:
+        chunks = _json_chunks(key, rows, formatter)
+        mimetype = "application/json"
+
+    return Response(stream_with_context(chunks), mimetype=mimetype)
+
+
+def _sse_chunks(events):
+    """Emit Server-Sent Events from (event, id, data) tuples; None sends a heartbeat comment"""
+    dumps = current_app.json.dumps
+    # Sent at once so the client knows the stream is open
+    yield f"retry: {SSE_RETRY_MS}\n\n"
+    for event in events:
+        if event is None:
+            yield ": keepalive\n\n"
+            continue
+        name, event_id, data = event
+        chunk = f"event: {name}\n"
+        if event_id is not None:
+            chunk += f"id: {event_id}\n"
+        yield chunk + f"data: {dumps(data)}\n\n"
+
+
+def sse_response(events, on_close=None):
+    """
+    Build a text/event-stream Response from an iterable of events (see _sse_chunks)
+    `on_close` runs when the server is done with the response, even if it was never iterated.
+    """
+    response = Response(stream_with_context(_sse_chunks(events)), mimetype=SSE_MIMETYPE)
+    response.headers["Cache-Control"] = "no-cache"
+    # Stop reverse proxies (nginx) from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    if on_close is not None:
+        response.call_on_close(on_close)
+    return response
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress an iterable of bytes chunks into a gzip stream, chunk by chunk"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
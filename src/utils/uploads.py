@@ -0,0 +1,70 @@
+"""
+Upload utilities - Read CSV / NDJSON request bodies one record at a time
+"""
+
+import csv
+import io
+import json
+from utils.streaming import NDJSON_MIMETYPE
+
+UPLOAD_FORMATS = {
+    "csv": "csv",
+    "text/csv": "csv",
+    "ndjson": "ndjson",
+    "jsonl": "ndjson",
+    NDJSON_MIMETYPE: "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+def get_upload(request):
+    """
+    Get (format, binary stream) of an uploaded file, or (None, None)
+    The file is either the `file` field of a multipart form or the raw body.
+    The format comes from ?format=csv|ndjson, the file extension or the Content-Type.
+    """
+    upload = request.files.get("file")
+    if upload is not None:
+        stream = upload.stream
+        extension = upload.filename.rsplit(".", 1)[-1].lower() if "." in (upload.filename or "") else None
+        candidates = (request.args.get("format"), extension, upload.mimetype)
+    else:
+        stream = request.stream
+        candidates = (request.args.get("format"), request.mimetype)
+
+    for candidate in candidates:
+        upload_format = UPLOAD_FORMATS.get((candidate or "").lower())
+        if upload_format:
+            return upload_format, stream
+    return None, None
+
+
+def iter_upload_records(stream, upload_format):
+    """
+    Yield (row_number, record, error) for each record of a CSV or NDJSON upload
+    Row numbers start at 1 and exclude the CSV header; blank NDJSON lines are skipped.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    if upload_format == "csv":
+        for row_number, record in enumerate(csv.DictReader(text), start=1):
+            if None in record:
+                yield row_number, None, "Too many values"
+            else:
+                yield row_number, record, None
+        return
+
+    row_number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield row_number, None, "Invalid JSON"
+            continue
+        if isinstance(record, dict):
+            yield row_number, record, None
+        else:
+            yield row_number, None, "Each line must be a JSON object"
@@ -4,6 +4,9 @@ Input validation utilities
 
 from datetime import datetime
 
+# Largest value of a Postgres INTEGER column (ids are SERIAL)
+MAX_DB_INTEGER = 2_147_483_647
+
 
 def validate_required_fields(data, required_fields):
     """Validate that all required fields are present and non-empty"""
@@ -22,6 +25,53 @@ def validate_date_format(date_str):
         return False, None, "Invalid date format. Use dd-MM-yyyy"
 
 
+def validate_timestamp(value, field_name):
+    """Validate and parse an ISO 8601 timestamp (e.g. a pagination cursor)"""
+    try:
+        return True, datetime.fromisoformat(value), None
+    except (TypeError, ValueError):
+        return False, None, f"Invalid {field_name} format. Use an ISO 8601 timestamp"
+
+
+def validate_integer(value, field_name, minimum=0, maximum=None):
+    """Validate and parse an integer (e.g. from a query string)"""
+    try:
+        int_value = int(value)
+    except (TypeError, ValueError):
+        return False, None, f"Invalid {field_name} format"
+    if int_value < minimum:
+        return False, None, f"{field_name} must be at least {minimum}"
+    if maximum is not None and int_value > maximum:
+        return False, None, f"{field_name} must be at most {maximum}"
+    return True, int_value, None
+
+
+def validate_id(value, field_name):
+    """
+    Validate a row id from a JSON body: an integer or a string of digits,
+    between 1 and MAX_DB_INTEGER (floats and booleans are rejected)
+    """
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value.strip())
+    if isinstance(value, bool) or not isinstance(value, int):
+        return False, None, f"Invalid {field_name} format"
+    if not 1 <= value <= MAX_DB_INTEGER:
+        return False, None, f"{field_name} must be between 1 and {MAX_DB_INTEGER}"
+    return True, value, None
+
+
+def validate_boolean(value, field_name):
+    """Validate and parse a boolean flag (e.g. from a query string)"""
+    if isinstance(value, bool):
+        return True, value, None
+    normalized = str(value).strip().lower()
+    if normalized in ("1", "true", "yes"):
+        return True, True, None
+    if normalized in ("0", "false", "no"):
+        return True, False, None
+    return False, None, f"Invalid {field_name} value. Use true or false"
+
+
 def validate_gender(gender):
     """Validate gender field"""
     valid_genders = ["male", "female", "other"]
@@ -0,0 +1,32 @@
+"""
+Test setup - the application modules are imported from src/, as when running the app
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import database  # noqa: E402
+
+
+@pytest.fixture
+def db_pool():
+    """A fresh connection pool to the configured (migrated) database, or skip without one"""
+    database.close_pool()
+    try:
+        pool = database.get_pool()
+    except Exception as e:
+        pytest.skip(f"Database unavailable: {e}")
+    yield pool
+    database.close_pool()
+
+
+@pytest.fixture
+def client(db_pool):
+    """A test client of the app, backed by db_pool"""
+    from app import app
+
+    return app.test_client()
@@ -0,0 +1,31 @@
+"""
+Location cache - changes made by another process reach the running app
+"""
+
+import database
+from models import location_cache
+
+
+def test_location_changes_are_picked_up(client, monkeypatch):
+    monkeypatch.setattr(location_cache, "LOCATION_INDEX_CHECK_SECONDS", 0)
+    before = client.get("/districts")
+    assert before.status_code == 200
+
+    # A separate connection, as the gazetteer CLI would use
+    conn = database.get_pool().getconn()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("INSERT INTO districts (name) VALUES ('Location Cache Test') RETURNING id")
+            district_id = cursor.fetchone()[0]
+        conn.commit()
+
+        after = client.get("/districts")
+        assert after.status_code == 200
+        assert district_id in [district["id"] for district in after.get_json()["districts"]]
+        assert after.headers["ETag"] != before.headers["ETag"]
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM districts WHERE name = 'Location Cache Test'")
+        conn.commit()
+        database.get_pool().putconn(conn)
+        location_cache.invalidate_location_index()
@@ -0,0 +1,95 @@
+"""
+Bulk user import (POST /users/bulk) - rows COPY cannot store are row errors
+"""
+
+import json
+
+import database
+from services.user_service import validate_import_row
+from utils.validators import MAX_DB_INTEGER
+
+
+class NoPostalCodes:
+    """PostalCodeIndex stand-in that knows no postal code"""
+
+    def resolve(self, postal_code):
+        return None
+
+
+def make_user(**fields):
+    user = {
+        "name": "Import Test",
+        "age": 30,
+        "gender": "female",
+        "street": "Rua do Souto",
+        "street_number": "1",
+        "postal_code": "4700-000",
+        "city": "Braga",
+    }
+    user.update(fields)
+    return user
+
+
+def post_users(client, users):
+    body = "\n".join(json.dumps(user) for user in users)
+    return client.post("/users/bulk?format=ndjson", data=body.encode(), content_type="application/x-ndjson")
+
+
+def delete_users(response):
+    ids = [row["id"] for row in (response.get_json() or {}).get("created", [])]
+    conn = database.get_pool().getconn()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET LOCAL statement_timeout = 0")
+            cursor.execute("DELETE FROM users WHERE id = ANY(%s)", (ids,))
+        conn.commit()
+    finally:
+        database.get_pool().putconn(conn)
+
+
+def test_age_above_database_integer_is_a_row_error():
+    is_valid, values, error = validate_import_row(make_user(age=MAX_DB_INTEGER + 1), NoPostalCodes())
+    assert not is_valid
+    assert error == f"age must be at most {MAX_DB_INTEGER}"
+
+
+def test_organisation_id_above_database_integer_is_a_row_error():
+    user = make_user(organisation_id=str(MAX_DB_INTEGER + 1))
+    is_valid, values, error = validate_import_row(user, NoPostalCodes())
+    assert not is_valid
+    assert error == f"organisation_id must be at most {MAX_DB_INTEGER}"
+
+
+def test_nul_character_is_a_row_error():
+    is_valid, values, error = validate_import_row(make_user(name="Im\x00port"), NoPostalCodes())
+    assert not is_valid
+    assert error == "name must not contain NUL characters"
+
+
+def test_unstorable_rows_do_not_fail_the_import(client):
+    response = post_users(client, [
+        make_user(age=99999999999),
+        make_user(organisation_id=99999999999),
+        make_user(name="Im\x00port"),
+        make_user(),
+    ])
+    try:
+        assert response.status_code == 200
+        result = response.get_json()
+        assert result["created_count"] == 1
+        assert [error["row"] for error in result["errors"]] == [1, 2, 3]
+    finally:
+        delete_users(response)
+
+
+def test_import_is_not_bound_by_the_statement_timeout(client, monkeypatch):
+    # The pool is recreated with a timeout far shorter than the COPY takes
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "100")
+    database.close_pool()
+
+    response = post_users(client, [make_user(name=f"Import Test {n}") for n in range(30000)])
+    try:
+        assert response.status_code == 200, response.get_json()
+        assert response.get_json()["created_count"] == 30000
+    finally:
+        delete_users(response)